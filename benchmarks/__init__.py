@@ -0,0 +1 @@
+"""Measure the speed of the program hot paths."""
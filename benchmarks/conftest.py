@@ -0,0 +1,155 @@
+"""Build the synthetic databases used by the benchmarks."""
+
+import os
+import shutil
+from pathlib import Path
+from random import Random
+from typing import Dict, List, Tuple
+
+import pytest
+from _pytest.tmpdir import TempPathFactory
+from repository_orm import Repository
+from tests.factories import RecurrentTaskFactory, TaskFactory
+
+from pydo.adapters import load_repository
+from pydo.config import Config
+from pydo.model.task import RecurrentTask, Task, TaskCounters, TaskState, TaskType
+
+# Number of tasks of the databases, for example PYDO_BENCHMARK_SIZES=1000,10000
+SIZES = [
+    int(size)
+    for size in os.environ.get("PYDO_BENCHMARK_SIZES", "1000,10000,100000").split(",")
+]
+BACKENDS = ["tinydb", "sqlite"]
+AREAS = [f"area_{index}" for index in range(20)]
+MODELS = [Task, RecurrentTask, TaskCounters]
+CONFIG_PATH = Path(__file__).parent.parent / "tests" / "assets" / "config.yaml"
+
+
+class Database:
+    """Define a synthetic database of tasks stored with a backend.
+
+    Args:
+        backend: Repository backend, tinydb or sqlite.
+        size: Number of tasks of the database.
+        directory: Directory with the database files and the configuration.
+        tmp_path_factory: Factory of the directories of the database copies.
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        size: int,
+        directory: Path,
+        tmp_path_factory: TempPathFactory,
+    ) -> None:
+        """Configure the attributes."""
+        self.backend = backend
+        self.size = size
+        self.directory = directory
+        self.tmp_path_factory = tmp_path_factory
+        self.config_path = str(directory / "config.yaml")
+
+    @property
+    def url(self) -> str:
+        """Return the url of the database."""
+        return _database_url(self.backend, self.directory)
+
+    def load(self) -> Repository:
+        """Load the repository of the database."""
+        return load_repository(MODELS, self.url)
+
+    def copy(self) -> Repository:
+        """Load the repository of a copy of the database, to change it."""
+        directory = self.tmp_path_factory.mktemp("copy")
+        for path in self.directory.glob("database*"):
+            shutil.copy(path, directory)
+        return load_repository(MODELS, _database_url(self.backend, directory))
+
+
+def _database_url(backend: str, directory: Path) -> str:
+    """Return the url of the database of a backend stored in a directory."""
+    if backend == "sqlite":
+        return f"sqlite:///{directory}/database.db"
+    return f"tinydb://{directory}/database.tinydb"
+
+
+def generate_tasks(size: int) -> List[TaskType]:
+    """Generate the tasks of a realistic database.
+
+    A tenth of the tasks are recurrent parents with their open child, and from the
+    rest of tasks, two out of three are closed.
+    """
+    random = Random(size)  # noqa: S311, the tasks don't need to be secure.
+    tasks: List[TaskType] = []
+    next_ids: Dict[type, int] = {Task: 0, RecurrentTask: 0}
+
+    def add(task: TaskType) -> TaskType:
+        task.id_ = next_ids[type(task)]
+        next_ids[type(task)] += 1
+        tasks.append(task)
+        return task
+
+    while len(tasks) < size:
+        area = random.choice(AREAS)
+        tags = random.sample(AREAS, random.randint(0, 2))
+        if random.random() < 0.05:
+            parent = add(
+                RecurrentTaskFactory.build(
+                    area=area, tags=tags, state=TaskState.BACKLOG, active=True
+                )
+            )
+            add(parent.breed_children())
+            continue
+        task = add(TaskFactory.build(area=area, tags=tags, state=TaskState.BACKLOG))
+        if random.random() < 2 / 3:
+            task.close(random.choice([TaskState.DONE, TaskState.DELETED]))
+
+    return tasks[:size]
+
+
+@pytest.fixture(scope="session")
+def databases() -> Dict[Tuple[str, int], Database]:
+    """Store the databases already built, to build each one once per session."""
+    return {}
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request: pytest.FixtureRequest) -> str:
+    """Return the backend of the database."""
+    return request.param
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"{size}_tasks")
+def size(request: pytest.FixtureRequest) -> int:
+    """Return the number of tasks of the database."""
+    return request.param
+
+
+@pytest.fixture()
+def database(
+    backend: str,
+    size: int,
+    databases: Dict[Tuple[str, int], Database],
+    tmp_path_factory: TempPathFactory,
+) -> Database:
+    """Return the synthetic database of a backend and size."""
+    if (backend, size) not in databases:
+        directory = tmp_path_factory.mktemp(f"{backend}_{size}")
+        database = Database(backend, size, directory, tmp_path_factory)
+
+        repo = database.load()
+        tasks = generate_tasks(size)
+        for task in tasks:
+            repo.add(task)
+        repo.add(TaskCounters.from_tasks(tasks))
+        repo.commit()
+
+        shutil.copyfile(CONFIG_PATH, database.config_path)
+        config = Config(database.config_path)
+        config.set("database_url", database.url)
+        config.save()
+
+        databases[(backend, size)] = database
+
+    return databases[(backend, size)]
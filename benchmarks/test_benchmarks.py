@@ -0,0 +1,104 @@
+"""Measure the time of the program hot paths.
+
+Run them with `make benchmark`, which fails if any of them is slower than the
+baseline committed in `benchmarks/baseline.json`, refresh it with
+`make benchmark-baseline`.
+"""
+
+import os
+import subprocess  # noqa: S404, we run our own program.
+import sys
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from pydo import services, views
+from pydo.config import Config
+from pydo.model.date import convert_date
+from pydo.model.task import RecurrentTask, TaskChanges, TaskSelector
+
+from .conftest import AREAS, Database
+
+Arguments = Tuple[Tuple[Any, ...], Dict[str, Any]]
+
+
+def test_add_task(benchmark: BenchmarkFixture, database: Database) -> None:
+    """Measure the addition of a task."""
+
+    def setup() -> Arguments:
+        change = TaskChanges(task_attributes={"description": "New", "area": AREAS[0]})
+        return (database.copy(), change), {}
+
+    benchmark.pedantic(services.add_task, setup=setup, rounds=5)
+
+
+def test_do_tasks_by_filter(benchmark: BenchmarkFixture, database: Database) -> None:
+    """Measure the completion of the open tasks of an area."""
+
+    def setup() -> Arguments:
+        return (database.copy(), TaskSelector(task_filter={"area": AREAS[1]})), {}
+
+    benchmark.pedantic(services.do_tasks, setup=setup, rounds=5)
+
+
+def test_modify_tasks_by_filter(
+    benchmark: BenchmarkFixture, database: Database
+) -> None:
+    """Measure the modification of the tasks of an area."""
+
+    def setup() -> Arguments:
+        selector = TaskSelector(task_filter={"area": AREAS[2]})
+        change = TaskChanges(task_attributes={"priority": 5})
+        return (database.copy(), selector, change), {}
+
+    benchmark.pedantic(services.modify_tasks, setup=setup, rounds=5)
+
+
+def test_print_task_report(benchmark: BenchmarkFixture, database: Database) -> None:
+    """Measure the print of the open tasks report."""
+    repo = database.load()
+    config = Config(database.config_path)
+
+    benchmark.pedantic(views.print_task_report, args=(repo, config, "open"), rounds=3)
+
+
+def test_cli_cold_start(benchmark: BenchmarkFixture, database: Database) -> None:
+    """Measure a short report run in a new process."""
+    command = [
+        sys.executable,
+        "-c",
+        "from pydo.entrypoints.cli import cli; cli()",
+        "open",
+        "limit:10",
+    ]
+    environ = {**os.environ, "PYDO_CONFIG_PATH": database.config_path}
+
+    benchmark.pedantic(
+        subprocess.run,  # noqa: S603, the command is static.
+        args=(command,),
+        kwargs={"env": environ, "check": True, "stdout": subprocess.DEVNULL},
+        rounds=5,
+    )
+
+
+@pytest.mark.parametrize(
+    "human_date", ["now", "tomorrow", "monday", "2021-06-01", "1d", "1y2mo3w"]
+)
+def test_convert_date(benchmark: BenchmarkFixture, human_date: str) -> None:
+    """Measure the parse of the human dates."""
+    benchmark(convert_date, human_date)
+
+
+@pytest.mark.parametrize("recurrence", ["1d", "1w", "1mo", "1y", "1rmo"])
+def test_next_recurring_due(benchmark: BenchmarkFixture, recurrence: str) -> None:
+    """Measure the due date of the next child of an old recurrent task."""
+    task = RecurrentTask(
+        description="Recurrent",
+        due=datetime(2000, 1, 1),
+        recurrence=recurrence,
+        recurrence_type="recurring",
+    )
+
+    benchmark(task._next_recurring_due)
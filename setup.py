@@ -51,7 +51,7 @@ setup(
     ],
     entry_points="""
         [console_scripts]
-        pydo=pydo.entrypoints.cli:cli
+        pydo=pydo.entrypoints.client:main
     """,
     install_requires=[
         "click",
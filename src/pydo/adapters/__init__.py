@@ -0,0 +1,128 @@
+"""Define the storage adapters of the program.
+
+Classes:
+    EntityQuery: Search of entities with it's sorting and pagination.
+    IndexedTinyDBRepository: TinyDB repository with secondary indexes.
+    SQLiteRepository: SQLite repository with columns for the filtered attributes.
+
+Functions:
+    get_entities: Get the entities of many ids from a repository.
+    load_repository: Load the repository that matches the database url protocol.
+    query_entities: Run a query in a repository.
+"""
+
+from typing import Any, List, Optional, Type
+
+from repository_orm import (
+    Entity,
+    EntityID,
+    EntityNotFoundError,
+    OptionalModelOrModels,
+    Repository,
+)
+from repository_orm.adapters.abstract import Entity as EntityType
+from repository_orm import load_repository as load_orm_repository
+
+from ..profiling import timed
+from .query import EntityQuery, Row, entity_row, parse_sort, row_builder, sort_key
+from .sqlite import SQLiteRepository
+from .tinydb import IndexedTinyDBRepository
+
+
+def load_repository(
+    models: List[Type[Entity]],
+    database_url: Optional[str] = None,
+    journal: bool = False,
+) -> Repository:
+    """Load the Repository object that matches the database_url protocol.
+
+    The TinyDB databases are loaded with the indexed repository, the SQLite ones
+    with the SQLite repository, and the rest of protocols are delegated to
+    repository_orm.
+
+    Args:
+        models: Entity models stored in the repository.
+        database_url: Url to connect to the storage backend.
+        journal: Append the changes of the TinyDB databases to a journal.
+    """
+    if database_url is not None and database_url.startswith("tinydb://"):
+        return IndexedTinyDBRepository(models, database_url, journal)
+    if database_url is not None and database_url.startswith("sqlite://"):
+        return SQLiteRepository(models, database_url)
+    return load_orm_repository(models, database_url)
+
+
+@timed
+def get_entities(
+    repo: Repository,
+    ids_: List[EntityID],
+    models: OptionalModelOrModels[EntityType] = None,
+) -> List[EntityType]:
+    """Get the entities of many ids from a repository.
+
+    The repositories of pydo fetch them in a single lookup, for the rest each entity
+    is fetched by it's id.
+
+    Args:
+        repo: Repository to query.
+        ids_: IDs of the entities to obtain, the duplicated ones are returned once.
+        models: Entity class or classes to obtain.
+
+    Returns:
+        entities: Entity objects of the ids in the order they were requested.
+
+    Raises:
+        EntityNotFoundError: If any of the entities is not found.
+    """
+    if isinstance(repo, (IndexedTinyDBRepository, SQLiteRepository)):
+        return repo.get_many(ids_, models)
+    return [repo.get(id_, models) for id_ in dict.fromkeys(ids_)]
+
+
+@timed
+def query_entities(repo: Repository, query: EntityQuery) -> List[Any]:
+    """Get the sorted page of the entities of a repository that match a query.
+
+    The repositories of pydo run the query natively, for the rest the entities are
+    searched and then sorted and paginated.
+
+    If the query has columns, the rows of the entities are returned instead.
+
+    Args:
+        repo: Repository to query.
+        query: Search, sorting and pagination of the entities.
+
+    Raises:
+        EntityNotFoundError: If the entities are not found.
+    """
+    if isinstance(repo, (IndexedTinyDBRepository, SQLiteRepository)):
+        return repo.query(query)
+
+    if len(query.fields) == 0:
+        entities = repo.all(query.models)
+    else:
+        entities = repo.search(query.fields, query.models)
+
+    entities = query.select(entities, getattr)
+    if len(entities) == 0:
+        raise EntityNotFoundError(
+            f"There are no entities in the repository that match the query {query}."
+        )
+    if query.columns:
+        return [entity_row(entity, query.columns) for entity in entities]
+    return entities
+
+
+__all__ = [
+    "EntityQuery",
+    "IndexedTinyDBRepository",
+    "Row",
+    "SQLiteRepository",
+    "entity_row",
+    "get_entities",
+    "load_repository",
+    "parse_sort",
+    "query_entities",
+    "row_builder",
+    "sort_key",
+]
@@ -0,0 +1,209 @@
+"""Define the queries that the repositories can run natively."""
+
+import heapq
+from collections import namedtuple
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache, total_ordering
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, Field  # noqa: E0611
+from pydantic.fields import SHAPE_SINGLETON  # noqa: E0611
+from repository_orm import Entity
+
+Item = TypeVar("Item")
+SortCriteria = List[Tuple[str, bool]]
+Row = Tuple[Any, ...]
+
+
+class EntityQuery(BaseModel):
+    """Define a search of entities with it's sorting and pagination.
+
+    Attributes:
+        fields: Dictionary with the {key}:{value} to search, if empty all the
+            entities of the models are selected.
+        models: Entity classes to search.
+        sort: Ordered list of attributes to sort by. If an attribute is prepended
+            with a - it's sorted decreasingly, if it's prepended with a + or nothing,
+            increasingly. The entities without the attribute go last.
+        limit: Maximum number of entities to return.
+        offset: Number of entities to skip.
+        columns: Attributes to read. If set, the query returns read-only named
+            tuples with these attributes instead of the entities. They're built from
+            the stored data without validating it, so use them only to read it.
+    """
+
+    fields: Dict[str, Any] = Field(default_factory=dict)
+    models: List[Type[Entity]]
+    sort: List[str] = Field(default_factory=list)
+    limit: Optional[int] = None
+    offset: int = 0
+    columns: List[str] = Field(default_factory=list)
+
+    @property
+    def sort_criteria(self) -> SortCriteria:
+        """Return the attributes to sort by and whether they're sorted decreasingly."""
+        return parse_sort(self.sort)
+
+    def select(
+        self,
+        items: Iterable[Item],
+        get_value: Callable[[Item, str], Any],
+    ) -> List[Item]:
+        """Sort and paginate the items that match the query.
+
+        If there is a limit, only the top items are kept in a heap instead of
+        sorting all of them.
+
+        Args:
+            items: Entities or stored documents that match the query fields.
+            get_value: Function that returns the value of an attribute of an item.
+        """
+        key = sort_key(self.sort_criteria, get_value)
+        if self.limit is None:
+            return sorted(items, key=key)[self.offset :]
+        return heapq.nsmallest(self.offset + self.limit, items, key=key)[self.offset :]
+
+
+@total_ordering
+class _Descending:
+    """Invert the order of a value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        """Configure the attributes."""
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        """Test if the values are equal."""
+        return bool(self.value == other.value)
+
+    def __lt__(self, other: Any) -> bool:
+        """Test if the value is greater than the other."""
+        return bool(other.value < self.value)
+
+
+def parse_sort(sort: List[str]) -> SortCriteria:
+    """Parse the attributes and directions of a list of sort criteria.
+
+    Args:
+        sort: Ordered list of attributes, prepended with - to sort decreasingly, or
+            with + or nothing to sort increasingly.
+
+    Returns:
+        List of the attributes and whether they're sorted decreasingly.
+    """
+    criteria = []
+    for criterion in sort:
+        if criterion[:1] == "-":
+            criteria.append((criterion[1:], True))
+        elif criterion[:1] == "+":
+            criteria.append((criterion[1:], False))
+        else:
+            criteria.append((criterion, False))
+    return criteria
+
+
+def sort_key(
+    criteria: SortCriteria, get_value: Callable[[Item, str], Any] = getattr
+) -> Callable[[Item], Tuple[Any, ...]]:
+    """Build the key that sorts the items by many attributes in one pass.
+
+    The None values go last regardless of the direction of the attribute, so they're
+    never compared with the rest of values. The enums are compared by their value.
+
+    Args:
+        criteria: Attributes to sort by and whether they're sorted decreasingly.
+        get_value: Function that returns the value of an attribute of an item.
+    """
+
+    def key(item: Item) -> Tuple[Any, ...]:
+        parts: List[Tuple[int, Any]] = []
+        for attribute, descending in criteria:
+            value = get_value(item, attribute)
+            if value is None:
+                parts.append((1, 0))
+                continue
+            if isinstance(value, Enum):
+                value = value.value
+            if descending:
+                parts.append((0, _Descending(value)))
+            else:
+                parts.append((0, value))
+        return tuple(parts)
+
+    return key
+
+
+def row_builder(
+    model: Type[Entity], columns: Iterable[str]
+) -> Callable[[Dict[str, Any]], Row]:
+    """Return the function that builds the rows of a model from its stored data.
+
+    The rows are named tuples with the columns as attributes. Instead of validating
+    the stored data with the model, only the columns are read, and the dates and
+    enums stored as strings are converted to their types. The missing columns get
+    the default value of the model attribute, or None if the model doesn't have it.
+
+    Args:
+        model: Entity class of the stored data.
+        columns: Attributes of the rows.
+    """
+    return _row_builder(model, tuple(dict.fromkeys(columns)))
+
+
+@lru_cache(maxsize=64)
+def _row_builder(
+    model: Type[Entity], columns: Tuple[str, ...]
+) -> Callable[[Dict[str, Any]], Row]:
+    """Build the row builder of a model and columns, see row_builder."""
+    row_type = _row_type(columns)
+    readers = [_column_reader(model, column) for column in columns]
+
+    def build(data: Dict[str, Any]) -> Row:
+        return row_type(*[reader(data) for reader in readers])
+
+    return build
+
+
+@lru_cache(maxsize=64)
+def _row_type(columns: Tuple[str, ...]) -> Type[Row]:
+    """Return the named tuple class of the rows with the columns."""
+    return namedtuple("Row", columns)
+
+
+def _column_reader(model: Type[Entity], column: str) -> Callable[[Dict[str, Any]], Any]:
+    """Return the function that reads the value of a column from the stored data."""
+    field = model.__fields__.get(column)
+    if field is None:
+        return lambda data: None
+
+    default = field.get_default()
+    converter: Optional[Callable[[Any], Any]] = None
+    if field.shape == SHAPE_SINGLETON and isinstance(field.type_, type):
+        if issubclass(field.type_, datetime):
+            converter = _parse_datetime
+        elif issubclass(field.type_, Enum):
+            converter = field.type_
+
+    def read(data: Dict[str, Any]) -> Any:
+        value = data.get(column, default)
+        if value is None or converter is None:
+            return value
+        return converter(value)
+
+    return read
+
+
+def _parse_datetime(value: Any) -> datetime:
+    """Convert a stored date to a datetime."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def entity_row(entity: Entity, columns: Iterable[str]) -> Row:
+    """Return the row of the columns of an entity, see row_builder."""
+    columns = tuple(dict.fromkeys(columns))
+    return _row_type(columns)(*[getattr(entity, column, None) for column in columns])
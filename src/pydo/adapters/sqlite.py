@@ -0,0 +1,525 @@
+"""Define the SQLite repository of the tasks."""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from repository_orm import EntityID, OptionalModelOrModels, OptionalModels, Repository
+from repository_orm.adapters.abstract import Entity, Models
+from repository_orm.exceptions import TooManyEntitiesError
+
+from .query import EntityQuery, row_builder
+
+log = logging.getLogger(__name__)
+
+# Entity attributes stored in their own column, they're the ones used by the report
+# filters and the searches of the services.
+COLUMNS = ("active", "state", "area", "parent_id")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entity (
+    model_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    active INTEGER,
+    state TEXT,
+    area TEXT,
+    parent_id INTEGER,
+    PRIMARY KEY (model_type, id)
+);
+CREATE TABLE IF NOT EXISTS entity_tag (
+    model_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (model_type, id, tag)
+);
+CREATE INDEX IF NOT EXISTS entity_active ON entity (model_type, active);
+CREATE INDEX IF NOT EXISTS entity_state ON entity (model_type, state);
+CREATE INDEX IF NOT EXISTS entity_area ON entity (area);
+CREATE INDEX IF NOT EXISTS entity_parent_id ON entity (parent_id);
+CREATE INDEX IF NOT EXISTS entity_tag_tag ON entity_tag (tag);
+"""
+
+# The upserts of SQLite need version 3.24, so the rows are replaced instead. They
+# keep their rowid, which is the insertion order of the entities.
+UPSERT_ENTITY = (
+    "INSERT OR REPLACE INTO entity "
+    "(rowid, model_type, id, data, active, state, area, parent_id) "
+    "VALUES ((SELECT rowid FROM entity WHERE model_type = ? AND id = ?), "
+    "?, ?, ?, ?, ?, ?, ?)"
+)
+# Maximum number of ids of a query, the older SQLite versions only accept 999
+# placeholders in a statement.
+MAX_QUERY_IDS = 500
+
+DELETE_ENTITY = "DELETE FROM entity WHERE model_type = ? AND id = ?"
+DELETE_TAGS = "DELETE FROM entity_tag WHERE model_type = ? AND id = ?"
+INSERT_TAG = "INSERT OR IGNORE INTO entity_tag (model_type, id, tag) VALUES (?, ?, ?)"
+
+
+class SQLiteRepository(Repository):
+    """Implement the repository pattern using SQLite.
+
+    Each entity is stored in a row of the entity table with the JSON of its
+    attributes. The attributes of the COLUMNS have their own indexed columns, and
+    the tags are stored in the entity_tag table, so the searches by them are solved
+    by SQLite. The rest of attributes are searched in the JSON.
+
+    The database is opened in WAL mode, so the reads don't block the writes, and
+    the statements are built with placeholders, so their compilation is reused from
+    the statement cache of the connection.
+
+    Like the TinyDB repository, the strings are searched as regular expressions.
+
+    Attributes:
+        database_file: Path to the SQLite database.
+        connection: Connection to the database.
+    """
+
+    def __init__(
+        self, models: OptionalModels[Entity] = None, database_url: str = ""
+    ) -> None:
+        """Initialize the repository attributes and the database schema.
+
+        Args:
+            database_url: URL specifying the connection to the database.
+            models: List of stored entity models.
+        """
+        super().__init__(models, database_url)
+        self.database_file = os.path.expanduser(database_url.replace("sqlite:///", ""))
+        try:
+            # The async services use the repository from their executor thread.
+            self.connection = sqlite3.connect(
+                self.database_file, cached_statements=256, check_same_thread=False
+            )
+        except sqlite3.OperationalError as error:
+            raise ConnectionError(
+                f"Could not create the database file: {self.database_file}"
+            ) from error
+        if sys.version_info >= (3, 8):
+            self.connection.create_function("REGEXP", 2, _regexp, deterministic=True)
+        else:  # pragma: no cover
+            self.connection.create_function("REGEXP", 2, _regexp)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.staged: Dict[str, List[Any]] = {"add": [], "remove": []}
+
+    def add(self, entity: Entity) -> Entity:
+        """Append an entity to the repository.
+
+        If the id is not set, autoincrement the last.
+
+        Args:
+            entity: Entity to add to the repository.
+
+        Returns:
+            entity
+        """
+        if isinstance(entity.id_, int) and entity.id_ < 0:
+            entity.id_ = self._next_id(entity)
+        self.staged["add"].append(entity)
+
+        return entity
+
+    def delete(self, entity: Entity) -> None:
+        """Delete an entity from the repository.
+
+        Args:
+            entity: Entity to remove from the repository.
+
+        Raises:
+            EntityNotFoundError: If the entity is not found.
+        """
+        self.get(entity.id_, type(entity))
+        self.staged["remove"].append(entity)
+
+    def get(
+        self, id_: EntityID, models: OptionalModelOrModels[Entity] = None
+    ) -> Entity:
+        """Obtain an entity from the repository by it's ID.
+
+        Args:
+            models: Entity class or classes to obtain.
+            id_: ID of the entity to obtain.
+
+        Returns:
+            entity: Entity object that matches the id_
+
+        Raises:
+            EntityNotFoundError: If the entity is not found.
+            TooManyEntitiesError: If more than one entity was found.
+        """
+        models = self._build_models(models)
+        where, parameters = _model_condition(models)
+        entities = self._select(f"{where} AND id = ?", [*parameters, id_], models)
+
+        if len(entities) == 1:
+            return entities[0]
+        if len(entities) == 0:
+            raise self._model_not_found(models, f" with id {id_}")
+        raise TooManyEntitiesError(f"More than one entity was found with the id {id_}")
+
+    def get_many(
+        self, ids_: List[EntityID], models: OptionalModelOrModels[Entity] = None
+    ) -> List[Entity]:
+        """Obtain the entities of many IDs with a single query per batch of ids.
+
+        Args:
+            ids_: IDs of the entities to obtain, the duplicated ones are returned once.
+            models: Entity class or classes to obtain.
+
+        Returns:
+            entities: Entity objects of the ids in the order they were requested.
+
+        Raises:
+            EntityNotFoundError: If any of the entities is not found.
+            TooManyEntitiesError: If more than one entity was found with an id.
+        """
+        models = self._build_models(models)
+        where, parameters = _model_condition(models)
+        unique_ids = list(dict.fromkeys(ids_))
+
+        found: Dict[EntityID, List[Entity]] = {}
+        for start in range(0, len(unique_ids), MAX_QUERY_IDS):
+            batch = unique_ids[start : start + MAX_QUERY_IDS]
+            placeholders = ", ".join("?" for _ in batch)
+            for entity in self._select(
+                f"{where} AND id IN ({placeholders})", [*parameters, *batch], models
+            ):
+                found.setdefault(entity.id_, []).append(entity)
+
+        for id_ in unique_ids:
+            if id_ not in found:
+                raise self._model_not_found(models, f" with id {id_}")
+            if len(found[id_]) > 1:
+                raise TooManyEntitiesError(
+                    f"More than one entity was found with the id {id_}"
+                )
+        return [found[id_][0] for id_ in unique_ids]
+
+    def all(self, models: OptionalModelOrModels[Entity] = None) -> List[Entity]:
+        """Get all the entities from the repository whose class is included in models.
+
+        Args:
+            models: Entity class or classes to obtain.
+        """
+        models = self._build_models(models)
+        where, parameters = _model_condition(models)
+
+        return self._select(where, parameters, models)
+
+    def last(self, models: OptionalModelOrModels[Entity] = None) -> Entity:
+        """Get the biggest entity from the repository.
+
+        The staged entities of the models are taken into account.
+
+        Args:
+            models: Entity class or classes to obtain.
+
+        Returns:
+            entity: Biggest Entity object of type models.
+
+        Raises:
+            EntityNotFoundError: If there are no entities.
+        """
+        models = self._build_models(models)
+        where, parameters = _model_condition(models)
+        entities = self._select(where, parameters, models, order="id DESC LIMIT 1") + [
+            entity for entity in self.staged["add"] if type(entity) in models
+        ]
+
+        if len(entities) == 0:
+            raise self._model_not_found(models)
+        return max(entities)
+
+    def first(self, models: OptionalModelOrModels[Entity] = None) -> Entity:
+        """Get the smallest entity from the repository.
+
+        Args:
+            models: Type of entity object to obtain.
+
+        Returns:
+            entity: Smallest Entity object of type models.
+
+        Raises:
+            EntityNotFoundError: If there are no entities.
+        """
+        models = self._build_models(models)
+        where, parameters = _model_condition(models)
+        entities = self._select(where, parameters, models, order="id LIMIT 1")
+
+        if len(entities) == 0:
+            raise self._model_not_found(models)
+        return entities[0]
+
+    def commit(self) -> None:
+        """Persist the changes into the repository in a single transaction."""
+        with self.connection:
+            for entity in self.staged["add"]:
+                key = (entity._model_name.lower(), entity.id_)
+                self.connection.execute(
+                    UPSERT_ENTITY,
+                    (
+                        *key,
+                        *key,
+                        entity.json(),
+                        *(
+                            _column_value(getattr(entity, column, None))
+                            for column in COLUMNS
+                        ),
+                    ),
+                )
+                self.connection.execute(DELETE_TAGS, key)
+                self.connection.executemany(
+                    INSERT_TAG, [(*key, tag) for tag in getattr(entity, "tags", [])]
+                )
+
+            for entity in self.staged["remove"]:
+                key = (entity._model_name.lower(), entity.id_)
+                self.connection.execute(DELETE_ENTITY, key)
+                self.connection.execute(DELETE_TAGS, key)
+
+        self.staged["add"].clear()
+        self.staged["remove"].clear()
+
+    def search(
+        self,
+        fields: Dict[str, EntityID],
+        models: OptionalModelOrModels[Entity] = None,
+    ) -> List[Entity]:
+        """Get the entities whose attributes match one or several conditions.
+
+        The fields that a model doesn't have are ignored for that model.
+
+        Args:
+            models: Entity class or classes to obtain.
+            fields: Dictionary with the {key}:{value} to search.
+
+        Returns:
+            entities: List of Entity object that matches the search criteria.
+
+        Raises:
+            EntityNotFoundError: If the entities are not found.
+        """
+        models = self._build_models(models)
+        where, parameters = _search_condition(fields, models)
+
+        entities = []
+        if where != "":
+            entities = self._select(where, parameters, models)
+
+        if len(entities) == 0:
+            raise self._model_not_found(
+                models, f" that match the search filter {fields}"
+            )
+
+        return entities
+
+    def query(self, query: EntityQuery) -> List[Any]:
+        """Get the sorted page of the entities that match a query.
+
+        The filter, sorting and pagination are done by SQLite, so only the selected
+        entities are built.
+
+        Args:
+            query: Search, sorting and pagination of the entities.
+
+        Returns:
+            entities: List of Entity objects that match the query, or their rows
+                if the query has columns.
+
+        Raises:
+            EntityNotFoundError: If the entities are not found.
+        """
+        models = self._build_models(query.models)
+        if len(query.fields) == 0:
+            where, parameters = _model_condition(models)
+        else:
+            where, parameters = _search_condition(query.fields, models)
+
+        entities = []
+        if where != "":
+            order = [
+                _sort_expression(attribute, descending, models)
+                for attribute, descending in query.sort_criteria
+            ]
+            entities = self._select(
+                where,
+                [*parameters, -1 if query.limit is None else query.limit, query.offset],
+                models,
+                order=", ".join([*order, "rowid"]) + " LIMIT ? OFFSET ?",
+                columns=query.columns,
+            )
+
+        if len(entities) == 0:
+            raise self._model_not_found(
+                models, f" that match the search filter {query.fields}"
+            )
+
+        return entities
+
+    def apply_migrations(self, migrations_directory: str) -> None:
+        """Run the migrations of the repository schema.
+
+        The schema is created when the repository is initialized, so there is
+        nothing to migrate.
+
+        Args:
+            migrations_directory: path to the directory containing the migration
+                scripts.
+        """
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self.connection.close()
+
+    def _select(
+        self,
+        where: str,
+        parameters: List[Any],
+        models: Models[Entity],
+        order: str = "rowid",
+        columns: Optional[List[str]] = None,
+    ) -> List[Any]:
+        """Build the entities of the rows that match a condition.
+
+        Args:
+            where: SQL condition of the rows.
+            parameters: Values of the placeholders of the condition.
+            models: Entity classes that can be built.
+            order: SQL order of the rows.
+            columns: Attributes to read, if set the read-only rows of the entities
+                are built instead of the entities.
+        """
+        model_classes = {model.__name__.lower(): model for model in models}
+        rows = self.connection.execute(
+            f"SELECT model_type, data FROM entity WHERE {where} ORDER BY {order}",
+            parameters,
+        )
+
+        if columns:
+            builders = {
+                name: row_builder(model, columns)
+                for name, model in model_classes.items()
+            }
+            return [builders[model_type](json.loads(data)) for model_type, data in rows]
+        return [model_classes[model_type].parse_raw(data) for model_type, data in rows]
+
+
+def _model_condition(models: Models[Entity]) -> Tuple[str, List[str]]:
+    """Return the SQL condition of the rows of the models."""
+    placeholders = ", ".join("?" for _ in models)
+    return (
+        f"model_type IN ({placeholders})",
+        [model.__name__.lower() for model in models],
+    )
+
+
+def _search_condition(
+    fields: Dict[str, Any], models: Models[Entity]
+) -> Tuple[str, List[Any]]:
+    """Return the SQL condition of a search of entities.
+
+    The fields that a model doesn't have are ignored for that model, and the models
+    that don't have any of the fields are not selected.
+
+    Returns:
+        The SQL condition, empty if no model can match, and the values of it's
+            placeholders.
+    """
+    model_conditions = []
+    parameters: List[Any] = []
+
+    for model in models:
+        properties = model.schema()["properties"]
+        conditions = ["model_type = ?"]
+        model_parameters: List[Any] = [model.__name__.lower()]
+        for field, value in fields.items():
+            if field not in properties:
+                continue
+            condition, condition_parameters = _field_condition(
+                field, value, properties[field].get("type") == "array"
+            )
+            conditions.append(condition)
+            model_parameters.extend(condition_parameters)
+        if len(conditions) > 1:
+            model_conditions.append(f"({' AND '.join(conditions)})")
+            parameters.extend(model_parameters)
+
+    return " OR ".join(model_conditions), parameters
+
+
+def _sort_expression(attribute: str, descending: bool, models: Models[Entity]) -> str:
+    """Return the SQL order of an attribute, with the NULL values last.
+
+    Raises:
+        ValueError: If none of the models has the attribute.
+    """
+    if not any(attribute in model.__fields__ for model in models):
+        raise ValueError(f"The entities don't have the attribute {attribute}")
+
+    if attribute == "id_":
+        expression = "id"
+    elif attribute in COLUMNS:
+        expression = attribute
+    else:
+        expression = f"json_extract(data, '$.{attribute}')"
+
+    return f"{expression} IS NULL, {expression}{' DESC' if descending else ''}"
+
+
+def _field_condition(field: str, value: Any, is_list: bool) -> Tuple[str, List[Any]]:
+    """Return the SQL condition of the search of an attribute value.
+
+    The strings are searched as regular expressions, the rest of values by equality.
+    The list attributes match if any of their elements matches.
+
+    Args:
+        field: Attribute to search, it must be a field of the model.
+        value: Value to search.
+        is_list: Whether the attribute is a list.
+    """
+    operator = "REGEXP" if isinstance(value, str) else "IS"
+    parameters = [_column_value(value)]
+
+    if field == "tags":
+        return (
+            "EXISTS (SELECT 1 FROM entity_tag WHERE "
+            "entity_tag.model_type = entity.model_type AND entity_tag.id = entity.id "
+            f"AND entity_tag.tag {operator} ?)",
+            parameters,
+        )
+    if is_list:
+        return (
+            f"EXISTS (SELECT 1 FROM json_each(entity.data, '$.{field}') "
+            f"WHERE json_each.value {operator} ?)",
+            parameters,
+        )
+    if field in COLUMNS:
+        return f"{field} {operator} ?", parameters
+    return f"json_extract(data, '$.{field}') {operator} ?", parameters
+
+
+def _column_value(value: Any) -> Any:
+    """Convert an attribute value into the value stored in the database."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _regexp(regular_expression: str, value: Any) -> bool:
+    """Test if the regular expression matches a string value."""
+    if not isinstance(value, str):
+        return False
+    return re.search(regular_expression, value) is not None
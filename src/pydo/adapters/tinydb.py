@@ -0,0 +1,664 @@
+"""Define the TinyDB repository with secondary indexes."""
+
+import json
+import logging
+import os
+import re
+from contextlib import suppress
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from repository_orm import EntityID, OptionalModelOrModels, OptionalModels
+from repository_orm import TinyDBRepository
+from repository_orm.adapters.abstract import Entity, Models
+from repository_orm.exceptions import TooManyEntitiesError
+from tinydb import Query
+from tinydb.queries import QueryInstance
+
+from .query import EntityQuery, row_builder
+
+log = logging.getLogger(__name__)
+
+# Fields that have a secondary index.
+INDEXED_FIELDS = ("model_type_", "id_", "active", "state", "area", "tags", "parent_id")
+
+# Size of the journal relative to the database that triggers it's compaction.
+JOURNAL_COMPACTION_RATIO = 0.1
+
+Documents = Dict[int, Dict[str, Any]]
+Index = Dict[Any, Set[int]]
+
+
+class IndexedTinyDBRepository(TinyDBRepository):
+    """Implement the TinyDB repository with secondary indexes.
+
+    The indexes map each value of the INDEXED_FIELDS to the ids of the TinyDB
+    documents that hold it, so the searches only need to test and build the
+    documents that can match instead of the whole table.
+
+    They are stored in a sidecar file next to the database stamped with the
+    modification time and size of the database, so they're only rebuilt if another
+    program changed the database. The commits update them incrementally.
+
+    In journal mode the commits append the changes to a journal file next to the
+    database instead of rewriting it, and the reads replay the journal over the
+    database documents. When the journal grows bigger than the
+    JOURNAL_COMPACTION_RATIO fraction of the database, it's compacted into it.
+
+    Attributes:
+        index_file: Path to the file that stores the indexes.
+        journal_file: Path to the file that stores the journal.
+        journal: Whether the commits are appended to the journal.
+    """
+
+    def __init__(
+        self,
+        models: OptionalModels[Entity] = None,
+        database_url: str = "",
+        journal: bool = False,
+    ) -> None:
+        """Initialize the repository attributes.
+
+        If the journal mode is disabled and there is a journal, it's compacted into
+        the database so that other programs can read the changes.
+
+        Args:
+            database_url: URL specifying the connection to the database.
+            models: List of stored entity models.
+            journal: Append the commits to the journal instead of rewriting the
+                database.
+        """
+        super().__init__(models, database_url)
+        self.index_file = f"{self.database_file}.index"
+        self.journal_file = f"{self.database_file}.journal"
+        self.journal = journal
+        self._indexes: Optional[Dict[str, Index]] = None
+        self._indexes_stamp: List[int] = []
+        self._document_keys: Dict[int, List[Tuple[str, Any]]] = {}
+        self._documents: Optional[Documents] = None
+        self._documents_stamp: List[int] = []
+
+        if not journal and os.path.isfile(self.journal_file):
+            self._compact_journal()
+
+    def get(
+        self, id_: EntityID, models: OptionalModelOrModels[Entity] = None
+    ) -> Entity:
+        """Obtain an entity from the repository by it's ID.
+
+        Args:
+            models: Entity class or classes to obtain.
+            id_: ID of the entity to obtain.
+
+        Returns:
+            entity: Entity object that matches the id_
+
+        Raises:
+            EntityNotFoundError: If the entity is not found.
+            TooManyEntitiesError: If more than one entity was found.
+        """
+        models = self._build_models(models)
+        query = (Query().id_ == id_) & self._build_model_query(models)
+
+        matching_entities_data = self._search_documents(query, {"id_": id_}, models)
+
+        if len(matching_entities_data) == 1:
+            return self._build_entity(matching_entities_data[0], models)
+        elif len(matching_entities_data) == 0:
+            raise self._model_not_found(models, f" with id {id_}")
+        else:
+            raise TooManyEntitiesError(
+                f"More than one entity was found with the id {id_}"
+            )
+
+    def get_many(
+        self, ids_: List[EntityID], models: OptionalModelOrModels[Entity] = None
+    ) -> List[Entity]:
+        """Obtain the entities of many IDs with a single lookup of the id index.
+
+        Args:
+            ids_: IDs of the entities to obtain, the duplicated ones are returned once.
+            models: Entity class or classes to obtain.
+
+        Returns:
+            entities: Entity objects of the ids in the order they were requested.
+
+        Raises:
+            EntityNotFoundError: If any of the entities is not found.
+            TooManyEntitiesError: If more than one entity was found with an id.
+        """
+        models = self._build_models(models)
+        documents = self._read_documents()
+        indexes = self._load_indexes(documents)
+        model_types = {model.__name__.lower() for model in models}
+
+        entities = []
+        for id_ in dict.fromkeys(ids_):
+            matching_entities_data = [
+                documents[doc_id]
+                for doc_id in sorted(indexes["id_"].get(_index_key(id_), set()))
+                if doc_id in documents
+                and documents[doc_id].get("model_type_") in model_types
+            ]
+            if len(matching_entities_data) == 0:
+                raise self._model_not_found(models, f" with id {id_}")
+            if len(matching_entities_data) > 1:
+                raise TooManyEntitiesError(
+                    f"More than one entity was found with the id {id_}"
+                )
+            entities.append(self._build_entity(matching_entities_data[0], models))
+
+        return entities
+
+    def search(
+        self,
+        fields: Dict[str, EntityID],
+        models: OptionalModelOrModels[Entity] = None,
+    ) -> List[Entity]:
+        """Get the entities whose attributes match one or several conditions.
+
+        Args:
+            models: Entity class or classes to obtain.
+            fields: Dictionary with the {key}:{value} to search.
+
+        Returns:
+            entities: List of Entity object that matches the search criteria.
+
+        Raises:
+            EntityNotFoundError: If the entities are not found.
+        """
+        models = self._build_models(models)
+        query = self._build_search_query(fields, models)
+
+        entities = [
+            self._build_entity(entity_data, models)
+            for entity_data in self._search_documents(query, fields, models)
+        ]
+
+        if len(entities) == 0:
+            raise self._model_not_found(
+                models, f" that match the search filter {fields}"
+            )
+
+        return entities
+
+    def query(self, query: EntityQuery) -> List[Any]:
+        """Get the sorted page of the entities that match a query.
+
+        The stored documents are sorted and paginated before building the entities,
+        and if the query has a limit, only the top documents are kept in a heap.
+
+        Args:
+            query: Search, sorting and pagination of the entities.
+
+        Returns:
+            entities: List of Entity objects that match the query, or their rows
+                if the query has columns.
+
+        Raises:
+            EntityNotFoundError: If the entities are not found.
+        """
+        models = self._build_models(query.models)
+        if len(query.fields) == 0:
+            tinydb_query = self._build_model_query(models)
+        else:
+            tinydb_query = self._build_search_query(query.fields, models)
+
+        documents = query.select(
+            self._search_documents(tinydb_query, query.fields, models),
+            _document_value,
+        )
+
+        if len(documents) == 0:
+            raise self._model_not_found(
+                models, f" that match the search filter {query.fields}"
+            )
+
+        if query.columns:
+            builders = {
+                model.__name__.lower(): row_builder(model, query.columns)
+                for model in models
+            }
+            return [
+                builders[document["model_type_"]](document) for document in documents
+            ]
+        return [self._build_entity(document, models) for document in documents]
+
+    def all(self, models: OptionalModelOrModels[Entity] = None) -> List[Entity]:
+        """Get all the entities from the repository whose class is included in models.
+
+        Args:
+            models: Entity class or classes to obtain.
+        """
+        models = self._build_models(models)
+        query = self._build_model_query(models)
+
+        return [
+            self._build_entity(entity_data, models)
+            for entity_data in self._search_documents(query, {}, models)
+        ]
+
+    def commit(self) -> None:
+        """Persist the changes into the repository and update the indexes."""
+        documents = self._read_documents()
+        indexes = self._load_indexes(documents)
+
+        if self.journal:
+            self._commit_to_journal(documents)
+        else:
+            self._commit_to_database(documents, indexes)
+
+        self._save_indexes()
+        # The documents were updated with the changes of the commit.
+        self._documents_stamp = self._indexes_stamp
+
+    def _commit_to_database(
+        self, documents: Documents, indexes: Dict[str, Index]
+    ) -> None:
+        """Write the staged changes into the database.
+
+        The new entities are inserted with a single write of the database, the
+        existing ones are updated one by one.
+
+        Args:
+            documents: Current documents of the repository, they're updated with the
+                changes.
+            indexes: Current indexes of the repository.
+        """
+        entities_data: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        for entity in self.staged["add"]:
+            entity_data = self._export_entity(entity)
+            entities_data[(entity_data["model_type_"], entity.id_)] = entity_data
+        self.staged["add"].clear()
+
+        new_entities_data = []
+        for (model_type, id_), entity_data in entities_data.items():
+            if not indexes["model_type_"].get(model_type, set()) & indexes["id_"].get(
+                id_, set()
+            ):
+                new_entities_data.append(entity_data)
+                continue
+            for doc_id in self.db_.upsert(
+                entity_data, (Query().model_type_ == model_type) & (Query().id_ == id_)
+            ):
+                documents[doc_id] = {**documents.get(doc_id, {}), **entity_data}
+                self._unindex_document(doc_id)
+                self._index_document(doc_id, entity_data)
+
+        if new_entities_data:
+            for doc_id, entity_data in zip(
+                self.db_.insert_multiple(new_entities_data), new_entities_data
+            ):
+                documents[doc_id] = entity_data
+                self._index_document(doc_id, entity_data)
+
+        for entity in self.staged["remove"]:
+            for doc_id in self.db_.remove(
+                (Query().model_type_ == entity._model_name.lower())
+                & (Query().id_ == entity.id_)
+            ):
+                documents.pop(doc_id, None)
+                self._unindex_document(doc_id)
+        self.staged["remove"].clear()
+
+    def _commit_to_journal(self, documents: Documents) -> None:
+        """Append the staged changes to the journal.
+
+        Args:
+            documents: Current documents of the repository, they're updated with the
+                changes.
+        """
+        records: List[Dict[str, Any]] = [
+            {"upsert": self._export_entity(entity)} for entity in self.staged["add"]
+        ]
+        records.extend(
+            {"remove": [entity._model_name.lower(), entity.id_]}
+            for entity in self.staged["remove"]
+        )
+        self.staged["add"].clear()
+        self.staged["remove"].clear()
+        if len(records) == 0:
+            return
+
+        with open(self.journal_file, "a") as file_cursor:
+            for record in records:
+                file_cursor.write(json.dumps(record, default=_encode_json) + "\n")
+            file_cursor.flush()
+            os.fsync(file_cursor.fileno())
+
+        replay = _JournalReplay(documents)
+        for record in records:
+            doc_id, document = replay.apply(record)
+            if doc_id is None:
+                continue
+            self._unindex_document(doc_id)
+            if document is not None:
+                self._index_document(doc_id, document)
+
+        if (
+            os.path.getsize(self.journal_file)
+            > os.path.getsize(self.database_file) * JOURNAL_COMPACTION_RATIO
+        ):
+            self._compact_journal(documents)
+
+    def _compact_journal(self, documents: Optional[Documents] = None) -> None:
+        """Write the documents with the journal changes into the database.
+
+        Args:
+            documents: Current documents of the repository. If None, they're read
+                from the database and the journal.
+        """
+        log.debug("Compacting the journal of the database")
+        if documents is None:
+            documents = self._read_documents()
+
+        tables = self.db_.storage.read() or {}
+        tables[self.db_.default_table_name] = {
+            str(doc_id): document for doc_id, document in documents.items()
+        }
+        self.db_.storage.write(tables)
+        os.remove(self.journal_file)
+        self._reset_table_caches()
+        self._documents = documents
+        self._documents_stamp = self._database_stamp()
+
+    def _search_documents(
+        self, query: QueryInstance, fields: Dict[str, Any], models: Models[Entity]
+    ) -> List[Dict[str, Any]]:
+        """Return the documents that match the query in insertion order.
+
+        Args:
+            query: TinyDB query that the documents need to match.
+            fields: Dictionary with the {key}:{value} that the query searches, the
+                indexed ones are used to narrow the documents to test.
+            models: Entity classes that the query searches.
+        """
+        documents = self._read_documents()
+        indexes = self._load_indexes(documents)
+        model_ids = [
+            indexes["model_type_"].get(model.__name__.lower(), set())
+            for model in models
+        ]
+
+        candidates: List[Set[int]] = []
+        for field, value in fields.items():
+            # The repository ignores the fields that a model doesn't have.
+            if field in indexes and all(field in model.__fields__ for model in models):
+                matching_ids = _matching_ids(indexes[field], value)
+                if matching_ids is not None:
+                    candidates.append(matching_ids)
+
+        if len(candidates) == 0:
+            doc_ids: Set[int] = set()
+            for ids in model_ids:
+                doc_ids |= ids
+        else:
+            # Start from the smallest set so the cost depends on the documents that
+            # can match instead of on the size of the database.
+            candidates.sort(key=len)
+            doc_ids = {
+                doc_id
+                for doc_id in candidates[0].intersection(*candidates[1:])
+                if any(doc_id in ids for ids in model_ids)
+            }
+
+        return [
+            documents[doc_id]
+            for doc_id in sorted(doc_ids)
+            if doc_id in documents and query(documents[doc_id])
+        ]
+
+    def _read_documents(self) -> Documents:
+        """Return the documents of the database indexed by their TinyDB id.
+
+        The decoded documents are kept until another program changes the database,
+        so they're only read again from the files when it's needed.
+        """
+        stamp = self._database_stamp()
+        if self._documents is None or self._documents_stamp != stamp:
+            self._documents = self._load_documents()
+            self._documents_stamp = stamp
+        return self._documents
+
+    def _load_documents(self) -> Documents:
+        """Read the documents of the database indexed by their TinyDB id.
+
+        The changes of the journal are applied over the ones of the database.
+        """
+        tables = self.db_.storage.read()
+        if tables is None:
+            documents: Documents = {}
+        else:
+            documents = {
+                int(doc_id): document
+                for doc_id, document in tables.get(
+                    self.db_.default_table_name, {}
+                ).items()
+            }
+
+        try:
+            with open(self.journal_file, "r") as file_cursor:
+                lines = file_cursor.readlines()
+        except FileNotFoundError:
+            return documents
+
+        replay = _JournalReplay(documents)
+        for line in lines:
+            try:
+                record = json.loads(line, object_hook=_decode_json)
+            except ValueError:
+                # The last record is incomplete if a commit was interrupted.
+                log.warning(f"Skipping an invalid record of {self.journal_file}")
+                continue
+            replay.apply(record)
+
+        return documents
+
+    def _load_indexes(self, documents: Documents) -> Dict[str, Index]:
+        """Return the indexes of the database documents.
+
+        They're read from the index file if it's up to date with the database,
+        otherwise they're built from the documents and saved.
+        """
+        stamp = self._database_stamp()
+        if self._indexes is not None and self._indexes_stamp == stamp:
+            return self._indexes
+
+        self._reset_table_caches()
+        self._indexes = None
+        with suppress(FileNotFoundError, ValueError, KeyError, TypeError):
+            with open(self.index_file, "r") as file_cursor:
+                index_data = json.load(file_cursor)
+            if index_data["stamp"] == stamp:
+                self._indexes = {
+                    field: {key: set(doc_ids) for key, doc_ids in index_data[field]}
+                    for field in INDEXED_FIELDS
+                }
+                self._indexes_stamp = stamp
+
+        if self._indexes is None:
+            log.debug("Building the indexes of the database")
+            self._indexes = {field: {} for field in INDEXED_FIELDS}
+            self._document_keys = {}
+            for doc_id, document in documents.items():
+                self._index_document(doc_id, document)
+            self._save_indexes()
+        else:
+            self._document_keys = {}
+            for field, index in self._indexes.items():
+                for key, doc_ids in index.items():
+                    for doc_id in doc_ids:
+                        self._document_keys.setdefault(doc_id, []).append((field, key))
+
+        return self._indexes
+
+    def _reset_table_caches(self) -> None:
+        """Forget what TinyDB cached of the database before another program changed it.
+
+        TinyDB caches the id of the next document, so if another program inserted
+        documents, the next insert would overwrite them.
+        """
+        table = self.db_.table(self.db_.default_table_name)
+        table.clear_cache()
+        # TinyDB doesn't have a public way to reset it.
+        table._next_id = None  # noqa: W0212
+
+    def _save_indexes(self) -> None:
+        """Store the indexes in the index file, stamped with the database state."""
+        if self._indexes is None:
+            return
+        self._indexes_stamp = self._database_stamp()
+        index_data: Dict[str, Any] = {"stamp": self._indexes_stamp}
+        for field, index in self._indexes.items():
+            index_data[field] = [
+                [key, sorted(doc_ids)] for key, doc_ids in index.items() if doc_ids
+            ]
+
+        temporal_file = f"{self.index_file}.tmp"
+        with open(temporal_file, "w") as file_cursor:
+            json.dump(index_data, file_cursor)
+        os.replace(temporal_file, self.index_file)
+
+    def _database_stamp(self) -> List[int]:
+        """Return the modification time and size of the database and journal files."""
+        stat = os.stat(self.database_file)
+        try:
+            journal_stat = os.stat(self.journal_file)
+        except FileNotFoundError:
+            return [stat.st_mtime_ns, stat.st_size, 0, 0]
+        return [
+            stat.st_mtime_ns,
+            stat.st_size,
+            journal_stat.st_mtime_ns,
+            journal_stat.st_size,
+        ]
+
+    def _index_document(self, doc_id: int, document: Dict[str, Any]) -> None:
+        """Add the indexed fields of a document to the indexes."""
+        if self._indexes is None:
+            return
+        keys = self._document_keys.setdefault(doc_id, [])
+        for field in INDEXED_FIELDS:
+            if field not in document:
+                continue
+            values = document[field]
+            if not isinstance(values, list):
+                values = [values]
+            for value in values:
+                key = _index_key(value)
+                with suppress(TypeError):
+                    self._indexes[field].setdefault(key, set()).add(doc_id)
+                    keys.append((field, key))
+
+    def _unindex_document(self, doc_id: int) -> None:
+        """Remove a document from the indexes."""
+        if self._indexes is None:
+            return
+        for field, key in self._document_keys.pop(doc_id, []):
+            with suppress(KeyError):
+                self._indexes[field][key].discard(doc_id)
+                if len(self._indexes[field][key]) == 0:
+                    self._indexes[field].pop(key)
+
+
+class _JournalReplay:
+    """Apply the journal records over the documents of the database.
+
+    The new documents get the id that follows the biggest one of the documents, so
+    the ids only depend on the documents the records are applied to.
+    """
+
+    def __init__(self, documents: Documents) -> None:
+        """Configure the attributes.
+
+        Args:
+            documents: Documents to apply the records to, they're updated in place.
+        """
+        self.documents = documents
+        self.doc_ids: Dict[Tuple[Any, Any], int] = {
+            (document.get("model_type_"), document.get("id_")): doc_id
+            for doc_id, document in documents.items()
+        }
+        self.last_doc_id = max(documents, default=0)
+
+    def apply(
+        self, record: Dict[str, Any]
+    ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """Apply a journal record to the documents.
+
+        The upserts update the fields of the existing document like TinyDB does.
+
+        Returns:
+            The id of the changed document or None if no document changed, and the
+                new document or None if it was removed.
+        """
+        if "upsert" in record:
+            entity_data = record["upsert"]
+            key = (entity_data["model_type_"], entity_data["id_"])
+            doc_id = self.doc_ids.get(key)
+            if doc_id is None:
+                self.last_doc_id += 1
+                doc_id = self.doc_ids[key] = self.last_doc_id
+                self.documents[doc_id] = dict(entity_data)
+            else:
+                self.documents[doc_id] = {**self.documents[doc_id], **entity_data}
+            return doc_id, self.documents[doc_id]
+
+        model_type, id_ = record["remove"]
+        doc_id = self.doc_ids.pop((model_type, id_), None)
+        if doc_id is not None:
+            self.documents.pop(doc_id)
+            if doc_id == self.last_doc_id:
+                self.last_doc_id = max(self.documents, default=0)
+        return doc_id, None
+
+
+def _document_value(document: Dict[str, Any], attribute: str) -> Any:
+    """Return the value of an attribute of a stored document."""
+    return document.get(attribute)
+
+
+def _encode_json(value: Any) -> Any:
+    """Encode the values of the journal records that JSON doesn't support."""
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_json(value: Dict[str, Any]) -> Any:
+    """Decode the values of the journal records encoded with _encode_json."""
+    if len(value) == 1 and "$datetime" in value:
+        return datetime.fromisoformat(value["$datetime"])
+    return value
+
+
+def _index_key(value: Any) -> Any:
+    """Return the key of a value in the indexes."""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _matching_ids(index: Index, value: Any) -> Optional[Set[int]]:
+    """Return the ids of the documents that can match a search of a value.
+
+    The repository searches the strings as regular expressions, both in plain and
+    list fields, so all the indexed keys that match it are gathered. The rest of
+    values are searched by equality.
+
+    Returns:
+        The ids of the matching documents or None if the index can't narrow them.
+    """
+    if isinstance(value, str):
+        regexp = re.compile(value)
+        doc_ids: Set[int] = set()
+        for key, key_doc_ids in index.items():
+            if isinstance(key, str) and regexp.search(key):
+                doc_ids |= key_doc_ids
+        return doc_ids
+
+    try:
+        return index.get(_index_key(value), set())
+    except TypeError:
+        return None
@@ -0,0 +1,154 @@
+"""Run the services and the report queries from asyncio programs.
+
+The repository calls are blocking, so they're run in an executor to keep the event
+loop of the long lived frontends responsive.
+"""
+
+import asyncio
+from contextlib import suppress
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from repository_orm import EntityNotFoundError, FakeRepository, Repository
+
+from . import services, views
+from .adapters import EntityQuery, query_entities
+from .config import Config
+from .model import TaskChanges, TaskSelector, TaskType
+
+Result = TypeVar("Result")
+
+
+class AsyncServices:
+    """Run the services without blocking the event loop.
+
+    The repositories stage the changes in memory until they're committed, so a
+    lock serializes the services that change the repository. By default the calls
+    run in an executor with a single thread, so the repository is always used from
+    the same thread, and the queries wait for the running changes.
+
+    Args:
+        repo: Repository where the tasks are stored.
+        executor: Executor to run the repository calls in. Use one with more
+            workers only if the repository supports concurrent reads and writes.
+    """
+
+    def __init__(self, repo: Repository, executor: Optional[Executor] = None) -> None:
+        """Configure the attributes."""
+        self.repo = repo
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pydo")
+        self.executor = executor
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    async def add_task(self, change: TaskChanges) -> TaskType:
+        """Create a new task, see services.add_task."""
+        return await self._write(services.add_task, self.repo, change)
+
+    async def add_tasks(self, changes: Iterable[TaskChanges]) -> List[TaskType]:
+        """Create many tasks and commit them at once, see services.add_tasks."""
+        return await self._write(services.add_tasks, self.repo, list(changes))
+
+    async def do_tasks(
+        self,
+        selector: TaskSelector,
+        complete_date_str: str = "now",
+        delete_parent: bool = False,
+    ) -> None:
+        """Complete tasks that match a task selector, see services.do_tasks."""
+        await self._write(
+            services.do_tasks, self.repo, selector, complete_date_str, delete_parent
+        )
+
+    async def rm_tasks(
+        self,
+        selector: TaskSelector,
+        complete_date_str: str = "now",
+        delete_parent: bool = False,
+    ) -> None:
+        """Delete tasks that match a task selector, see services.rm_tasks."""
+        await self._write(
+            services.rm_tasks, self.repo, selector, complete_date_str, delete_parent
+        )
+
+    async def modify_tasks(
+        self,
+        selector: TaskSelector,
+        change: TaskChanges,
+        modify_parent: bool = False,
+        is_recurrent: bool = False,
+    ) -> None:
+        """Modify the tasks that match a task selector, see services.modify_tasks."""
+        await self._write(
+            services.modify_tasks,
+            self.repo,
+            selector,
+            change,
+            modify_parent,
+            is_recurrent,
+        )
+
+    async def report_tasks(
+        self,
+        config: Config,
+        report_name: str,
+        task_selector: Optional[TaskSelector] = None,
+    ) -> List[TaskType]:
+        """Return the tasks of a report, see views.report_tasks."""
+        return await self._run(
+            views.report_tasks, self.repo, config, report_name, task_selector
+        )
+
+    async def query(self, query: EntityQuery) -> List[Any]:
+        """Return the entities that match a query, see adapters.query_entities."""
+        return await self._run(query_entities, self.repo, query)
+
+    async def load_report_pages(
+        self, window: views.ReportWindow, pages: Iterable[int]
+    ) -> None:
+        """Read pages of a report window from the repository, see views.ReportWindow.
+
+        Args:
+            window: Report window that keeps the formatted rows of the pages.
+            pages: Indexes of the pages to read.
+        """
+        for page in pages:
+            query = window.page_query(page)
+            rows: List[Any] = []
+            if query is not None:
+                with suppress(EntityNotFoundError):
+                    rows = await self.query(query)
+            window.add_page(page, rows)
+
+    def close(self) -> None:
+        """Wait for the running calls and release the executor."""
+        self.executor.shutdown(wait=True)
+
+    async def _run(self, function: Callable[..., Result], *args: Any) -> Result:
+        """Run a blocking function in the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, *args))
+
+    async def _write(self, function: Callable[..., Result], *args: Any) -> Result:
+        """Run a blocking function that changes the repository, one at a time."""
+        # The lock is created here to bind it to the running event loop.
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            try:
+                return await self._run(function, *args)
+            except Exception:
+                # Otherwise the next write would commit the changes of the failed one.
+                _discard_staged_changes(self.repo)
+                raise
+
+
+def _discard_staged_changes(repo: Repository) -> None:
+    """Forget the changes staged in a repository that were not committed."""
+    if isinstance(repo, FakeRepository):
+        repo.new_entities = {}
+        return
+    staged: Dict[str, List[Any]] = getattr(repo, "staged", {})
+    for entities in staged.values():
+        entities.clear()
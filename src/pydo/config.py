@@ -1,12 +1,14 @@
 """Define the configuration of the main program."""
 
 import logging
+import marshal
 import os
 from collections import UserDict
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from ruyaml import YAML  # type: ignore
 from ruyaml.parser import ParserError
+from ruyaml.scalarbool import ScalarBoolean
 from ruyaml.scanner import ScannerError
 
 from .exceptions import ConfigError
@@ -22,6 +24,14 @@ log = logging.getLogger(__name__)
 class Config(UserDict):  # type: ignore # noqa: R0901
     """Expose the configuration in a friendly way.
 
+    The parsed configuration is cached in a marshal file next to the YAML one, so
+    the slow YAML parser is only used when the configuration file changes.
+
+    The values are fetched from an index of their dotted keys, built the first time
+    it's needed and dropped whenever the configuration is changed through `set`,
+    `load` or by assigning `data` or a top level key. Changes done directly on the
+    nested dictionaries need to go through `set` to be seen by `get`.
+
     Public methods:
         get: Fetch the configuration value of the specified key.
         load: Load the configuration from the configuration YAML file.
@@ -29,15 +39,38 @@ class Config(UserDict):  # type: ignore # noqa: R0901
 
     Attributes and properties:
         config_path (str): Path to the configuration file.
+        cache_path (str): Path to the parsed configuration cache file.
         data(dict): Program configuration.
     """
 
     def __init__(self, config_path: str = "~/.local/share/pydo/config.yaml") -> None:
         """Configure the attributes and load the configuration."""
+        self._index: Optional[Dict[str, Any]] = None
         super().__init__()
         self.config_path = os.path.expanduser(config_path)
         self.load()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute, dropping the keys index if it's the configuration."""
+        if name == "data":
+            self._index = None
+        super().__setattr__(name, value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Set a top level key of the configuration and drop the keys index."""
+        super().__setitem__(key, value)
+        self._index = None
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a top level key of the configuration and drop the keys index."""
+        super().__delitem__(key)
+        self._index = None
+
+    @property
+    def cache_path(self) -> str:
+        """Return the path to the parsed configuration cache file."""
+        return f"{self.config_path}.cache"
+
     def get(
         self, key: str, default: Any = None
     ) -> Union[str, int, Dict[str, Any], List[Any]]:
@@ -55,9 +88,19 @@ class Config(UserDict):  # type: ignore # noqa: R0901
 
         self.data.get('first.second') == 'value'
         """
+        if self._index is None:
+            self._index = {}
+            _index_keys(self._index, self.data)
+
+        try:
+            return self._index[key]
+        except KeyError:
+            pass
+
+        # Find the part of the key that is missing to build the error message.
         original_key = key
         config_keys = key.split(".")
-        value = self.data.copy()
+        value = self.data
 
         for config_key in config_keys:
             try:
@@ -99,23 +142,113 @@ class Config(UserDict):  # type: ignore # noqa: R0901
 
         # Set value
         parent[last_key] = value
+        self._index = None
 
     def load(self) -> None:
-        """Load the configuration from the configuration YAML file."""
+        """Load the configuration from the configuration YAML file.
+
+        If the cache was built from the current version of the file, the
+        configuration is read from it instead.
+        """
         try:
-            with open(os.path.expanduser(self.config_path), "r") as file_cursor:
-                try:
-                    self.data = YAML().load(file_cursor)
-                except (ParserError, ScannerError) as error:
-                    raise ConfigError(str(error)) from error
+            stamp = self._config_stamp()
         except FileNotFoundError as error:
             raise FileNotFoundError(
                 "The configuration file could not be found."
             ) from error
 
+        try:
+            with open(self.cache_path, "rb") as cache_cursor:
+                cache = marshal.load(cache_cursor)
+            if cache["stamp"] == stamp:
+                self.data = cache["data"]
+                return
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            log.debug("The configuration cache is not valid")
+
+        with open(self.config_path, "r") as file_cursor:
+            try:
+                self.data = YAML().load(file_cursor)
+            except (ParserError, ScannerError) as error:
+                raise ConfigError(str(error)) from error
+        self._save_cache()
+
     def save(self) -> None:
-        """Save the configuration in the configuration YAML file."""
-        with open(os.path.expanduser(self.config_path), "w+") as file_cursor:
+        """Save the configuration in the configuration YAML file.
+
+        If the configuration was read from the cache, the comments of the YAML file
+        are kept by updating the parsed file with the configuration values.
+        """
+        data = self.data
+        if not hasattr(data, "ca"):
+            # The data doesn't have the YAML comments, as it was loaded from the
+            # cache or set by the user.
+            try:
+                with open(self.config_path, "r") as file_cursor:
+                    document = YAML().load(file_cursor)
+            except (OSError, ParserError, ScannerError):
+                document = None
+            if isinstance(document, dict):
+                _update_document(document, data)
+                data = document
+
+        with open(self.config_path, "w+") as file_cursor:
             yaml = YAML()
             yaml.default_flow_style = False
-            yaml.dump(self.data, file_cursor)
+            yaml.dump(data, file_cursor)
+        self.data = data
+        self._save_cache()
+
+    def _config_stamp(self) -> List[int]:
+        """Return the modification time and size of the configuration file."""
+        stat = os.stat(self.config_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _save_cache(self) -> None:
+        """Store the configuration in the cache, stamped with the file state."""
+        try:
+            cache = marshal.dumps(
+                {"stamp": self._config_stamp(), "data": _to_builtin(self.data)}
+            )
+            with open(self.cache_path, "wb") as file_cursor:
+                file_cursor.write(cache)
+        except (OSError, ValueError) as error:
+            log.debug(f"Unable to save the configuration cache: {error}")
+
+
+def _index_keys(index: Dict[str, Any], data: Any, prefix: str = "") -> None:
+    """Store in the index the value of each dotted key of the configuration."""
+    if not isinstance(data, dict):
+        return
+    for key, value in data.items():
+        dotted_key = f"{prefix}{key}"
+        index[dotted_key] = value
+        _index_keys(index, value, f"{dotted_key}.")
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert the YAML parsed objects into the builtin types they represent."""
+    if isinstance(value, dict):
+        return {
+            _to_builtin(key): _to_builtin(element) for key, element in value.items()
+        }
+    if isinstance(value, list):
+        return [_to_builtin(element) for element in value]
+    if isinstance(value, ScalarBoolean):
+        return bool(value)
+    for builtin_type in (bool, int, float, str):
+        if isinstance(value, builtin_type):
+            return builtin_type(value)
+    return value
+
+
+def _update_document(document: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """Make a YAML parsed document have the values of data keeping its comments."""
+    for key in [key for key in document.keys() if key not in data]:
+        del document[key]
+
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(document.get(key, None), dict):
+            _update_document(document[key], value)
+        else:
+            document[key] = value
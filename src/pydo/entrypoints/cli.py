@@ -1,8 +1,9 @@
 """Command line interface definition."""
 
 import logging
+import signal
 import sys
-from typing import Any, Optional, Tuple
+from typing import Any, Optional, TextIO, Tuple
 
 import click
 from click.core import Context
@@ -10,13 +11,17 @@ from click_default_group import DefaultGroup
 from pydantic import ValidationError
 from repository_orm import EntityNotFoundError
 
-from .. import services, version, views
-from ..model.task import RecurrentTask, TaskState
+from .. import profiling, services, version, views
+from ..adapters import load_repository
+from ..exceptions import ConfigError
+from ..model.task import RecurrentTask, Task, TaskCounters, TaskState
+from . import client, daemon
 from .utils import (
+    CliObjects,
+    WarmCliObjects,
     _parse_changes,
+    _parse_import_lines,
     _parse_task_selector,
-    get_repo,
-    load_config,
     load_logger,
 )
 
@@ -34,16 +39,48 @@ log = logging.getLogger(__name__)
     help="configuration file path",
     envvar="PYDO_CONFIG_PATH",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="print the time spent in each phase of the command",
+    envvar="PYDO_PROFILE",
+)
+@click.option(
+    "--profile_output",
+    help="save the profile to a speedscope trace if it ends with .json, or to a "
+    "cProfile pstats file otherwise",
+    envvar="PYDO_PROFILE_OUTPUT",
+)
 @click.pass_context
-def cli(ctx: Context, config_path: str, verbose: bool) -> None:
-    """Command line interface main click entrypoint."""
-    ctx.ensure_object(dict)
-
-    ctx.obj["config"] = load_config(config_path)
-    ctx.obj["repo"] = get_repo(ctx.obj["config"])
+def cli(
+    ctx: Context,
+    config_path: str,
+    verbose: bool,
+    profile: bool,
+    profile_output: Optional[str],
+) -> None:
+    """Command line interface main click entrypoint.
+
+    The configuration and the repository are loaded when a command first uses them.
+    When the command runs in the daemon, they're reused from the previous commands.
+    """
+    if profile or profile_output is not None:
+        profiling.start(profile_output)
+        ctx.call_on_close(_print_profile)
+    if isinstance(ctx.obj, WarmCliObjects):
+        ctx.obj = ctx.obj.load(config_path)
+    else:
+        ctx.obj = CliObjects(config_path)
     load_logger(verbose)
 
 
+def _print_profile() -> None:
+    """Stop profiling the command and print the time spent in each phase."""
+    profiler = profiling.stop()
+    if profiler is not None:
+        click.echo(f"\n{profiler.breakdown()}", err=True)
+
+
 # ---------------------------------------------------------------
 #                   Actions over tasks
 # ---------------------------------------------------------------
@@ -62,6 +99,22 @@ def add(ctx: Any, task_args: Tuple[str]) -> None:
         sys.exit(1)
 
 
+@cli.command(name="import")
+@click.argument("tasks_file", type=click.File("r"), default="-")
+@click.pass_context
+def import_(ctx: Any, tasks_file: TextIO) -> None:
+    """Add the tasks of a file, one per line.
+
+    Each line holds the arguments of the add command or a JSON object with the task
+    attributes. If the file is not given, the tasks are read from the standard input.
+    """
+    try:
+        services.add_tasks(ctx.obj["repo"], _parse_import_lines(tasks_file))
+    except ValueError as error:
+        log.error(str(error))
+        sys.exit(1)
+
+
 @cli.command(context_settings={"ignore_unknown_options": True})
 @click.option("-d", "--close_date", default="now")
 @click.option("-p", "--parent", is_flag=True)
@@ -162,6 +215,38 @@ def thaw(ctx: Any, task_filter: Tuple[str], state: Optional[TaskState] = None) -
         sys.exit(1)
 
 
+@cli.command()
+@click.argument("database_url")
+@click.pass_context
+def migrate(ctx: Any, database_url: str) -> None:
+    """Copy the tasks to another database and use it from now on.
+
+    For example, to move them to a SQLite database:
+    pydo migrate sqlite:////home/user/.local/share/pydo/database.db
+    """
+    try:
+        destination = load_repository([Task, RecurrentTask, TaskCounters], database_url)
+    except (ConnectionError, ValueError) as error:
+        log.error(str(error))
+        sys.exit(1)
+
+    services.migrate_tasks(ctx.obj["repo"], destination)
+    ctx.obj["config"].set("database_url", database_url)
+    ctx.obj["config"].save()
+    log.info(f"The database_url configuration is now {database_url}")
+
+
+@cli.command(name="rebuild-counters")
+@click.pass_context
+def rebuild_counters(ctx: Any) -> None:
+    """Count again the open tasks of each area and tag.
+
+    The counters are updated each time the tasks change, use it if you've edited
+    the database by other means.
+    """
+    services.rebuild_counters(ctx.obj["repo"])
+
+
 # ---------------------------------------------------------------
 #                   Reports
 # ---------------------------------------------------------------
@@ -178,11 +263,14 @@ def report(ctx: Any, report_name: str, task_filter: Tuple[str]) -> None:
             ctx.obj["repo"],
             ctx.obj["config"],
             report_name,
-            _parse_task_selector(task_filter),
+            _parse_task_selector(task_filter, report=True),
         )
     except EntityNotFoundError as error:
         log.info(str(error))
         sys.exit(0)
+    except ConfigError as error:
+        log.error(str(error))
+        sys.exit(1)
 
 
 @cli.command(context_settings={"ignore_unknown_options": True})
@@ -217,6 +305,31 @@ def frozen(ctx: Any, task_filter: Tuple[str]) -> None:
     ctx.forward(report, report_name="frozen")
 
 
+@cli.command(name="tui", context_settings={"ignore_unknown_options": True})
+@click.argument("report_name", default="open")
+@click.argument("task_filter", nargs=-1, type=click.UNPROCESSED)
+@click.pass_context
+def tui_(ctx: Any, report_name: str, task_filter: Tuple[str]) -> None:
+    """Browse a report in the terminal user interface."""
+    try:
+        from . import tui  # noqa: C0415, prompt_toolkit is optional.
+    except ImportError:
+        log.error("The terminal user interface needs the prompt_toolkit package")
+        sys.exit(1)
+
+    try:
+        window = views.ReportWindow(
+            ctx.obj["repo"],
+            ctx.obj["config"],
+            report_name,
+            _parse_task_selector(task_filter, report=True),
+        )
+    except ConfigError as error:
+        log.error(str(error))
+        sys.exit(1)
+    tui.run(window)
+
+
 @cli.command(context_settings={"ignore_unknown_options": True})
 @click.pass_context
 def areas(ctx: Any) -> None:
@@ -239,6 +352,36 @@ def tags(ctx: Any) -> None:
         sys.exit(0)
 
 
+# ---------------------------------------------------------------
+#                   Daemon
+# ---------------------------------------------------------------
+
+
+@cli.command()
+@click.option(
+    "-s",
+    "--socket_path",
+    default=client.DEFAULT_SOCKET_PATH,
+    help="Unix socket to listen to",
+    envvar="PYDO_SOCKET",
+)
+def serve(socket_path: str) -> None:
+    """Run the commands of the pydo clients in a long running process.
+
+    The configuration, the repository and its indexes stay loaded between
+    commands, so they don't pay the program startup. When the daemon is not
+    running, the commands are run in their own process.
+    """
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        daemon.serve(socket_path)
+    except FileExistsError as error:
+        log.error(str(error))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        log.info("Stopped the daemon")
+
+
 @cli.command(hidden=True)
 def null() -> None:
     """Do nothing.
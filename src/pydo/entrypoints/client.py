@@ -0,0 +1,106 @@
+"""Define the thin command line client of the pydo daemon.
+
+It only imports the standard library, so when the daemon started with `pydo serve`
+is running, the commands don't pay the import of the rest of the program. If the
+daemon is not running, the command is run in this process.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SOCKET_PATH = "~/.local/share/pydo/pydo.sock"
+
+# Commands that need the terminal of the client.
+LOCAL_COMMANDS = ("import", "serve", "tui")
+
+# Variables of the client environment that change the behaviour of the commands.
+FORWARDED_ENVIRONMENT = ("COLORTERM", "NO_COLOR", "TERM")
+
+
+def main() -> None:
+    """Run the command in the daemon if it's running, otherwise in this process."""
+    args = sys.argv[1:]
+    response = None
+    if _command(args) not in LOCAL_COMMANDS:
+        response = request(args, socket_path())
+
+    if response is None:
+        # We only pay the import of the program when there is no daemon.
+        from .cli import cli  # noqa: C0415
+
+        cli()
+        return
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
+
+
+def socket_path() -> str:
+    """Return the path of the daemon socket."""
+    return os.path.expanduser(os.environ.get("PYDO_SOCKET", DEFAULT_SOCKET_PATH))
+
+
+def request(args: List[str], path: str) -> Optional[Dict[str, Any]]:
+    """Ask the daemon to run a command.
+
+    Args:
+        args: Command line arguments of the command.
+        path: Path of the daemon socket.
+
+    Returns:
+        The stdout, stderr and exit_code of the command, or None if the daemon is
+            not running or it's socket can't be used.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(path)
+        except OSError:
+            # Like a stale socket or one of another user.
+            return None
+        connection.sendall(json.dumps(_build_request(args)).encode())
+        connection.shutdown(socket.SHUT_WR)
+        response = receive(connection)
+
+    return json.loads(response)
+
+
+def _build_request(args: List[str]) -> Dict[str, Any]:
+    """Gather the arguments and the client context the command needs."""
+    environ = {
+        key: value
+        for key, value in os.environ.items()
+        if key.startswith("PYDO_") or key in FORWARDED_ENVIRONMENT
+    }
+    isatty = sys.stdout.isatty()
+    if isatty:
+        columns, lines = shutil.get_terminal_size()
+        environ["COLUMNS"] = str(columns)
+        environ["LINES"] = str(lines)
+
+    return {"args": args, "cwd": os.getcwd(), "environ": environ, "isatty": isatty}
+
+
+def receive(connection: socket.socket) -> bytes:
+    """Read the data of a connection until the other end closes it."""
+    chunks: List[bytes] = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _command(args: List[str]) -> Optional[str]:
+    """Return the name of the command of the arguments, skipping the global options."""
+    arguments = iter(args)
+    for argument in arguments:
+        if argument in ("-c", "--config_path", "--profile_output"):
+            next(arguments, None)
+        elif not argument.startswith("-"):
+            return argument
+    return None
@@ -0,0 +1,150 @@
+"""Define the daemon that runs the commands of the pydo clients.
+
+It keeps the configuration, the repository and its indexes loaded between commands,
+and runs the click commands in the same process, one at a time.
+"""
+
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Dict, List, Optional
+
+from .client import receive
+from .utils import WarmCliObjects
+
+log = logging.getLogger(__name__)
+
+
+class _Output(io.StringIO):
+    """Gather the output of a command, telling if the client prints to a terminal."""
+
+    def __init__(self, isatty: bool) -> None:
+        """Configure the attributes."""
+        super().__init__()
+        self._isatty = isatty
+
+    def isatty(self) -> bool:
+        """Return whether the client output is a terminal."""
+        return self._isatty
+
+
+def serve(socket_path: str, objects: Optional[WarmCliObjects] = None) -> None:
+    """Listen to the commands of the clients in a Unix socket.
+
+    Args:
+        socket_path: Path of the socket to listen to.
+        objects: Objects shared by the commands.
+
+    Raises:
+        FileExistsError: If there is another daemon listening to the socket.
+    """
+    path = os.path.expanduser(socket_path)
+    if objects is None:
+        objects = WarmCliObjects()
+    _remove_stale_socket(path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        os.chmod(path, 0o600)
+        server.listen()
+        log.info(f"Listening to the pydo commands in {path}")
+        try:
+            while True:
+                connection, _ = server.accept()
+                with connection:
+                    try:
+                        request = json.loads(receive(connection))
+                    except ValueError:
+                        # Connections like the ones checking if the daemon is alive.
+                        continue
+                    response = run_request(request, objects)
+                    connection.sendall(json.dumps(response).encode())
+        finally:
+            os.remove(path)
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove the socket of a daemon that is no longer running.
+
+    Raises:
+        FileExistsError: If there is a daemon listening to the socket.
+    """
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise FileExistsError(f"There is already a pydo daemon listening to {path}")
+
+
+def run_request(request: Dict[str, Any], objects: WarmCliObjects) -> Dict[str, Any]:
+    """Run the command of a client in the client's directory and environment.
+
+    If the command fails, the loaded objects are discarded, so the changes it may
+    have left in the repository are not committed by the next commands.
+
+    Args:
+        request: Dictionary with the args, cwd, environ and isatty of the client.
+        objects: Objects shared by the commands.
+
+    Returns:
+        Dictionary with the stdout, stderr and exit_code of the command.
+    """
+    stdout = _Output(request["isatty"])
+    stderr = _Output(request["isatty"])
+    cwd = os.getcwd()
+    environ = os.environ.copy()
+    handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if type(handler) is logging.StreamHandler
+    ]
+    streams = [handler.stream for handler in handlers]
+    for handler in handlers:
+        handler.setStream(stderr)
+
+    try:
+        os.chdir(request["cwd"])
+        os.environ.update(request["environ"])
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exit_code = _run_cli(request["args"], objects)
+    finally:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(environ)
+        for handler, stream in zip(handlers, streams):
+            handler.setStream(stream)
+
+    if exit_code != 0:
+        objects.clear()
+
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "exit_code": exit_code,
+    }
+
+
+def _run_cli(args: List[str], objects: WarmCliObjects) -> int:
+    """Run a command of the command line interface and return its exit code."""
+    from .cli import cli  # noqa: C0415, the cli module imports this one.
+
+    try:
+        cli.main(args=args, prog_name="pydo", obj=objects)
+    except SystemExit as exit_:
+        if exit_.code is None or isinstance(exit_.code, int):
+            return exit_.code or 0
+        print(exit_.code, file=sys.stderr)
+        return 1
+    except Exception:  # noqa: W0703, keep serving the rest of the clients.
+        traceback.print_exc()
+        return 1
+    return 0
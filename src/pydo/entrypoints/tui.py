@@ -1,206 +1,195 @@
 """Define the terminal user interface."""
 
-from typing import Any, Callable, List, Optional, Union
+from typing import List, Set
 
 from prompt_toolkit import Application
 from prompt_toolkit.application import get_app
-from prompt_toolkit.key_binding import KeyBindings, KeyBindingsBase
-from prompt_toolkit.key_binding.bindings.focus import focus_next, focus_previous
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.key_binding.key_processor import KeyPressEvent
-from prompt_toolkit.layout.containers import (
-    Container,
-    HorizontalAlign,
-    HSplit,
-    VerticalAlign,
-    VSplit,
-    Window,
-)
+from prompt_toolkit.layout.containers import Window
 from prompt_toolkit.layout.controls import FormattedTextControl
-from prompt_toolkit.layout.dimension import AnyDimension
 from prompt_toolkit.layout.layout import Layout
 from prompt_toolkit.output.color_depth import ColorDepth
 from prompt_toolkit.styles import Style
+from prompt_toolkit.utils import get_cwidth
 
-# Helper functions
+from ..async_services import AsyncServices
+from ..views import ReportWindow
 
+STYLE = Style(
+    [
+        ("header", "bg:#002b36 #93a1a1 bold"),
+        ("row", "bg:#002b36 #657b83"),
+        ("row.focused", "bg:#002b36 #268bd2"),
+        ("row.alternate", "bg:#073642 #657b83"),
+        ("row.alternate.focused", "bg:#073642 #268bd2"),
+    ]
+)
 
-class Table(HSplit):
-    """Define a table.
+
+class Table(Window):
+    """Define a table of the rows of a report.
+
+    Only the visible rows are rendered, and they're read from the report window
+    when they're shown, so the size of the report doesn't change the time to open it
+    or the memory it uses. The pages that are not in memory are read in the
+    background, a placeholder is shown until they arrive.
 
     Args:
-        header
-        data: Data to print
-        handler: Called when the row is clicked, no parameters are passed to this
-            callable.
+        report: Rows of the report, read by pages from the repository.
+        services: Services that read the pages without blocking the interface.
     """
 
-    def __init__(
-        self,
-        data: Any,
-        window_too_small: Optional[Container] = None,
-        align: VerticalAlign = VerticalAlign.JUSTIFY,
-        padding: AnyDimension = 0,
-        padding_char: Optional[str] = None,
-        padding_style: str = "",
-        width: AnyDimension = None,
-        height: AnyDimension = None,
-        z_index: Optional[int] = None,
-        modal: bool = False,
-        key_bindings: Optional[KeyBindingsBase] = None,
-        style: Union[str, Callable[[], str]] = "",
-    ) -> None:
+    def __init__(self, report: ReportWindow, services: AsyncServices) -> None:
         """Initialize the widget."""
-        self.data = data
-        # rows = [MultiColumnRow(row) for row in self.data]
-        rows = [
-            MultiColumnRow(data[0]),
-            MultiColumnRow(data[1], alternate=True),
-            MultiColumnRow(data[2]),
-            MultiColumnRow(data[2], alternate=True),
-        ]
-
+        self.report = report
+        self.services = services
+        self.selected = 0
+        self.top = 0
+        self._loading: Set[int] = set()
         super().__init__(
-            children=rows,
-            window_too_small=window_too_small,
-            align=align,
-            padding=padding,
-            padding_char=padding_char,
-            padding_style=padding_style,
-            width=width,
-            height=height,
-            z_index=z_index,
-            modal=modal,
-            key_bindings=key_bindings,
-            style=style,
+            FormattedTextControl(
+                self._get_text, focusable=True, key_bindings=self._key_bindings()
+            ),
+            always_hide_cursor=True,
+            wrap_lines=False,
         )
 
-
-class MultiColumnRow(VSplit):
-    """Define row.
-
-    Args:
-        text: text to print
-    """
-
-    def __init__(
-        self,
-        data: Optional[List[str]] = None,
-        alternate: bool = False,
-        window_too_small: Optional[Container] = None,
-        align: HorizontalAlign = HorizontalAlign.JUSTIFY,
-        padding: AnyDimension = 2,
-        padding_char: Optional[str] = " ",
-        padding_style: str = "",
-        width: AnyDimension = None,
-        height: AnyDimension = None,
-        z_index: Optional[int] = None,
-        modal: bool = False,
-        key_bindings: Optional[KeyBindingsBase] = None,
-        style: Union[str, Callable[[], str]] = "",
-    ) -> None:
-        """Initialize the widget."""
-        if data is None:
-            data = []
-        self.data = data
-
-        def get_style() -> str:
-            if get_app().layout.has_focus(self):
-                return "class:row.focused"
-            else:
-                return "class:row"
-
-        def get_style_alternate() -> str:
-            if get_app().layout.has_focus(self):
-                return "class:row.alternate.focused"
-            else:
-                return "class:row.alternate"
-
-        if alternate:
-            style = get_style_alternate
+    def _visible_rows(self) -> int:
+        """Return the number of rows that fit in the window below the header."""
+        if self.render_info is not None:
+            height = self.render_info.window_height
         else:
-            style = get_style
-
-        columns = [
-            Window(
-                FormattedTextControl(self.data[0], focusable=True),
-                style=style,
-                always_hide_cursor=True,
-                dont_extend_height=True,
-                dont_extend_width=True,
-                wrap_lines=True,
-            ),
-            Window(
-                FormattedTextControl(self.data[1], focusable=False),
-                style=style,
-                always_hide_cursor=True,
-                dont_extend_height=True,
-                wrap_lines=True,
-            ),
+            height = get_app().output.get_size().rows
+        return max(height - 1, 1)
+
+    def _get_text(self) -> StyleAndTextTuples:
+        """Render the header and the visible rows."""
+        height = self._visible_rows()
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + height:
+            self.top = self.selected - height + 1
+
+        missing_pages = self.report.missing_pages(self.top, height)
+        if missing_pages:
+            self._load(missing_pages)
+            widths = [get_cwidth(label) for label in self.report.labels]
+            return [
+                ("class:header", _format_row(self.report.labels, widths)),
+                ("class:row", "  Loading...\n"),
+            ]
+
+        rows = self.report.rows(self.top, height)
+        # The selection may have moved past the end of the report before it was read.
+        if self.selected >= self.top + len(rows):
+            self.selected = max(self.top + len(rows) - 1, 0)
+
+        widths = [get_cwidth(label) for label in self.report.labels]
+        for row in rows:
+            widths = [max(width, get_cwidth(cell)) for width, cell in zip(widths, row)]
+
+        fragments: StyleAndTextTuples = [
+            ("class:header", _format_row(self.report.labels, widths))
         ]
-        # self.window.children[1].width = 10
-        super().__init__(
-            children=columns,
-            window_too_small=window_too_small,
-            align=align,
-            padding=padding,
-            padding_char=padding_char,
-            padding_style=style,
-            width=width,
-            height=height,
-            z_index=z_index,
-            modal=modal,
-            key_bindings=key_bindings,
-            style=style,
+        for index, row in enumerate(rows, start=self.top):
+            style = "class:row.alternate" if index % 2 else "class:row"
+            if index == self.selected:
+                style += ".focused"
+            fragments.append((style, _format_row(row, widths)))
+        return fragments
+
+    def _load(self, pages: List[int]) -> None:
+        """Read the pages in the background if they're not being read already."""
+        pages = [page for page in pages if page not in self._loading]
+        if not pages:
+            return
+        self._loading.update(pages)
+        get_app().create_background_task(self._load_pages(pages))
+
+    async def _load_pages(self, pages: List[int]) -> None:
+        """Read the pages and render the table again when they arrive."""
+        try:
+            await self.services.load_report_pages(self.report, pages)
+        finally:
+            self._loading.difference_update(pages)
+        get_app().invalidate()
+
+    def _move(self, rows: int) -> None:
+        """Move the selection, without going past the first or last known rows.
+
+        If the end of the report is not known yet, the selection is moved back to
+        the last row once it's read.
+        """
+        self.selected = max(self.selected + rows, 0)
+        if self.report.length is not None:
+            self.selected = min(self.selected, max(self.report.length - 1, 0))
+
+    def _key_bindings(self) -> KeyBindings:
+        """Define the keys to move through the rows."""
+        key_bindings = KeyBindings()
+
+        @key_bindings.add("j")
+        @key_bindings.add("down")
+        def _next(event: KeyPressEvent) -> None:
+            self._move(1)
+
+        @key_bindings.add("k")
+        @key_bindings.add("up")
+        def _previous(event: KeyPressEvent) -> None:
+            self._move(-1)
+
+        @key_bindings.add("c-f")
+        @key_bindings.add("pagedown")
+        def _next_page(event: KeyPressEvent) -> None:
+            self._move(self._visible_rows())
+
+        @key_bindings.add("c-b")
+        @key_bindings.add("pageup")
+        def _previous_page(event: KeyPressEvent) -> None:
+            self._move(-self._visible_rows())
+
+        @key_bindings.add("g")
+        @key_bindings.add("home")
+        def _first(event: KeyPressEvent) -> None:
+            self.selected = 0
+
+        return key_bindings
+
+
+def _format_row(cells: List[str], widths: List[int]) -> str:
+    """Pad the cells of a row to the column widths."""
+    return (
+        "  "
+        + "  ".join(
+            cell + " " * (width - get_cwidth(cell))
+            for cell, width in zip(cells, widths)
         )
-
-
-# Layout
-
-layout = Table(
-    [
-        ["Test1", "Description"],
-        [
-            "Test2",
-            "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa aaaaaaaaaaaaaaaaaaaaaaaaaaa a",
-        ],
-        ["Test3", "Description 2"],
-    ]
-)
-
-# Key bindings
-
-kb = KeyBindings()
-
-kb.add("j")(focus_next)
-kb.add("k")(focus_previous)
-
-
-@kb.add("c-c", eager=True)
-@kb.add("q", eager=True)
-def exit_(event: KeyPressEvent) -> None:
-    """Exit the user interface."""
-    event.app.exit()
-
-
-# Styles
-
-style = Style(
-    [
-        ("row", "bg:#002b36 #657b83"),
-        ("row.focused", "#268bd2"),
-        ("row.alternate", "bg:#073642 #657b83"),
-        ("row.alternate.focused", "#268bd2"),
-    ]
-)
-# Application
-
-# ignore: it asks for the type annotation of app, but I haven't found it
-app = Application(  # type: ignore
-    layout=Layout(layout),
-    full_screen=True,
-    key_bindings=kb,
-    style=style,
-    color_depth=ColorDepth.DEPTH_24_BIT,
-)
-
-app.run()
+        + "\n"
+    )
+
+
+def run(report: ReportWindow) -> None:
+    """Show a report in the terminal user interface until the user exits."""
+    key_bindings = KeyBindings()
+
+    @key_bindings.add("c-c", eager=True)
+    @key_bindings.add("q", eager=True)
+    def exit_(event: KeyPressEvent) -> None:
+        """Exit the user interface."""
+        event.app.exit()
+
+    services = AsyncServices(report.repo)
+    # ignore: it asks for the type annotation of app, but I haven't found it
+    app = Application(  # type: ignore
+        layout=Layout(Table(report, services)),
+        full_screen=True,
+        key_bindings=key_bindings,
+        style=STYLE,
+        color_depth=ColorDepth.DEPTH_24_BIT,
+    )
+    try:
+        app.run()
+    finally:
+        services.close()
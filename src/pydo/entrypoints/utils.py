@@ -1,22 +1,33 @@
 """Define common entrypoint functions."""
 
+import json
 import logging
 import os
-import re
+import shlex
 import shutil
 import sys
 from contextlib import suppress
-from typing import Any, Iterable, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from repository_orm import Repository, load_repository
+from repository_orm import Repository
 
+from ..adapters import load_repository
 from ..config import Config
 from ..exceptions import ConfigError, DateParseError
-from ..model import RecurrentTask, Task, TaskChanges, TaskSelector, convert_date
+from ..model import (
+    RecurrentTask,
+    Task,
+    TaskChanges,
+    TaskCounters,
+    TaskSelector,
+    convert_date,
+)
+from ..profiling import timed
 
 log = logging.getLogger(__name__)
 
 
+@timed
 def load_config(config_path: str) -> Config:
     """Load the configuration from the file."""
     log.debug(f"Loading the configuration from file {config_path}")
@@ -46,10 +57,76 @@ def load_config(config_path: str) -> Config:
     return config
 
 
+class CliObjects(dict):  # type: ignore
+    """Build the objects shared by the cli commands the first time they're used.
+
+    Loading the configuration and the repository are the slowest steps of the
+    program startup, so the commands only pay for the objects they use.
+
+    Attributes:
+        config_path: Path to the configuration file.
+    """
+
+    def __init__(self, config_path: str) -> None:
+        """Configure the attributes."""
+        super().__init__()
+        self.config_path = config_path
+
+    def __missing__(self, key: str) -> Any:
+        """Build the object of the key if it's not yet loaded."""
+        if key == "config":
+            self[key] = load_config(self.config_path)
+        elif key == "repo":
+            self[key] = get_repo(self["config"])
+        else:
+            raise KeyError(key)
+        return self[key]
+
+
+class WarmCliObjects(dict):  # type: ignore
+    """Keep the objects shared by the cli commands loaded between commands.
+
+    The daemon uses it to keep the configuration and repository of each
+    configuration file in memory. They're loaded again when the configuration file
+    changes, for example after a migration changes the database_url.
+    """
+
+    def __init__(self) -> None:
+        """Configure the attributes."""
+        super().__init__()
+        self._stamps: Dict[str, Tuple[float, int]] = {}
+
+    def load(self, config_path: str) -> CliObjects:
+        """Return the objects of a configuration file, loading them if needed.
+
+        Args:
+            config_path: Path to the configuration file, the relative ones are
+                relative to the current working directory.
+        """
+        path = os.path.abspath(os.path.expanduser(config_path))
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_mtime, stat.st_size)
+        except FileNotFoundError:
+            stamp = (0, 0)
+
+        if path not in self or self._stamps[path] != stamp:
+            self[path] = CliObjects(path)
+            self._stamps[path] = stamp
+        return self[path]
+
+
+@timed
 def get_repo(config: Config) -> Repository:
     """Configure the Repository."""
     log.debug("Initializing the repository")
-    repo = load_repository([Task, RecurrentTask], config["database_url"])
+    try:
+        journal = bool(config.get("database_journal"))
+    except ConfigError:
+        journal = False
+    repo = load_repository(
+        [Task, RecurrentTask, TaskCounters], config["database_url"], journal
+    )
 
     return repo
 
@@ -73,10 +150,21 @@ def load_logger(verbose: bool = False) -> None:  # pragma no cover
         logging.basicConfig(
             stream=sys.stderr, level=logging.INFO, format="  %(levelname)s %(message)s"
         )
+    # The daemon runs many commands in the same process, and basicConfig only
+    # configures the first one.
+    logging.getLogger().setLevel(logging.DEBUG if verbose else logging.INFO)
+
 
+def _parse_task_selector(
+    task_args: Iterable[str], report: bool = False
+) -> TaskSelector:
+    """Parse the task ids and task filter from the task cli arguments.
 
-def _parse_task_selector(task_args: Iterable[str]) -> TaskSelector:
-    """Parse the task ids and task filter from the task cli arguments."""
+    Args:
+        task_args: command line friendly task selector representation.
+        report: If the selector is the one of a report, the only one that accepts
+            a limit of tasks.
+    """
     selector = TaskSelector()
 
     for arg in task_args:
@@ -86,6 +174,10 @@ def _parse_task_selector(task_args: Iterable[str]) -> TaskSelector:
                 selector.task_ids.append(int(arg))
         elif attribute_id == "sort":
             selector.sort = attribute_value
+        elif attribute_id == "limit":
+            if not report:
+                _reject_limit()
+            selector.limit = attribute_value
         elif attribute_id not in ["tag_ids", "tags_rm", "recurring", "repeating"]:
             selector.task_filter[attribute_id] = attribute_value
 
@@ -116,6 +208,8 @@ def _parse_changes(task_args: Iterable[str]) -> TaskChanges:
         elif attribute_id in ["recurring", "repeating"]:
             changes.task_attributes["recurrence"] = attribute_value
             changes.task_attributes["recurrence_type"] = attribute_id
+        elif attribute_id == "limit":
+            _reject_limit()
         else:
             changes.task_attributes[attribute_id] = attribute_value
 
@@ -125,6 +219,94 @@ def _parse_changes(task_args: Iterable[str]) -> TaskChanges:
     return changes
 
 
+def _reject_limit() -> None:
+    """Exit with an error because a limit was used outside a report."""
+    log.error("The limit argument can only be used to select the tasks of a report")
+    sys.exit(1)
+
+
+def _parse_date(value: str) -> Any:
+    """Convert a task argument value into a date, exiting if it's not valid."""
+    try:
+        return convert_date(value)
+    except DateParseError as error:
+        log.error(str(error))
+        sys.exit(1)
+
+
+def _parse_sort(value: str) -> List[str]:
+    """Convert a task argument value into a list of sort criteria."""
+    return value.split(",")
+
+
+# Map the keys of the friendly task attribute strings to the attribute they set and
+# the converter of their values. The model type has no converter, so only it's empty
+# value is parsed.
+_TASK_ARGUMENT_KEYS: Dict[str, Tuple[str, Optional[Callable[[str], Any]]]] = {
+    "body": ("body", str),
+    "due": ("due", _parse_date),
+    "est": ("estimate", float),
+    "estimate": ("estimate", float),
+    "fun": ("fun", int),
+    "limit": ("limit", int),
+    "pri": ("priority", int),
+    "priority": ("priority", int),
+    "ar": ("area", str),
+    "area": ("area", str),
+    "rec": ("recurring", str),
+    "recurring": ("recurring", str),
+    "rep": ("repeating", str),
+    "repeating": ("repeating", str),
+    "sort": ("sort", _parse_sort),
+    "st": ("state", str),
+    "state": ("state", str),
+    "type": ("type", None),
+    "vl": ("value", int),
+    "value": ("value", int),
+    "wp": ("willpower", int),
+    "willpower": ("willpower", int),
+}
+
+
+def _parse_import_lines(lines: Iterable[str]) -> Iterator[TaskChanges]:
+    """Parse the new tasks of the lines of an import file.
+
+    Each line holds either the friendly task attributes accepted by the add command,
+    or a JSON object with the task attributes. The empty lines are skipped.
+
+    Args:
+        lines: Lines of the import file.
+
+    Returns:
+        Changes that define each new task.
+
+    Raises:
+        ValueError: If a line is not a valid JSON object.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line == "":
+            continue
+
+        if line[0] != "{":
+            try:
+                task_args = shlex.split(line)
+            except ValueError:
+                # Unbalanced quotes, like the ones of apostrophes.
+                task_args = line.split()
+            yield _parse_changes(task_args)
+            continue
+
+        try:
+            task_attributes = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(
+                f"Line {line_number} is not a valid JSON object: {error}"
+            ) from error
+        tags = task_attributes.pop("tags", [])
+        yield TaskChanges(task_attributes=task_attributes, tags_to_add=tags)
+
+
 def _parse_task_argument(task_arg: str) -> Tuple[str, Any]:
     """Parse the Task attributes from a friendly task attribute string.
 
@@ -135,45 +317,22 @@ def _parse_task_argument(task_arg: str) -> Tuple[str, Any]:
         attribute_id: Attribute key.
         attributes_value: Attribute value.
     """
-    attribute_conf = {
-        "body": {"regexp": re.compile(r"^body:"), "type": "str"},
-        "due": {"regexp": re.compile(r"^due:"), "type": "date"},
-        "estimate": {"regexp": re.compile(r"^(est|estimate):"), "type": "float"},
-        "fun": {"regexp": re.compile(r"^fun:"), "type": "int"},
-        "priority": {"regexp": re.compile(r"^(pri|priority):"), "type": "int"},
-        "area": {"regexp": re.compile(r"^(ar|area):"), "type": "str"},
-        "recurring": {"regexp": re.compile(r"^(rec|recurring):"), "type": "str"},
-        "repeating": {"regexp": re.compile(r"^(rep|repeating):"), "type": "str"},
-        "sort": {"regexp": re.compile(r"^(sort):"), "type": "sort"},
-        "state": {"regexp": re.compile(r"^(st|state):"), "type": "str"},
-        "tag_ids": {"regexp": re.compile(r"^\+"), "type": "tag"},
-        "tags_rm": {"regexp": re.compile(r"^\-"), "type": "tag"},
-        "type": {"regexp": re.compile(r"^type:"), "type": "model"},
-        "value": {"regexp": re.compile(r"^(vl|value):"), "type": "int"},
-        "willpower": {"regexp": re.compile(r"^(wp|willpower):"), "type": "int"},
-    }
-    attribute_value: Any = "initial_internal_value"
-
-    for attribute_id, attribute in attribute_conf.items():
-        if attribute["regexp"].match(task_arg):  # type: ignore
-            if attribute["type"] == "tag":
-                attribute_value = re.sub(r"^[+-]", "", task_arg)
-            elif task_arg.split(":")[1] == "":
-                attribute_value = None
-            elif attribute["type"] == "str":
-                attribute_value = task_arg.split(":")[1]
-            elif attribute["type"] == "int":
-                attribute_value = int(task_arg.split(":")[1])
-            elif attribute["type"] == "float":
-                attribute_value = float(task_arg.split(":")[1])
-            elif attribute["type"] == "date":
-                try:
-                    attribute_value = convert_date(":".join(task_arg.split(":")[1:]))
-                except DateParseError as error:
-                    log.error(str(error))
-                    sys.exit(1)
-            elif attribute["type"] == "sort":
-                attribute_value = task_arg.split(":")[1].split(",")
-        if attribute_value != "initial_internal_value":
-            return attribute_id, attribute_value
-    return "unprocessed", task_arg
+    if task_arg[:1] == "+":
+        return "tag_ids", task_arg[1:]
+    if task_arg[:1] == "-":
+        return "tags_rm", task_arg[1:]
+
+    key, separator, value = task_arg.partition(":")
+    if separator == "" or key not in _TASK_ARGUMENT_KEYS:
+        return "unprocessed", task_arg
+    attribute_id, converter = _TASK_ARGUMENT_KEYS[key]
+
+    # The dates can have colons, the rest of values end at the next one.
+    if converter is not _parse_date:
+        value = value.split(":", 1)[0]
+
+    if value == "" or value[0] == ":":
+        return attribute_id, None
+    if converter is None:
+        return "unprocessed", task_arg
+    return attribute_id, converter(value)
@@ -8,12 +8,13 @@ from typing import TypeVar
 
 from repository_orm import Entity
 
-from .date import convert_date
+from .date import RecurrenceRule, convert_date, get_date_rule, get_recurrence_rule
 from .task import (
     RecurrentTask,
     Task,
     TaskAttrs,
     TaskChanges,
+    TaskCounters,
     TaskSelector,
     TaskState,
     TaskType,
@@ -24,11 +25,15 @@ EntityType = TypeVar("EntityType", bound=Entity)
 __all__ = [
     "convert_date",
     "EntityType",
+    "get_date_rule",
+    "get_recurrence_rule",
+    "RecurrenceRule",
     "RecurrentTask",
     "Sulid",
     "Task",
     "TaskAttrs",
     "TaskChanges",
+    "TaskCounters",
     "TaskSelector",
     "TaskType",
     "TaskState",
@@ -1,18 +1,24 @@
 """Store the operations on dates."""
 
 import re
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from typing import Callable, Dict, Optional, Tuple
 
 from dateutil._common import weekday
 from dateutil.relativedelta import FR, MO, SA, SU, TH, TU, WE, relativedelta
 
 from ..exceptions import DateParseError
 
+DateRule = Callable[[datetime], datetime]
+
 
 def convert_date(human_date: str, starting_date: Optional[datetime] = None) -> datetime:
     """Convert a human string into a datetime object.
 
+    The string is parsed once into a rule that is applied to the starting date, so
+    repeated dates like the due:tomorrow of an import only pay the parse once.
+
     Arguments:
         human_date (str): Date string to convert
         starting_date (datetime): Date to compare.
@@ -20,103 +26,188 @@ def convert_date(human_date: str, starting_date: Optional[datetime] = None) -> d
     if starting_date is None:
         starting_date = datetime.now()
 
-    date = _convert_weekday(human_date, starting_date)
+    return get_date_rule(human_date)(starting_date)
 
-    if date is not None:
-        return date
 
-    if re.match(
-        r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}",
-        human_date,
-    ):
-        return datetime.strptime(human_date, "%Y-%m-%dT%H:%M")
-    elif re.match(r"[0-9]{4}.[0-9]{2}.[0-9]{2}", human_date):
-        return datetime.strptime(human_date, "%Y-%m-%d")
-    elif re.match(r"(now|today)", human_date):
-        return starting_date
-    elif re.match(r"tomorrow", human_date):
-        return starting_date + relativedelta(days=1)
-    elif re.match(r"yesterday", human_date):
-        return starting_date + relativedelta(days=-1)
-    else:
-        return _str2date(human_date, starting_date)
-
-
-def _convert_weekday(human_date: str, starting_date: datetime) -> Optional[datetime]:
-    """Convert a weekday human string into a datetime object.
+@lru_cache(maxsize=256)
+def get_date_rule(human_date: str) -> DateRule:
+    """Return the rule that converts a date relative to a starting date.
 
     Arguments:
-        human_date (str): Date string to convert
-        starting_date (datetime): Date to compare.
+        human_date (str): Date string to convert. Possible inputs are:
+            * The now, today, tomorrow and yesterday keywords.
+            * The weekday names, for example 'mon' or 'monday'.
+            * ISO dates, for example '2021-06-01' or '2021-06-01T12:00'.
+            * A combination of the modifiers, for example '5d10h3m10s':
+                s: seconds,
+                m: minutes,
+                h: hours,
+                d: days,
+                w: weeks,
+                mo: months,
+                rmo: relative months,
+                y: years.
+
+    Raises:
+        DateParseError: If the string is not a valid date.
+        ValueError: If the string looks like an ISO date but it's not a valid one.
     """
-    if re.match(r"mon.*", human_date):
-        return _next_weekday(0, starting_date)
-    elif re.match(r"tue.*", human_date):
-        return _next_weekday(1, starting_date)
-    elif re.match(r"wed.*", human_date):
-        return _next_weekday(2, starting_date)
-    elif re.match(r"thu.*", human_date):
-        return _next_weekday(3, starting_date)
-    elif re.match(r"fri.*", human_date):
-        return _next_weekday(4, starting_date)
-    elif re.match(r"sat.*", human_date):
-        return _next_weekday(5, starting_date)
-    elif re.match(r"sun.*", human_date):
-        return _next_weekday(6, starting_date)
-    else:
-        return None
-
-
-def _str2date(modifier: str, starting_date: datetime) -> datetime:
-    """Convert a string into a date using the supported code.
+    keyword, rule = _KEYWORD_RULES.get(human_date[:3], ("", None))
+    if rule is not None and human_date.startswith(keyword):
+        return rule
+
+    if _DATETIME_REGEXP.match(human_date):
+        date = datetime.strptime(human_date, "%Y-%m-%dT%H:%M")
+        return lambda starting_date: date
+    if _DATE_REGEXP.match(human_date):
+        date = datetime.strptime(human_date, "%Y-%m-%d")
+        return lambda starting_date: date
+    return get_recurrence_rule(human_date).apply
+
+
+_DATETIME_REGEXP = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}")
+_DATE_REGEXP = re.compile(r"[0-9]{4}.[0-9]{2}.[0-9]{2}")
+
+
+def next_date(recurrence: str, starting_date: datetime, after: datetime) -> datetime:
+    """Get the first date of a recurrence series that is later than `after`.
 
     Arguments:
-        modifier (str): Possible inputs are a combination of:
-            s: seconds,
-            m: minutes,
-            h: hours,
-            d: days,
-            w: weeks,
-            mo: months,
-            rmo: relative months,
-            y: years.
-
-            For example '5d10h3m10s'.
-        starting_date (datetime): Date to compare
+        recurrence (str): Time between the elements of the series, for example '1mo'.
+        starting_date (datetime): First date of the series.
+        after (datetime): Date that the returned element needs to be later than.
+    """
+    return get_recurrence_rule(recurrence).next_after(starting_date, after)
 
-    Returns:
-        resulting_date (datetime)
+
+_ELEMENT_REGEXP = re.compile("(?P<value>[0-9]+)(?P<unit>[a-z]+)")
+
+
+class RecurrenceRule:
+    """Parsed representation of a date modifier string like '1w2d'.
+
+    Use `get_recurrence_rule` to build them, so each string is parsed only once.
+
+    Public methods:
+        apply: Apply the rule once to a date.
+        next_after: Get the first date of a recurrence series after a date.
+
+    Attributes:
+        recurrence (str): String the rule was parsed from.
+        step (timedelta): Fixed length units of the rule (s, m, h, d, w).
+        months (int): Calendar months of the rule (mo, y).
+        relative_months (int): Relative months of the rule (rmo).
     """
-    date_delta = relativedelta()
 
-    element_regexp = re.compile("(?P<value>[0-9]+)(?P<unit>[a-z]+)")
-    elements = element_regexp.findall(modifier)
+    __slots__ = ("recurrence", "step", "months", "relative_months", "_delta")
+
+    def __init__(self, recurrence: str) -> None:
+        """Parse the recurrence string.
+
+        Raises:
+            DateParseError: If the string doesn't contain any value and unit pair.
+        """
+        units = {"s": 0, "m": 0, "h": 0, "d": 0, "w": 0, "mo": 0, "rmo": 0, "y": 0}
+        elements = _ELEMENT_REGEXP.findall(recurrence)
+
+        if len(elements) == 0:
+            raise DateParseError(
+                f"Unable to parse the date string {recurrence}, please enter a valid "
+                "one"
+            )
+        for value, unit in elements:
+            if unit in units:
+                units[unit] += int(value)
+
+        self.recurrence = recurrence
+        self.step = timedelta(
+            seconds=units["s"],
+            minutes=units["m"],
+            hours=units["h"],
+            days=units["d"],
+            weeks=units["w"],
+        )
+        self.months = units["mo"] + 12 * units["y"]
+        self.relative_months = units["rmo"]
+        self._delta = relativedelta(months=self.months) + self.step
+
+    def apply(self, starting_date: datetime) -> datetime:
+        """Apply the rule once to a date.
+
+        Arguments:
+            starting_date (datetime): Date to compare
+        """
+        date = starting_date + self._delta
+        if self.relative_months != 0:
+            date += _next_monthday(self.relative_months, starting_date) - starting_date
+        return date
 
-    if len(elements) == 0:
-        raise DateParseError(
-            f"Unable to parse the date string {modifier}, please enter a valid one"
+    def next_after(self, starting_date: datetime, after: datetime) -> datetime:
+        """Get the first date of a recurrence series that is later than `after`.
+
+        The series starts at `starting_date`, and it's n element is the result of
+        applying n times the rule to it. Instead of walking the series one step at a
+        time, the fixed length units are solved arithmetically, and the calendar
+        ones with an exponential search followed by a bisection, so the cost doesn't
+        depend on how far `after` is from `starting_date`.
+
+        Arguments:
+            starting_date (datetime): First date of the series.
+            after (datetime): Date that the returned element needs to be later than.
+
+        Returns:
+            next_date (datetime): The first element of the series after `after`,
+                it's never `starting_date` itself.
+        """
+        if self.months == 0 and self.relative_months == 0:
+            if self.step <= timedelta(0):
+                raise DateParseError(
+                    f"The recurrence {self.recurrence} doesn't move the date forward"
+                )
+            if after < starting_date:
+                return starting_date + self.step
+            return starting_date + self.step * (
+                (after - starting_date) // self.step + 1
+            )
+
+        # Find an interval of steps (lower, upper] that contains the solution.
+        lower, upper = 0, 1
+        while self._nth_date(starting_date, upper) <= after:
+            lower, upper = upper, upper * 2
+
+        # Bisect the interval till it only contains the solution.
+        while upper - lower > 1:
+            middle = (lower + upper) // 2
+            if self._nth_date(starting_date, middle) <= after:
+                lower = middle
+            else:
+                upper = middle
+
+        return self._nth_date(starting_date, upper)
+
+    def _nth_date(self, starting_date: datetime, steps: int) -> datetime:
+        """Get the element `steps` of the series that starts at `starting_date`."""
+        date = (
+            starting_date
+            + relativedelta(months=self.months * steps)
+            + self.step * steps
         )
-    for element_match in elements:
-        value: int = int(element_match[0])
-        unit: str = element_match[1]
-
-        if unit == "s":
-            date_delta += relativedelta(seconds=value)
-        elif unit == "m":
-            date_delta += relativedelta(minutes=value)
-        elif unit == "h":
-            date_delta += relativedelta(hours=value)
-        elif unit == "d":
-            date_delta += relativedelta(days=value)
-        elif unit == "mo":
-            date_delta += relativedelta(months=value)
-        elif unit == "w":
-            date_delta += relativedelta(weeks=value)
-        elif unit == "y":
-            date_delta += relativedelta(years=value)
-        elif unit == "rmo":
-            date_delta += _next_monthday(value, starting_date) - starting_date
-    return starting_date + date_delta
+        if self.relative_months != 0:
+            date += (
+                _next_monthday(self.relative_months * steps, starting_date)
+                - starting_date
+            )
+        return date
+
+
+@lru_cache(maxsize=256)
+def get_recurrence_rule(recurrence: str) -> RecurrenceRule:
+    """Return the parsed RecurrenceRule of a recurrence string.
+
+    Arguments:
+        recurrence (str): Date modifier string, for example '1w2d'.
+    """
+    return RecurrenceRule(recurrence)
 
 
 def _next_weekday(weekday_number: int, starting_date: datetime) -> datetime:
@@ -165,18 +256,23 @@ def _int2weekday(weekday_number: int) -> weekday:
     Arguments:
         weekday (int): Weekday, Monday == 0
     """
-    if weekday_number == 0:
-        weekday = MO
-    elif weekday_number == 1:
-        weekday = TU
-    elif weekday_number == 2:
-        weekday = WE
-    elif weekday_number == 3:
-        weekday = TH
-    elif weekday_number == 4:
-        weekday = FR
-    elif weekday_number == 5:
-        weekday = SA
-    elif weekday_number == 6:
-        weekday = SU
-    return weekday
+    return _WEEKDAYS[weekday_number]
+
+
+_WEEKDAYS = (MO, TU, WE, TH, FR, SA, SU)
+
+# Map the first three letters of the date keywords to the keyword, and the rule to
+# convert it. The date strings only need to start with the keyword, so "mon" and
+# "monday" are both valid.
+_KEYWORD_RULES: Dict[str, Tuple[str, DateRule]] = {
+    "now": ("now", lambda starting_date: starting_date),
+    "tod": ("today", lambda starting_date: starting_date),
+    "tom": ("tomorrow", lambda starting_date: starting_date + relativedelta(days=1)),
+    "yes": ("yesterday", lambda starting_date: starting_date + relativedelta(days=-1)),
+    **{
+        name: (name, partial(_next_weekday, weekday_number))
+        for weekday_number, name in enumerate(
+            ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+        )
+    },
+}
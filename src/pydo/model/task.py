@@ -8,12 +8,12 @@ Classes:
 import logging
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
 
 from pydantic import BaseModel, Field
 from repository_orm import Entity
 
-from .date import convert_date
+from .date import RecurrenceRule, get_recurrence_rule
 
 log = logging.getLogger(__name__)
 
@@ -143,6 +143,11 @@ class RecurrentTask(Task):
     recurrence: str
     recurrence_type: RecurrenceType
 
+    @property
+    def recurrence_rule(self) -> RecurrenceRule:
+        """Return the parsed recurrence of the task."""
+        return get_recurrence_rule(self.recurrence)
+
     def breed_children(self, last_child: Optional[Task] = None) -> Task:
         """Create the next children task."""
         child_attributes = self._generate_children_attributes()
@@ -164,17 +169,11 @@ class RecurrentTask(Task):
         """Calculate the next due date of recurring parent children.
 
         It will apply `recurrence` to the parent's due date, till we get the next
-        one in the future.
-
-        To speed it up, you can't use the last child attributes. You'll need to
-        Improve the convergence algorithm, maybe a Bisection, Regula Falsi or Newton.
+        one in the future. The number of times it needs to be applied is solved by
+        `RecurrenceRule.next_after`, so the cost doesn't grow with the age of the
+        parent.
         """
-        last_due = self.due
-        while True:
-            next_due = convert_date(self.recurrence, last_due)
-            if next_due > datetime.now():
-                return next_due
-            last_due = next_due
+        return self.recurrence_rule.next_after(self.due, datetime.now())
 
     def _next_repeating_due(self, last_child: Task) -> datetime:
         """Calculate the next due date of repeating parent children.
@@ -183,7 +182,10 @@ class RecurrentTask(Task):
         completed date. If no child exists, it will use the parent's due date.
         """
         now = datetime.now()
-        next_due = convert_date(self.recurrence, last_child.closed)
+        if last_child.closed is None:
+            next_due = self.recurrence_rule.apply(now)
+        else:
+            next_due = self.recurrence_rule.apply(last_child.closed)
 
         if next_due < now:
             return now
@@ -224,6 +226,58 @@ class RecurrentTask(Task):
 TaskType = Union[Task, RecurrentTask]
 
 
+class TaskCounters(Entity):
+    """Count the open tasks of each area and tag.
+
+    The services update them each time a task is added or changed, so the areas
+    and tags reports don't need to read all the open tasks. Only the tasks that are
+    not recurrent are counted, and the ones without area or tags are counted under
+    "None".
+
+    Args:
+        areas: Number of open tasks of each area.
+        tags: Number of open tasks of each tag.
+    """
+
+    id_: int = 0
+    areas: Dict[str, int] = Field(default_factory=dict)
+    tags: Dict[str, int] = Field(default_factory=dict)
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[TaskType]) -> "TaskCounters":
+        """Count the open tasks of a group of tasks."""
+        counters = cls()
+        for task in tasks:
+            counters.add(task)
+        return counters
+
+    def add(self, task: TaskType) -> None:
+        """Count a task if it's open."""
+        self._update(task, 1)
+
+    def remove(self, task: TaskType) -> None:
+        """Discount a task if it's open."""
+        self._update(task, -1)
+
+    def _update(self, task: TaskType, increment: int) -> None:
+        """Add the increment to the counters of the area and tags of an open task."""
+        if type(task) is not Task or not task.active:
+            return
+
+        _increment(self.areas, "None" if task.area is None else task.area, increment)
+        for tag in task.tags or ["None"]:
+            _increment(self.tags, tag, increment)
+
+
+def _increment(counts: Dict[str, int], key: str, increment: int) -> None:
+    """Add the increment to a count, removing it when it reaches zero."""
+    count = counts.get(key, 0) + increment
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
 class TaskSelector(BaseModel):
     """Represent a group of tasks by their ID or a task filter.
 
@@ -231,12 +285,15 @@ class TaskSelector(BaseModel):
         task_ids: List of the ids of the tasks you want to act upon.
         task_filter: Task attributes of the tasks you want to act upon. A search will
             be done in the repo with them.
+        sort: Ordered list of task attributes to sort the tasks by.
+        limit: Maximum number of tasks to show in the reports.
     """
 
     task_ids: List[int] = Field(default_factory=list)
     task_filter: TaskAttrs = Field(default_factory=dict)
     model: Union[Type[Task], Type[RecurrentTask]] = Task
     sort: List[str] = Field(default_factory=list)
+    limit: Optional[int] = None
 
 
 class TaskChanges(BaseModel):
@@ -1,13 +1,17 @@
 """Define the object models for the views."""
 
-from typing import List
+import itertools
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Set
 
-from pydantic import BaseModel, Field  # noqa: E0611
+from pydantic import BaseModel, Field, PrivateAttr  # noqa: E0611
 from repository_orm import EntityNotFoundError
-from rich import box
-from rich.console import Console
-from rich.style import Style
-from rich.table import Table
+
+from ..profiling import timed
+
+if TYPE_CHECKING:
+    from rich.table import Table
 
 
 class Colors(BaseModel):
@@ -28,57 +32,184 @@ class Colors(BaseModel):
 
 
 class Report(BaseModel):
-    """Manage the data to print."""
+    """Manage the data to print.
+
+    The indexes of the columns that only have None or empty values are kept up to
+    date as the rows are added, so removing them doesn't need to scan the data.
+    """
 
     labels: List[str]
     data: List[List[str]] = Field(default_factory=list)
     colors: Colors = Colors()
+    _null_columns: Set[int] = PrivateAttr(default_factory=set)
+
+    def __init__(self, **data: Any) -> None:
+        """Initialize the report and find the null columns of the initial data."""
+        super().__init__(**data)
+        self._null_columns = set(range(len(self.labels)))
+        for row in self.data:
+            self._update_null_columns(row)
+
+    def _update_null_columns(self, row: List[str]) -> None:
+        """Remove the columns that have a value in the row from the null columns."""
+        if self._null_columns:
+            self._null_columns = {
+                column
+                for column in self._null_columns
+                if row[column] is None or row[column] == ""
+            }
 
     def _remove_null_columns(self) -> None:
         """Remove the columns that have all None items from the report_data."""
-        for column in reversed(range(0, len(self.labels))):
-            # If all entities have the None attribute value, remove the column from
-            # the report.
-            column_used = False
-            for row in range(0, len(self.data)):
-                if self.data[row][column] not in [None, ""]:
-                    column_used = True
-
-            if not column_used:
-                [row.pop(column) for row in self.data]
-                self.labels.pop(column)
+        if not self._null_columns:
+            return
+
+        columns = [
+            column
+            for column in range(len(self.labels))
+            if column not in self._null_columns
+        ]
+        self.labels = [self.labels[column] for column in columns]
+        self.data = [[row[column] for column in columns] for row in self.data]
+        self._null_columns = set()
 
     def add(self, data: List[str]) -> None:
         """Add a row of data to the report."""
         self.data.append(data)
-
-    def print(self) -> None:
-        """Print the report."""
-        self._remove_null_columns()
+        self._update_null_columns(data)
+
+    @timed
+    def print(
+        self, chunk_size: int = 1000, pages: Iterable[List[List[str]]] = ()
+    ) -> None:
+        """Print the report.
+
+        The reports longer than chunk_size rows are streamed: they're printed in
+        tables of chunk_size rows that share the column widths of the first one, so
+        the first lines are shown before the rest of the rows are rendered. If the
+        reader of the output, like head or a pager, is closed, the printing stops.
+
+        The rows of the pages are printed after the data of the report as they're
+        read, so they don't need to be in memory at the same time. As the columns
+        of those rows are not known in advance, the null columns are only removed
+        if there are no pages to print.
+
+        Args:
+            chunk_size: Number of rows to render at once.
+            pages: Rows to print after the data of the report.
+        """
+        # rich is imported here as it's slow to load, and most commands don't print
+        # reports.
+        from rich.console import Console  # noqa: C0415
+
+        pages = iter(pages)
+        next_page: List[List[str]] = next(pages, [])
+        if len(next_page) == 0:
+            self._remove_null_columns()
 
         if len(self.data) == 0:
             raise EntityNotFoundError("The report doesn't have any data to print")
 
+        console = Console()
+        if len(self.data) <= chunk_size and len(next_page) == 0:
+            console.print(self._build_table(self.data))
+            return
+
+        from rich.segment import Segment, Segments  # noqa: C0415
+
+        chunks = (
+            rows[start : start + chunk_size]
+            for rows in itertools.chain([self.data, next_page], pages)
+            for start in range(0, len(rows), chunk_size)
+        )
+        chunk = next(chunks)
+        widths = self._column_widths(chunk)
+        first_row = 0
+        try:
+            while len(chunk) > 0:
+                next_chunk: List[List[str]] = next(chunks, [])
+                last_chunk = len(next_chunk) == 0
+                table = self._build_table(chunk, widths=widths, first_row=first_row)
+                table.show_header = first_row == 0
+                table.show_footer = last_chunk and first_row + len(chunk) > 60
+                # The tables are joined as one, so only the first has the top edge
+                # and only the last the bottom one.
+                lines = list(Segment.split_lines(console.render(table)))
+                if first_row > 0:
+                    lines = lines[1:]
+                if not last_chunk:
+                    lines = lines[:-1]
+                console.print(
+                    Segments(
+                        segment for line in lines for segment in [*line, Segment.line()]
+                    )
+                )
+                first_row += len(chunk)
+                chunk = next_chunk
+        except BrokenPipeError:
+            # Send the writes left, like the flush at exit, to /dev/null.
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+
+    def _build_table(
+        self,
+        rows: List[List[str]],
+        widths: Optional[List[int]] = None,
+        first_row: int = 0,
+    ) -> "Table":
+        """Create the rich table of some rows of the report.
+
+        Args:
+            rows: Rows of the report to add to the table.
+            widths: Fixed width of each column. If None, rich calculates them from
+                the content.
+            first_row: Position of the first row in the report, to keep the
+                alternation of the row styles between tables.
+        """
+        from rich import box  # noqa: C0415
+        from rich.style import Style  # noqa: C0415
+        from rich.table import Table  # noqa: C0415
+
+        row_styles = [
+            Style(color=self.colors.foreground_1, bgcolor=self.colors.background_1),
+            Style(color=self.colors.foreground_1, bgcolor=self.colors.background_2),
+        ]
+        if first_row % 2 == 1:
+            row_styles.reverse()
+
         table = Table(
             box=box.SIMPLE,
             header_style=Style(color=self.colors.violet),
             footer_style=Style(color=self.colors.violet),
             style=Style(color=self.colors.background_1),
             border_style=Style(color=self.colors.background_1),
-            row_styles=[
-                Style(color=self.colors.foreground_1, bgcolor=self.colors.background_1),
-                Style(color=self.colors.foreground_1, bgcolor=self.colors.background_2),
-            ],
+            row_styles=row_styles,
         )
         if len(self.data) > 60:
             table.show_footer = True
 
-        for label in self.labels:
-            table.add_column(label, footer=label)
+        for column, label in enumerate(self.labels):
+            if widths is None:
+                table.add_column(label, footer=label)
+            else:
+                table.add_column(label, footer=label, width=widths[column])
 
-        for row in self.data:
+        for row in rows:
             row = [str(element) for element in row]
             table.add_row(*row)
 
-        console = Console()
-        console.print(table)
+        return table
+
+    def _column_widths(self, rows: List[List[str]]) -> List[int]:
+        """Return the width of the longest element of each column, label included.
+
+        Args:
+            rows: Sample of rows of the report, like the first chunk. The longer
+                elements of the rest of the rows are truncated.
+        """
+        from rich.cells import cell_len  # noqa: C0415
+
+        return [
+            max([cell_len(label)] + [cell_len(str(row[column])) for row in rows])
+            for column, label in enumerate(self.labels)
+        ]
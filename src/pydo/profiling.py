@@ -0,0 +1,215 @@
+"""Measure where the commands spend their time.
+
+The program code marks its phases, like loading the repository, selecting the tasks
+or printing the report, with `phase` and `timed`. They do nothing unless a profiler
+is running, which is started by the `--profile` option of the command line.
+"""
+
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from pydantic import BaseModel  # noqa: E0611
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+class Phase(BaseModel):
+    """Define the time spent in a phase of a command.
+
+    Attributes:
+        name: Name of the phase.
+        depth: Number of phases that contain this one.
+        start: Seconds since the profiler started when the phase started.
+        end: Seconds since the profiler started when the phase ended.
+    """
+
+    name: str
+    depth: int
+    start: float
+    end: float = 0
+
+    @property
+    def duration(self) -> float:
+        """Return the seconds spent in the phase."""
+        return self.end - self.start
+
+
+class Profiler:
+    """Record the phases of a command and optionally a cProfile of its functions.
+
+    Args:
+        output_path: File to save the profile to. If it ends with `.json` it's saved
+            as a speedscope trace of the phases, otherwise as the pstats of cProfile.
+    """
+
+    def __init__(self, output_path: Optional[str] = None) -> None:
+        """Configure the attributes."""
+        self.output_path = output_path
+        self.phases: List[Phase] = []
+        self._open: List[Phase] = []
+        # Open and close events of the phases, in the order they happen.
+        self._events: List[Tuple[str, Phase]] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+        if output_path is not None and not output_path.endswith(".json"):
+            self._cprofile = cProfile.Profile()
+        self._start = 0.0
+        self.total = 0.0
+
+    def start(self) -> None:
+        """Start measuring the command."""
+        self._start = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        """Stop measuring the command and save the profile if it was asked for."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.total = time.perf_counter() - self._start
+        # Phases left open by an exception end with the command.
+        while self._open:
+            self._close(self._open[-1], self.total)
+
+        if self.output_path is None:
+            return
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.output_path)
+        else:
+            with open(self.output_path, "w") as file_descriptor:
+                json.dump(self.speedscope(), file_descriptor)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the time spent in the code of the with block."""
+        phase = Phase(
+            name=name, depth=len(self._open), start=time.perf_counter() - self._start
+        )
+        self.phases.append(phase)
+        self._open.append(phase)
+        self._events.append(("O", phase))
+        try:
+            yield
+        finally:
+            if any(open_phase is phase for open_phase in self._open):
+                self._close(phase, time.perf_counter() - self._start)
+
+    def _close(self, phase: Phase, end: float) -> None:
+        """Close a phase and the ones opened inside it."""
+        while self._open:
+            open_phase = self._open.pop()
+            open_phase.end = end
+            self._events.append(("C", open_phase))
+            if open_phase is phase:
+                return
+
+    def breakdown(self) -> str:
+        """Return the time spent in each phase, indenting the nested ones."""
+        width = max([len(phase.name) + 2 * phase.depth for phase in self.phases] + [5])
+        lines = [f"{'Phase':<{width}}  {'Time (ms)':>10}  {'%':>5}"]
+        for phase in self.phases:
+            name = "  " * phase.depth + phase.name
+            lines.append(
+                f"{name:<{width}}  {phase.duration * 1000:>10.2f}  "
+                f"{_percent(phase.duration, self.total):>5.1f}"
+            )
+        lines.append(f"{'total':<{width}}  {self.total * 1000:>10.2f}  {100:>5.1f}")
+        return "\n".join(lines)
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Return the phases in the evented format of speedscope.
+
+        See https://www.speedscope.app/file-format-schema.json
+        """
+        frames: Dict[str, int] = {}
+        events = []
+        for event_type, phase in self._events:
+            frame = frames.setdefault(phase.name, len(frames))
+            at = phase.start if event_type == "O" else phase.end
+            events.append({"type": event_type, "frame": frame, "at": at * 1000})
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "pydo",
+            "name": "pydo",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [
+                {
+                    "type": "evented",
+                    "name": "pydo",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": self.total * 1000,
+                    "events": events,
+                }
+            ],
+        }
+
+
+def _percent(duration: float, total: float) -> float:
+    """Return the percentage of the total time spent in a duration."""
+    if total == 0:
+        return 0
+    return 100 * duration / total
+
+
+# Profiler of the running command, if any.
+_profiler: Optional[Profiler] = None
+
+
+def start(output_path: Optional[str] = None) -> Profiler:
+    """Start measuring the phases of a command.
+
+    Args:
+        output_path: File to save the profile to, see Profiler.
+    """
+    global _profiler  # noqa: W0603, there is only one command running at a time.
+    _profiler = Profiler(output_path)
+    _profiler.start()
+    return _profiler
+
+
+def stop() -> Optional[Profiler]:
+    """Stop measuring the running command and return its profiler."""
+    global _profiler  # noqa: W0603
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Measure the time spent in the code of the with block, if profiling."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.phase(name):
+        yield
+
+
+def timed(function: Function) -> Function:
+    """Measure the time spent in a function, if profiling."""
+    name = f"{function.__module__.split('.')[-1]}.{function.__qualname__}"
+
+    @wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _profiler is None:
+            return function(*args, **kwargs)
+        with _profiler.phase(name):
+            return function(*args, **kwargs)
+
+    return cast(Function, wrapper)
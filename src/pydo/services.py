@@ -7,46 +7,182 @@ and handlers to achieve the program's purpose.
 import datetime
 import logging
 from contextlib import suppress
-from typing import List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Type, Union
 
 from repository_orm import EntityNotFoundError, Repository
 
-from .model import RecurrentTask, Task, TaskChanges, TaskSelector, TaskState, TaskType
+from .adapters import get_entities
+from .model import (
+    EntityType,
+    RecurrentTask,
+    Task,
+    TaskAttrs,
+    TaskChanges,
+    TaskCounters,
+    TaskSelector,
+    TaskState,
+    TaskType,
+)
 from .model.date import convert_date
+from .profiling import phase, timed
 
 log = logging.getLogger(__name__)
 
 
+@timed
 def add_task(repo: Repository, change: TaskChanges) -> Union[RecurrentTask, Task]:
     """Create a new task.
 
     If it's a RecurrentTask, it returns the parent.
     """
-    task: Optional[TaskType] = None
+    counters = get_counters(repo)
+    task = repo.add(_task_from_changes(change))
+    counters.add(task)
 
-    if len(change.tags_to_add) > 0:
-        change.task_attributes["tags"] = change.tags_to_add
-
-    if change.task_attributes.get("recurrence_type", None) in [
-        "recurring",
-        "repeating",
-    ]:
-        task = repo.add(RecurrentTask(**change.task_attributes))
+    if isinstance(task, RecurrentTask):
         child_task = repo.add(task.breed_children())
+        counters.add(child_task)
 
         log.info(
             f"Added {task.recurrence_type} task {task.id_}:" f" {task.description}"
         )
         log.info(f"Added first child task with id {child_task.id_}")
     else:
-        task = repo.add(Task(**change.task_attributes))
         log.info(f"Added task {task.id_}: {task.description}")
 
-    repo.commit()
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
 
     return task
 
 
+@timed
+def add_tasks(repo: Repository, changes: Iterable[TaskChanges]) -> List[TaskType]:
+    """Create many tasks and commit them at once.
+
+    The ids are assigned from the last id of each model in the repository, instead
+    of asking the repository for the next one on each addition.
+
+    Args:
+        repo: Repository to store the tasks.
+        changes: Attributes of each new task.
+
+    Returns:
+        The added tasks. For the RecurrentTasks it returns the parent, and their
+            first child is added too.
+    """
+    next_ids: Dict[Type[TaskType], int] = {}
+    tasks: List[TaskType] = []
+    counters = get_counters(repo)
+
+    for change in changes:
+        task = _task_from_changes(change)
+        task.id_ = _next_task_id(repo, type(task), next_ids)
+        repo.add(task)
+        counters.add(task)
+        if isinstance(task, RecurrentTask):
+            child_task = task.breed_children()
+            child_task.id_ = _next_task_id(repo, Task, next_ids)
+            repo.add(child_task)
+            counters.add(child_task)
+        tasks.append(task)
+
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
+    log.info(f"Added {len(tasks)} tasks")
+
+    return tasks
+
+
+def _task_from_changes(change: TaskChanges) -> TaskType:
+    """Create the task defined by the changes of a new task."""
+    if len(change.tags_to_add) > 0:
+        change.task_attributes["tags"] = change.tags_to_add
+
+    if change.task_attributes.get("recurrence_type", None) in [
+        "recurring",
+        "repeating",
+    ]:
+        return RecurrentTask(**change.task_attributes)
+    return Task(**change.task_attributes)
+
+
+def _next_task_id(
+    repo: Repository, model: Type[TaskType], next_ids: Dict[Type[TaskType], int]
+) -> int:
+    """Return the next free id of a model, reading the last one only once.
+
+    Args:
+        repo: Repository where the tasks are stored.
+        model: Task model of the new task.
+        next_ids: Next free id of each model, it's updated with the returned id.
+    """
+    if model not in next_ids:
+        try:
+            next_ids[model] = int(repo.last(model).id_) + 1
+        except EntityNotFoundError:
+            next_ids[model] = 0
+
+    id_ = next_ids[model]
+    next_ids[model] += 1
+    return id_
+
+
+@timed
+def migrate_tasks(source: Repository, destination: Repository) -> None:
+    """Copy all the tasks of a repository into another keeping their ids.
+
+    Args:
+        source: Repository to read the tasks from.
+        destination: Repository to write the tasks to.
+    """
+    tasks = source.all([Task, RecurrentTask])
+    for task in tasks:
+        destination.add(task)
+    destination.add(TaskCounters.from_tasks(tasks))
+    with phase("commit"):
+        destination.commit()
+
+    log.info(f"Migrated {len(tasks)} tasks")
+
+
+@timed
+def get_counters(repo: Repository) -> TaskCounters:
+    """Return the counters of the open tasks of each area and tag.
+
+    If the repository doesn't have them yet, they're counted from the open tasks.
+    """
+    try:
+        return repo.get(0, [TaskCounters])
+    except EntityNotFoundError:
+        return _count_open_tasks(repo)
+
+
+@timed
+def rebuild_counters(repo: Repository) -> None:
+    """Count again the open tasks of each area and tag and store the counters."""
+    counters = _count_open_tasks(repo)
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
+
+    log.info(
+        f"Counted the open tasks of {len(counters.areas)} areas and "
+        f"{len(counters.tags)} tags"
+    )
+
+
+def _count_open_tasks(repo: Repository) -> TaskCounters:
+    """Count the open tasks of each area and tag reading all of them."""
+    try:
+        return TaskCounters.from_tasks(repo.search({"active": True}, [Task]))
+    except EntityNotFoundError:
+        return TaskCounters()
+
+
+@timed
 def do_tasks(
     repo: Repository,
     selector: TaskSelector,
@@ -64,6 +200,7 @@ def do_tasks(
     _close_tasks(repo, selector, TaskState.DONE, complete_date_str, delete_parent)
 
 
+@timed
 def rm_tasks(
     repo: Repository,
     selector: TaskSelector,
@@ -90,52 +227,95 @@ def _close_tasks(
 ) -> None:
     """Close a list of tasks based on a task filter.
 
-    It gathers the common actions required to complete or delete tasks.
+    It gathers the common actions required to complete or delete tasks. The close
+    date is parsed once, and the parents of the closed children are fetched with a
+    single lookup of their ids, so the cost grows only with the number of tasks.
     """
     selector.task_filter["active"] = True
     tasks = _tasks_from_selector(repo, selector)
+    close_date = convert_date(close_date_str)
+    counters = get_counters(repo)
+
+    parent_ids = [task.parent_id for task in tasks if task.parent_id is not None]
+    parents = {
+        parent.id_: parent
+        for parent in _tasks_from_ids(repo, parent_ids, RecurrentTask)
+    }
 
     for task in tasks:
-        _close_task(repo, task, state, close_date_str, delete_parent)
+        parent_task = None if task.parent_id is None else parents[task.parent_id]
+        _close_task(repo, task, state, close_date, delete_parent, parent_task, counters)
 
-    repo.commit()
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
 
 
+@timed
 def _tasks_from_selector(repo: Repository, selector: TaskSelector) -> List[TaskType]:
-    """Return the tasks that match the criteria of the task selector."""
-    tasks: List[TaskType] = [
-        repo.get(task_id, [selector.model]) for task_id in selector.task_ids
-    ]
+    """Return the tasks that match the criteria of the task selector.
 
-    if selector.task_filter != {}:
-        # Remove the tasks that don't meet the task_filter
-        for task in tasks:
-            # Check if the task_filter is not a subset of the properties of the task.
-            # SIM205: Use 'selector.task_filter.items() > task.dict().items()' instead
-            # No can't do, if we do, the subset checking doesn't work
-            if not selector.task_filter.items() <= task.dict().items():  # noqa: SIM205
-                tasks.remove(task)
+    If the selector has task ids, their tasks are fetched by id and the ones that
+    don't meet the task filter are discarded. Otherwise the tasks are searched in
+    the repository with the task filter.
+    """
+    if len(selector.task_ids) > 0:
+        return [
+            task
+            for task in _tasks_from_ids(repo, selector.task_ids, selector.model)
+            if _task_meets_filter(task, selector.task_filter)
+        ]
 
+    if selector.task_filter != {}:
         with suppress(EntityNotFoundError):
-            tasks.extend(repo.search(selector.task_filter, [selector.model]))
+            return repo.search(selector.task_filter, [selector.model])
+
+    return []
+
+
+def _tasks_from_ids(
+    repo: Repository, task_ids: List[int], model: Type[EntityType]
+) -> List[EntityType]:
+    """Return the tasks of a list of ids in the order they were requested.
+
+    Duplicated ids are returned once, and all the tasks are fetched in a single
+    lookup of the repository ids.
+
+    Raises:
+        EntityNotFoundError: If any of the ids is not in the repository.
+    """
+    return get_entities(repo, list(task_ids), [model])
 
-    # Remove duplicates
-    return list(set(tasks))
+
+def _task_meets_filter(task: TaskType, task_filter: TaskAttrs) -> bool:
+    """Check if the task attributes have the values of the task filter."""
+    return all(
+        attribute in task.__fields__ and getattr(task, attribute) == value
+        for attribute, value in task_filter.items()
+    )
 
 
 def _close_task(
     repo: Repository,
     task: Task,
     state: TaskState,
-    close_date_str: str = "now",
+    close_date: Optional[datetime.datetime] = None,
     delete_parent: bool = False,
+    parent_task: Optional[RecurrentTask] = None,
+    counters: Optional[TaskCounters] = None,
 ) -> None:
     """Close a task.
 
     It gathers the common actions required to complete or delete tasks.
-    """
-    close_date = convert_date(close_date_str)
 
+    Args:
+        close_date: Date to register as the close date, if None it will use now.
+        parent_task: Parent of the task if it's already fetched from the repository.
+        counters: Counters of the open tasks to update, the caller stores them.
+    """
+    if counters is None:
+        counters = TaskCounters()
+    counters.remove(task)
     task.close(state, close_date)
 
     repo.add(task)
@@ -145,7 +325,8 @@ def _close_task(
         log.info(
             f"Closing child task {task.id_}: {task.description} with state {state}"
         )
-        parent_task = repo.get(task.parent_id, [Task, RecurrentTask])
+        if parent_task is None:
+            parent_task = repo.get(task.parent_id, [RecurrentTask])
         # If we want to close the parent of the task.
         if delete_parent:
             parent_task.close(state, close_date)
@@ -154,10 +335,11 @@ def _close_task(
                 f"Closing parent task {parent_task.id_}: {parent_task.description} with"
                 f" state {state}"
             )
-        # If it's a child task of a recurrent one, we need to spawn the next child.
-        elif isinstance(parent_task, RecurrentTask):
+        # As it's a child task of a recurrent one, we need to spawn the next child.
+        else:
             new_child_task = parent_task.breed_children(task)
             repo.add(new_child_task)
+            counters.add(new_child_task)
             log.info(
                 f"Added child task {new_child_task.id_}: {new_child_task.description}",
             )
@@ -168,6 +350,7 @@ def _close_task(
             log.info(f"Task {task.id_} doesn't have a parent")
 
 
+@timed
 def modify_tasks(
     repo: Repository,
     selector: TaskSelector,
@@ -184,6 +367,7 @@ def modify_tasks(
         task_type = "recurrent task"
 
     tasks = _tasks_from_selector(repo, selector)
+    counters = get_counters(repo)
 
     for task in tasks:
         original_task = task.copy(deep=True)
@@ -202,6 +386,8 @@ def modify_tasks(
         if task != original_task:
             task.modified = datetime.datetime.now()
             repo.add(task)
+            counters.remove(original_task)
+            counters.add(task)
             log.info(f"Modified {task_type} {task.id_}.")
 
         if modify_parent:
@@ -214,15 +400,19 @@ def modify_tasks(
                     )
             else:
                 log.warning(f"Task {task.id_} doesn't have a parent task.")
-    repo.commit()
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
 
 
+@timed
 def freeze_tasks(
     repo: Repository,
     selector: TaskSelector,
 ) -> None:
     """Freeze a list of tasks based on a task filter."""
     tasks = _tasks_from_selector(repo, selector)
+    counters = get_counters(repo)
     for task in tasks:
         if type(task) == Task:
             child_task = task
@@ -246,13 +436,17 @@ def freeze_tasks(
         parent_task.freeze()
         repo.add(parent_task)
         repo.delete(child_task)
+        counters.remove(child_task)
         log.info(
             f"Frozen recurrent task {parent_task.id_}: {parent_task.description} and "
             f"deleted it's last child {child_task.id_}"
         )
-    repo.commit()
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
 
 
+@timed
 def thaw_tasks(
     repo: Repository, selector: TaskSelector, state: Optional[TaskState] = None
 ) -> None:
@@ -268,6 +462,8 @@ def thaw_tasks(
     if len(tasks) == 0:
         raise EntityNotFoundError("No frozen tasks were found with that criteria")
 
+    counters = get_counters(repo)
+
     for task in tasks:
         if type(task) == RecurrentTask:
             task.thaw(state)
@@ -284,9 +480,12 @@ def thaw_tasks(
                 last_child = children[-1]
 
             child_task = repo.add(task.breed_children(last_child))
+            counters.add(child_task)
 
             log.info(
                 f"Thawed task {task.id_}: {task.description}, and created it's next "
                 f"child task with id {child_task.id_}"
             )
-    repo.commit()
+    repo.add(counters)
+    with phase("commit"):
+        repo.commit()
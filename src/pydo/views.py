@@ -1,76 +1,265 @@
 """Store the representations of the data."""
 
-import re
+from collections import OrderedDict
 from contextlib import suppress
 from datetime import datetime
 from enum import Enum
-from operator import attrgetter
-from typing import Dict, List, Optional, Tuple, TypeVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TypeVar
 
-from repository_orm import Repository
+from repository_orm import EntityNotFoundError, Repository
 
 from . import config
+from .adapters import EntityQuery, Row, parse_sort, query_entities, sort_key
 from .exceptions import ConfigError
-from .model.task import RecurrentTask, Task, TaskAttrs, TaskSelector
+from .model.task import RecurrentTask, Task, TaskAttrs, TaskSelector, TaskType
 from .model.views import Colors, Report
+from .profiling import timed
+from .services import get_counters
 
 EntityType = TypeVar("EntityType", Task, RecurrentTask)
 
 
+@timed
 def print_task_report(
     repo: Repository,
     config: config.Config,
     report_name: str,
     task_selector: Optional[TaskSelector] = None,
 ) -> None:
-    """Gather the common tasks required to print several tasks."""
-    if task_selector is None:
-        task_selector = TaskSelector()
+    """Gather the common tasks required to print several tasks.
 
-    # Initialize the Report
-    (
-        columns,
-        labels,
-        default_task_filter,
-        sort_criteria,
-    ) = _get_task_report_configuration(config, report_name)
+    The rows are read from the repository and printed by pages, so the size of the
+    report doesn't change the memory used to print it.
+    """
     colors = Colors(**config.data["themes"][config.get("theme")])
+    # Each page runs the query of the report again, so they're bigger than the
+    # chunks of printed rows.
+    window = ReportWindow(
+        repo, config, report_name, task_selector, page_size=5000, cached_pages=1
+    )
+    pages = window.pages()
+    report = Report(labels=window.labels, colors=colors, data=next(pages, []))
+
+    report.print(pages=pages)
+
+
+@timed
+def report_tasks(
+    repo: Repository,
+    config: config.Config,
+    report_name: str,
+    task_selector: Optional[TaskSelector] = None,
+) -> List[TaskType]:
+    """Return the tasks of a report.
+
+    The filter, sorting and limit of the report are run by the repository.
+
+    Args:
+        repo: Repository where the tasks are stored.
+        config: Program configuration.
+        report_name: Name of the report in the configuration.
+        task_selector: Selection of tasks that complements the report configuration.
+
+    Raises:
+        EntityNotFoundError: If there are no tasks that match the report.
+    """
+    return query_entities(repo, report_query(config, report_name, task_selector))
+
+
+def report_query(
+    config: config.Config,
+    report_name: str,
+    task_selector: Optional[TaskSelector] = None,
+) -> EntityQuery:
+    """Build the repository query of the tasks of a report.
+
+    Args:
+        config: Program configuration.
+        report_name: Name of the report in the configuration.
+        task_selector: Selection of tasks that complements the report configuration.
+    """
+    if task_selector is None:
+        task_selector = TaskSelector()
 
-    report = Report(labels=labels, colors=colors)
+    _, _, default_task_filter, sort_criteria = _get_task_report_configuration(
+        config, report_name
+    )
 
     # Complete the task_selector with the report task_filter
     task_selector.task_filter.update(default_task_filter)
 
-    # Change the sorting of the report with the values of the task selector
+    # Change the sorting and limit of the report with the values of the task selector
     if task_selector.sort != []:
         sort_criteria = task_selector.sort
+    if task_selector.limit is None:
+        task_selector.limit = _get_report_limit(config, report_name)
 
     with suppress(KeyError):
         if task_selector.task_filter["type"] == "recurrent_task":
             task_selector.model = RecurrentTask
         task_selector.task_filter.pop("type")
 
-    # Fill up the report with the selected tasks
-    tasks = repo.search(task_selector.task_filter, [task_selector.model])
-    for task in sort_tasks(tasks, sort_criteria):
-        entity_line = []
-        for attribute in columns:
-            value = getattr(task, attribute)
-            if isinstance(value, list):
-                value = ", ".join(value)
-            elif isinstance(value, datetime):
-                value = _date2str(config, value)
-            elif isinstance(value, Enum):
-                value = value.value.title()
-            elif value is None:
-                value = ""
-
-            entity_line.append(value)
-        report.add(entity_line)
-
-    # Clean up the report and print it
-    report._remove_null_columns()
-    report.print()
+    return EntityQuery(
+        fields=task_selector.task_filter,
+        models=[task_selector.model],
+        sort=sort_criteria,
+        limit=task_selector.limit,
+    )
+
+
+class ReportWindow:
+    """Give the formatted rows of a report by slices, reading them by pages.
+
+    Only the last used pages are kept in memory, so the terminal user interface can
+    scroll big reports reading only the rows around the visible ones.
+
+    Args:
+        repo: Repository where the tasks are stored.
+        config: Program configuration.
+        report_name: Name of the report in the configuration.
+        task_selector: Selection of tasks that complements the report configuration.
+        page_size: Number of rows read from the repository at once.
+        cached_pages: Maximum number of pages kept in memory.
+
+    Attributes:
+        labels: Labels of the report columns.
+        length: Number of rows of the report, None until the last page is read.
+    """
+
+    def __init__(
+        self,
+        repo: Repository,
+        config: config.Config,
+        report_name: str,
+        task_selector: Optional[TaskSelector] = None,
+        page_size: int = 200,
+        cached_pages: int = 3,
+    ) -> None:
+        """Configure the attributes."""
+        self.repo = repo
+        self.config = config
+        self.columns, self.labels, _, _ = _get_task_report_configuration(
+            config, report_name
+        )
+        self.query = report_query(config, report_name, task_selector)
+        self.query.columns = self.columns
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.length: Optional[int] = None
+        self._pages: "OrderedDict[int, List[List[str]]]" = OrderedDict()
+
+    def rows(self, start: int, count: int) -> List[List[str]]:
+        """Return the formatted rows of a slice of the report.
+
+        Args:
+            start: Index of the first row.
+            count: Number of rows, less are returned at the end of the report.
+        """
+        if count <= 0:
+            return []
+        first_page = start // self.page_size
+        last_page = (start + count - 1) // self.page_size
+
+        rows: List[List[str]] = []
+        for page in range(first_page, last_page + 1):
+            rows.extend(self._page(page))
+        offset = start - first_page * self.page_size
+
+        return rows[offset : offset + count]
+
+    def pages(self) -> Iterator[List[List[str]]]:
+        """Yield the formatted rows of the report page by page, reading them lazily.
+
+        Raises:
+            EntityNotFoundError: If there are no tasks that match the report.
+        """
+        query = self.page_query(0)
+        if query is not None and 0 not in self._pages:
+            # Unlike the rest of the pages, an empty first page is an error.
+            self.add_page(0, query_entities(self.repo, query))
+
+        page = 0
+        while not self._is_past_the_end(page):
+            rows = self._page(page)
+            if len(rows) == 0:
+                return
+            yield rows
+            page += 1
+
+    def missing_pages(self, start: int, count: int) -> List[int]:
+        """Return the pages of a slice of the report that are not in memory.
+
+        Args:
+            start: Index of the first row.
+            count: Number of rows.
+        """
+        if count <= 0:
+            return []
+        return [
+            page
+            for page in range(
+                start // self.page_size, (start + count - 1) // self.page_size + 1
+            )
+            if page not in self._pages and not self._is_past_the_end(page)
+        ]
+
+    def page_query(self, page: int) -> Optional[EntityQuery]:
+        """Return the query of the rows of a page, None if it's past the report end."""
+        if self._is_past_the_end(page):
+            return None
+        offset = page * self.page_size
+        limit = self.page_size
+        if self.query.limit is not None:
+            limit = min(limit, self.query.limit - offset)
+        if limit <= 0:
+            return None
+        return self.query.copy(update={"offset": offset, "limit": limit})
+
+    def add_page(self, page: int, rows: List[Row]) -> List[List[str]]:
+        """Format the rows of a page read from the repository and keep them in memory.
+
+        Args:
+            page: Index of the page.
+            rows: Rows returned by the query of the page.
+
+        Returns:
+            The formatted rows of the page.
+        """
+        offset = page * self.page_size
+        # A page after the last one is empty too, so it can't tell the length.
+        if len(rows) < self.page_size and (len(rows) > 0 or page == 0):
+            self.length = offset + len(rows)
+
+        formatted_columns = [
+            _format_column(self.config, [getattr(row, attribute) for row in rows])
+            for attribute in self.columns
+        ]
+        self._pages[page] = [list(row) for row in zip(*formatted_columns)]
+        self._pages.move_to_end(page)
+        if len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+
+        return self._pages[page]
+
+    def _page(self, page: int) -> List[List[str]]:
+        """Return the formatted rows of a page, reading it if it's not in memory."""
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        if self._is_past_the_end(page):
+            return []
+
+        query = self.page_query(page)
+        rows: List[Row] = []
+        if query is not None:
+            with suppress(EntityNotFoundError):
+                rows = query_entities(self.repo, query)
+
+        return self.add_page(page, rows)
+
+    def _is_past_the_end(self, page: int) -> bool:
+        """Check if a page starts after the last row of the report."""
+        return self.length is not None and page * self.page_size >= self.length
 
 
 def _get_task_report_configuration(
@@ -108,6 +297,24 @@ def _get_task_report_configuration(
     return columns, labels, default_task_filter, sort
 
 
+def _get_report_limit(config: config.Config, report_name: str) -> Optional[int]:
+    """Retrieve the limit of tasks of a report from the config file.
+
+    Raises:
+        ConfigError: If the limit is not an integer.
+    """
+    key = f"reports.task_reports.{report_name}.limit"
+    try:
+        limit = config.get(key)
+    except ConfigError:
+        return None
+
+    # bool is a subclass of int, but `limit: true` is not a limit.
+    if isinstance(limit, bool) or not isinstance(limit, int):
+        raise ConfigError(f"The configuration {key} is not an integer: {limit}")
+    return limit
+
+
 def sort_tasks(tasks: List[Task], sort_criteria: List[str]) -> List[Task]:
     """Sorts the tasks given the criteria.
 
@@ -115,73 +322,75 @@ def sort_tasks(tasks: List[Task], sort_criteria: List[str]) -> List[Task]:
         tasks: List of tasks to sort
         sort_criteria: An ordered list of task attributes to use for sorting.
             If the attribute is prepended with a + it will be sort in increasing value,
-            if it's prepended with a -, it will be sorted decreasingly.
+            if it's prepended with a -, it will be sorted decreasingly. The tasks
+            without a value in the attribute go last.
+
     Returns:
         List of ordered tasks
     """
-    for criteria in reversed(sort_criteria):
-        if re.match("^-", criteria):
-            reverse = True
-            criteria = criteria[1:]
-        elif re.match(r"^\+", criteria):
-            reverse = False
-            criteria = criteria[1:]
-        else:
-            reverse = False
-
-        tasks.sort(key=attrgetter(criteria), reverse=reverse)
+    tasks.sort(key=sort_key(parse_sort(sort_criteria)))
     return tasks
 
 
-def _date2str(config: config.Config, date: datetime) -> str:
-    """Convert a datetime object into a string.
+def _format_column(config: config.Config, values: List[Any]) -> List[str]:
+    """Convert the values of a report column into strings.
 
-    Using the format specified in the reports.date_format configuration.
-    """
-    date_format = str(config.get("reports.date_format"))
+    All the values of a column have the same type, so the formatter is chosen once
+    with the first value that is not None. The dates and enums are formatted once
+    per distinct value.
 
-    return date.strftime(date_format)
+    Args:
+        config: Program configuration.
+        values: Task attribute values of the column.
+
+    Returns:
+        List of formatted values, with an empty string for the None values.
+    """
+    sample = next((value for value in values if value is not None), None)
+    if sample is None:
+        return [""] * len(values)
+
+    if isinstance(sample, list):
+        return ["" if value is None else ", ".join(value) for value in values]
+
+    formatted: Dict[Any, str]
+    if isinstance(sample, datetime):
+        date_format = str(config.get("reports.date_format"))
+        formatted = {
+            date: date.strftime(date_format) for date in set(values) if date is not None
+        }
+    elif isinstance(sample, Enum):
+        formatted = {
+            value: value.value.title() for value in set(values) if value is not None
+        }
+    else:
+        return ["" if value is None else str(value) for value in values]
+
+    formatted[None] = ""
+    return [formatted[value] for value in values]
 
 
 def areas(repo: Repository) -> None:
     """Print the areas information."""
-    report = Report(labels=["Name", "Open Tasks"])
-    open_tasks = repo.search({"active": True}, [Task])
-
-    # Gather areas
-    areas: Dict[str, int] = {}
-    for task in open_tasks:
-        if task.area is None:
-            area = "None"
-        else:
-            area = task.area
+    _print_counts(get_counters(repo).areas)
 
-        areas.setdefault(area, 0)
-        areas[area] += 1
 
-    for area in sorted(areas.keys()):
-        report.add([area, str(areas[area])])
+def tags(repo: Repository) -> None:
+    """Print the tags information."""
+    _print_counts(get_counters(repo).tags)
 
-    report.print()
 
+def _print_counts(counts: Dict[str, int]) -> None:
+    """Print the number of open tasks of each area or tag.
 
-def tags(repo: Repository) -> None:
-    """Print the tags information."""
+    Raises:
+        EntityNotFoundError: If there are no open tasks.
+    """
+    if len(counts) == 0:
+        raise EntityNotFoundError("There are no open tasks")
     report = Report(labels=["Name", "Open Tasks"])
-    open_tasks = repo.search({"active": True}, [Task])
-
-    # Gather tags
-    tags: Dict[str, int] = {}
-    for task in open_tasks:
-        if len(task.tags) == 0:
-            tags.setdefault("None", 0)
-            tags["None"] += 1
-        else:
-            for tag in task.tags:
-                tags.setdefault(tag, 0)
-                tags[tag] += 1
-
-    for tag in sorted(tags.keys()):
-        report.add([tag, str(tags[tag])])
+
+    for name in sorted(counts.keys()):
+        report.add([name, str(counts[name])])
 
     report.print()
@@ -1,6 +1,8 @@
 """Test the command line interface."""
 
+import json
 import logging
+import pstats
 import re
 import shutil
 from datetime import datetime
@@ -13,9 +15,10 @@ from faker import Faker
 from py._path.local import LocalPath
 from repository_orm import Repository
 
+from pydo.adapters import SQLiteRepository
 from pydo.config import Config
 from pydo.entrypoints.cli import cli
-from pydo.model.task import RecurrentTask, Task, TaskState
+from pydo.model.task import RecurrentTask, Task, TaskCounters, TaskState
 from pydo.version import __version__
 
 from ..factories import RecurrentTaskFactory, TaskFactory
@@ -43,6 +46,64 @@ class TestCli:
             result.stdout,
         )
 
+    def test_null_doesnt_load_the_configuration(
+        self, runner: CliRunner, tmpdir: LocalPath
+    ) -> None:
+        """
+        Given: A wrong config file.
+        When: Running a command that doesn't use the configuration.
+        Then: The configuration is not loaded, so no error is returned.
+        """
+        config_file = tmpdir.join("config.yaml")  # type: ignore
+        config_file.write("[ invalid yaml")
+
+        result = runner.invoke(cli, ["-c", str(config_file), "null"])
+
+        assert result.exit_code == 0
+
+    def test_profile_prints_the_time_of_each_phase(
+        self, runner: CliRunner, insert_tasks_e2e: List[Task]
+    ) -> None:
+        """
+        Given: A repository with tasks
+        When: Completing a task with the profile flag
+        Then: The time spent in each phase is printed to stderr, nesting the phases
+            inside the service.
+        """
+        result = runner.invoke(cli, ["--profile", "do", str(insert_tasks_e2e[0].id_)])
+
+        assert result.exit_code == 0
+        assert re.search(r"utils.get_repo +\d+\.\d+", result.stderr)
+        assert re.search(r"\n  services._tasks_from_selector +\d+", result.stderr)
+        assert re.search(r"\n  commit +\d+", result.stderr)
+        assert re.search(r"\ntotal +\d+\.\d+ +100\.0", result.stderr)
+
+    @pytest.mark.parametrize("file_name", ["profile.json", "profile.pstats"])
+    def test_profile_output_saves_the_profile(
+        self, runner: CliRunner, tmpdir: LocalPath, file_name: str
+    ) -> None:
+        """
+        Given: Nothing
+        When: Adding a task with the profile output option
+        Then: The profile is saved as a speedscope trace or as a cProfile pstats file
+        """
+        output_path = str(tmpdir.join(file_name))  # type: ignore
+
+        result = runner.invoke(
+            cli,
+            ["add", "Task"],
+            env={"PYDO_PROFILE_OUTPUT": output_path},
+        )
+
+        assert result.exit_code == 0
+        if file_name.endswith(".json"):
+            with open(output_path, "r") as file_descriptor:
+                trace = json.load(file_descriptor)
+            assert {"name": "services.add_task"} in trace["shared"]["frames"]
+        else:
+            stats = pstats.Stats(output_path)
+            assert any(function[2] == "add_task" for function in stats.stats)
+
     def test_load_config_handles_wrong_file_format(
         self, runner: CliRunner, tmpdir: LocalPath, caplog: LogCaptureFixture
     ) -> None:
@@ -54,7 +115,7 @@ class TestCli:
         config_file = tmpdir.join("config.yaml")  # type: ignore
         config_file.write("[ invalid yaml")
 
-        result = runner.invoke(cli, ["-c", str(config_file), "null"])
+        result = runner.invoke(cli, ["-c", str(config_file), "areas"])
 
         assert result.exit_code == 1
         assert (
@@ -77,7 +138,7 @@ class TestCli:
         shutil.rmtree(tmpdir)
         config_file = tmpdir.join("unexistent_config.yaml")  # type: ignore
 
-        result = runner.invoke(cli, ["-c", str(config_file), "null"])
+        result = runner.invoke(cli, ["-c", str(config_file), "areas"])
 
         assert result.exit_code == 0
         assert (
@@ -101,7 +162,7 @@ class TestCli:
         """
         config_file = tmpdir.join("unexistent_config.yaml")  # type: ignore
 
-        result = runner.invoke(cli, ["-c", str(config_file), "null"])
+        result = runner.invoke(cli, ["-c", str(config_file), "areas"])
 
         assert result.exit_code == 0
         assert (
@@ -193,6 +254,24 @@ class TestAdd:
             "Unable to parse the date string invalid_date, please enter a valid one",
         ) in caplog.record_tuples
 
+    def test_add_rejects_a_limit(
+        self, runner: CliRunner, repo_e2e: Repository, caplog: LogCaptureFixture
+    ) -> None:
+        """
+        Given: Nothing
+        When: adding a new task with a limit argument
+        Then: an error is returned and the task is not added.
+        """
+        result = runner.invoke(cli, ["add", "buy", "milk", "limit:3"])
+
+        assert result.exit_code == 1
+        assert (
+            "pydo.entrypoints.utils",
+            logging.ERROR,
+            "The limit argument can only be used to select the tasks of a report",
+        ) in caplog.record_tuples
+        assert repo_e2e.all([Task]) == []
+
     def test_add_repeating_task(
         self, runner: CliRunner, faker: Faker, caplog: LogCaptureFixture
     ) -> None:
@@ -233,6 +312,85 @@ class TestAdd:
         assert re.search("field required", caplog.records[0].msg)
 
 
+class TestImport:
+    """Test the import of many tasks."""
+
+    def test_import_adds_the_tasks_of_the_standard_input(
+        self, runner: CliRunner, repo_e2e: Repository, caplog: LogCaptureFixture
+    ) -> None:
+        """
+        Given: Task lines in the standard input.
+        When: import is called.
+        Then: The tasks are added.
+        """
+        lines = 'First task pri:1\n{"description": "Second task", "area": "home"}\n'
+
+        result = runner.invoke(cli, ["import"], input=lines)
+
+        assert result.exit_code == 0
+        tasks = repo_e2e.all([Task])
+        assert [task.description for task in tasks] == ["First task", "Second task"]
+        assert tasks[1].area == "home"
+        assert ("pydo.services", logging.INFO, "Added 2 tasks") in caplog.record_tuples
+
+    def test_import_doesnt_add_tasks_if_a_line_is_invalid(
+        self, runner: CliRunner, repo_e2e: Repository, caplog: LogCaptureFixture
+    ) -> None:
+        """
+        Given: Task lines in the standard input, one of them is not valid.
+        When: import is called.
+        Then: An error is shown and no task is added.
+        """
+        lines = "First task\n{invalid\n"
+
+        result = runner.invoke(cli, ["import"], input=lines)
+
+        assert result.exit_code == 1
+        assert re.search("Line 2 is not a valid JSON", caplog.records[0].msg)
+        assert repo_e2e.all([Task]) == []
+
+
+class TestMigrate:
+    """Test the migration of the tasks to another database."""
+
+    def test_migrate_copies_the_tasks_and_changes_the_database_url(
+        self,
+        runner: CliRunner,
+        config: Config,
+        insert_tasks_e2e: List[Task],
+        tmpdir: LocalPath,
+    ) -> None:
+        """
+        Given: A TinyDB repository with tasks.
+        When: migrate is called with a SQLite database url.
+        Then: The tasks are copied to the SQLite database and the configuration
+            points to it.
+        """
+        database_url = f"sqlite:///{tmpdir}/database.db"
+
+        result = runner.invoke(cli, ["migrate", database_url])
+
+        assert result.exit_code == 0
+        sqlite_repo = SQLiteRepository([Task, RecurrentTask], database_url)
+        assert sorted(sqlite_repo.all([Task])) == sorted(insert_tasks_e2e)
+        assert Config(config.config_path)["database_url"] == database_url
+
+
+def test_rebuild_counters_stores_the_open_task_counts(
+    runner: CliRunner, repo_e2e: Repository, insert_tasks_e2e: List[Task]
+) -> None:
+    """
+    Given: Open tasks added without the services.
+    When: rebuild-counters is called.
+    Then: The counters of the open tasks are stored in the repository.
+    """
+    result = runner.invoke(cli, ["rebuild-counters"])
+
+    assert result.exit_code == 0
+    counters = repo_e2e.get(0, [TaskCounters])
+    assert sum(counters.areas.values()) == len(insert_tasks_e2e)
+
+
 @pytest.mark.parametrize(("action", "state"), [("do", "done"), ("rm", "deleted")])
 class TestCliDoAndDel:
     """Test the completion of tasks implementation."""
@@ -274,6 +432,30 @@ class TestCliDoAndDel:
             "There are no entities of type Task in the repository with id 9999.",
         ) in caplog.record_tuples
 
+    def test_close_task_rejects_a_limit(
+        self,
+        action: str,
+        state: str,
+        runner: CliRunner,
+        insert_tasks_e2e: List[Task],
+        repo_e2e: Repository,
+        caplog: LogCaptureFixture,
+    ) -> None:
+        """
+        Given: Open tasks
+        When: closing the tasks of a filter with a limit
+        Then: an error is returned and no task is closed.
+        """
+        result = runner.invoke(cli, [action, "pri:3", "limit:1"])
+
+        assert result.exit_code == 1
+        assert (
+            "pydo.entrypoints.utils",
+            logging.ERROR,
+            "The limit argument can only be used to select the tasks of a report",
+        ) in caplog.record_tuples
+        assert all(task.active for task in repo_e2e.all([Task]))
+
     def test_close_task_with_complete_date(
         self,
         action: str,
@@ -917,6 +1099,54 @@ class TestOpen:
         assert result.exit_code == 0
         assert report_prints_expected(result.stdout, expected_output, result.stderr)
 
+    def test_print_open_report_fails_gently_if_the_limit_is_not_an_integer(
+        self,
+        runner: CliRunner,
+        config: Config,
+        insert_tasks_e2e: List[Task],
+        caplog: LogCaptureFixture,
+    ) -> None:
+        """
+        Given: An open report configured with a limit that is not an integer
+        When: printing the open report
+        Then: an error is returned.
+        """
+        config.set("reports.task_reports.open.limit", "many")
+        config.save()
+
+        result = runner.invoke(cli, ["open"])
+
+        assert result.exit_code == 1
+        assert (
+            "pydo.entrypoints.cli",
+            logging.ERROR,
+            "The configuration reports.task_reports.open.limit is not an integer: "
+            "many",
+        ) in caplog.record_tuples
+
+    def test_print_open_report_can_specify_limit(
+        self, runner: CliRunner, insert_tasks_e2e: List[Task]
+    ) -> None:
+        """
+        Given: Four open tasks
+        When: printing the open report with a limit of two tasks
+        Then: only the two first tasks by id are printed.
+        """
+        result = runner.invoke(cli, ["open", "limit:2"])
+
+        assert result.exit_code == 0
+        lines = result.stdout.splitlines()
+        header = next(line for line in lines if re.match(r" +ID +", line))
+        rows = lines[lines.index(header) + 2 :]
+        id_column_end = header.index("Description")
+        printed_ids = [
+            row[:id_column_end].strip()
+            for row in rows
+            if row[:id_column_end].strip() != ""
+        ]
+        expected_ids = sorted(task.id_ for task in insert_tasks_e2e)[:2]
+        assert printed_ids == [str(id_) for id_ in expected_ids]
+
 
 class TestClosed:
     """Test the implementation of the closed report.
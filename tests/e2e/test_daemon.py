@@ -0,0 +1,203 @@
+"""Test the daemon and its command line client."""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Generator, List, Optional
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
+from py._path.local import LocalPath
+
+from pydo import services
+from pydo.config import Config
+from pydo.entrypoints import client, daemon
+from pydo.entrypoints.utils import WarmCliObjects, get_repo
+from pydo.model import Task, TaskChanges
+
+
+@pytest.fixture(name="socket_path")
+def socket_path_(tmpdir: LocalPath) -> str:
+    """Return the path of the daemon socket."""
+    return str(tmpdir.join("pydo.sock"))
+
+
+@pytest.fixture(name="objects")
+def objects_(
+    socket_path: str, config: Config, monkeypatch: MonkeyPatch
+) -> Generator[WarmCliObjects, None, None]:
+    """Run the daemon in a thread and return the objects it keeps loaded."""
+    monkeypatch.setenv("PYDO_CONFIG_PATH", config.config_path)
+    objects = WarmCliObjects()
+    threading.Thread(
+        target=daemon.serve, args=(socket_path, objects), daemon=True
+    ).start()
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+
+    yield objects
+
+
+def test_client_runs_the_commands_in_the_daemon(
+    socket_path: str,
+    objects: WarmCliObjects,
+    config: Config,
+    caplog: LogCaptureFixture,
+) -> None:
+    """
+    Given: A running daemon
+    When: The client asks it to add a task and then to print the open tasks
+    Then: The output of the commands is returned, and the repository is loaded once
+    """
+    added = client.request(["add", "Task description"], socket_path)
+    repo = objects[config.config_path]["repo"]
+
+    result = client.request(["open"], socket_path)
+
+    assert added is not None
+    assert added["exit_code"] == 0
+    assert (
+        "pydo.services",
+        logging.INFO,
+        "Added task 0: Task description",
+    ) in caplog.record_tuples
+    assert result is not None
+    assert result["exit_code"] == 0
+    assert "Task description" in result["stdout"]
+    assert objects[config.config_path]["repo"] is repo
+
+
+def test_daemon_keeps_the_tasks_added_by_other_programs(
+    socket_path: str, objects: WarmCliObjects, config: Config
+) -> None:
+    """
+    Given: A running daemon that has already added a task
+    When: Another program adds a task, and then the client adds another one
+    Then: The three tasks are stored
+    """
+    client.request(["add", "First"], socket_path)
+    services.add_task(
+        get_repo(config), TaskChanges(task_attributes={"description": "Second"})
+    )
+
+    result = client.request(["add", "Third"], socket_path)
+
+    assert result is not None
+    assert result["exit_code"] == 0
+    tasks = get_repo(config).all([Task])
+    assert [(task.id_, task.description) for task in tasks] == [
+        (0, "First"),
+        (1, "Second"),
+        (2, "Third"),
+    ]
+
+
+def test_daemon_discards_the_objects_if_a_command_fails(
+    socket_path: str, objects: WarmCliObjects, caplog: LogCaptureFixture
+) -> None:
+    """
+    Given: A running daemon
+    When: The client asks it to complete a task that doesn't exist
+    Then: The error and the exit code are returned, and the loaded objects are
+        discarded.
+    """
+    result = client.request(["do", "99"], socket_path)
+
+    assert result is not None
+    assert result["exit_code"] == 1
+    assert (
+        "pydo.entrypoints.cli",
+        logging.ERROR,
+        "There are no entities of type Task in the repository with id 99.",
+    ) in caplog.record_tuples
+    assert objects == {}
+
+
+def test_serve_raises_error_if_other_daemon_is_running(
+    socket_path: str, objects: WarmCliObjects
+) -> None:
+    """
+    Given: A running daemon
+    When: Starting another daemon with the same socket
+    Then: An error is raised
+    """
+    with pytest.raises(FileExistsError, match="There is already a pydo daemon"):
+        daemon.serve(socket_path)
+
+
+def test_request_returns_none_if_there_is_no_daemon(tmpdir: LocalPath) -> None:
+    """
+    Given: No running daemon
+    When: The client asks it to run a command
+    Then: None is returned, so the command is run in the client process
+    """
+    result = client.request(["open"], str(tmpdir.join("pydo.sock")))
+
+    assert result is None
+
+
+def test_request_returns_none_if_the_socket_cant_be_used(
+    tmpdir: LocalPath, monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Given: A daemon socket that the user is not allowed to use
+    When: The client asks it to run a command
+    Then: None is returned, so the command is run in the client process
+    """
+
+    def connect(*args: Any) -> None:
+        raise PermissionError("Permission denied")
+
+    monkeypatch.setattr(socket.socket, "connect", connect)
+
+    result = client.request(["open"], str(tmpdir.join("pydo.sock")))
+
+    assert result is None
+
+
+def test_warm_objects_are_kept_for_each_relative_config_path(
+    tmpdir: LocalPath, config: Config, monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Given: Two directories with a config.yaml file
+    When: Loading the objects of the relative path config.yaml from each of them
+    Then: Each directory gets the objects of its configuration file
+    """
+    objects = WarmCliObjects()
+    paths = []
+    for directory in ("first", "second"):
+        config_path = tmpdir.join(directory, "config.yaml")  # type: ignore
+        config_path.write(LocalPath(config.config_path).read(), ensure=True)
+        paths.append(str(config_path))
+
+    loaded = []
+    for directory in ("first", "second"):
+        monkeypatch.chdir(tmpdir.join(directory))  # type: ignore
+        loaded.append(objects.load("config.yaml"))
+
+    assert [cli_objects.config_path for cli_objects in loaded] == paths
+    assert [cli_objects["config"].config_path for cli_objects in loaded] == paths
+
+
+@pytest.mark.parametrize(
+    ("args", "command"),
+    [
+        (["-v", "-c", "config.yaml", "add", "import"], "add"),
+        (["--config_path", "config.yaml", "import"], "import"),
+        (["-v"], None),
+    ],
+)
+def test_client_finds_the_command_after_the_global_options(
+    args: List[str], command: Optional[str]
+) -> None:
+    """
+    Given: The arguments of a command with global options
+    When: Looking for the command name
+    Then: The options and their values are skipped
+    """
+    result = client._command(args)
+
+    assert result == command
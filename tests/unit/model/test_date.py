@@ -5,7 +5,13 @@ from datetime import datetime, timedelta
 import pytest
 
 from pydo import exceptions
-from pydo.model.date import convert_date
+from pydo.model.date import (
+    RecurrenceRule,
+    convert_date,
+    get_date_rule,
+    get_recurrence_rule,
+    next_date,
+)
 
 
 @pytest.fixture()
@@ -190,3 +196,101 @@ def test_convert_date_raises_error_if_wrong_format() -> None:
     """Test error is returned if the date format is wrong."""
     with pytest.raises(exceptions.DateParseError):
         convert_date("wrong date string")
+
+
+@pytest.mark.parametrize(
+    ("recurrence", "starting_date", "after", "expected_date"),
+    [
+        ("1d", datetime(2020, 1, 1), datetime(2020, 1, 1), datetime(2020, 1, 2)),
+        ("1d", datetime(2020, 1, 1), datetime(2019, 1, 1), datetime(2020, 1, 2)),
+        (
+            "1h",
+            datetime(2000, 1, 1),
+            datetime(2020, 1, 1, 10, 30),
+            datetime(2020, 1, 1, 11),
+        ),
+        (
+            "30m",
+            datetime(1900, 1, 1),
+            datetime(2020, 1, 1, 10),
+            datetime(2020, 1, 1, 10, 30),
+        ),
+        ("1w2d", datetime(2020, 1, 1), datetime(2020, 1, 20), datetime(2020, 1, 28)),
+        ("1mo", datetime(1800, 8, 2), datetime(2017, 5, 21), datetime(2017, 6, 2)),
+        ("1mo", datetime(2020, 1, 31), datetime(2020, 3, 1), datetime(2020, 3, 31)),
+        ("1y", datetime(1900, 2, 1), datetime(2020, 2, 1), datetime(2021, 2, 1)),
+        ("1y2mo", datetime(2000, 1, 1), datetime(2003, 1, 1), datetime(2003, 7, 1)),
+        ("1rmo", datetime(2020, 1, 8), datetime(2020, 3, 1), datetime(2020, 3, 11)),
+    ],
+)
+def test_next_date_returns_first_element_of_series_after_date(
+    recurrence: str, starting_date: datetime, after: datetime, expected_date: datetime
+) -> None:
+    """
+    Given: A recurrence series that starts at starting_date.
+    When: next_date is called with a date after the start of the series.
+    Then: The first element of the series later than that date is returned.
+    """
+    result = next_date(recurrence, starting_date, after)
+
+    assert result == expected_date
+
+
+def test_next_date_raises_error_if_recurrence_doesnt_advance() -> None:
+    """
+    Given: A recurrence that doesn't move the date forward.
+    When: next_date is called.
+    Then: A DateParseError is raised instead of looping forever.
+    """
+    with pytest.raises(exceptions.DateParseError):
+        next_date("0d", datetime(2020, 1, 1), datetime(2021, 1, 1))
+
+
+def test_get_recurrence_rule_parses_each_string_once() -> None:
+    """
+    Given: A recurrence string.
+    When: get_recurrence_rule is called twice with it.
+    Then: The same parsed RecurrenceRule is returned.
+    """
+    result = get_recurrence_rule("1w2d")
+
+    assert result is get_recurrence_rule("1w2d")
+    assert isinstance(result, RecurrenceRule)
+    assert result.step == timedelta(days=9)
+    assert result.months == 0
+
+
+def test_get_date_rule_parses_each_string_once() -> None:
+    """
+    Given: A date string relative to the starting date.
+    When: get_date_rule is called twice with it, and the rule is applied to two
+        starting dates.
+    Then: The same rule is returned, and it converts each starting date.
+    """
+    result = get_date_rule("tomorrow")
+
+    assert result is get_date_rule("tomorrow")
+    assert result(datetime(2020, 1, 6)) == datetime(2020, 1, 7)
+    assert result(datetime(2020, 1, 6, 10)) == datetime(2020, 1, 7, 10)
+
+
+def test_recurrence_rule_merges_years_and_months() -> None:
+    """
+    Given: A recurrence string with years and months.
+    When: The RecurrenceRule is built.
+    Then: Both units are stored as months.
+    """
+    result = RecurrenceRule("1y2mo30s")
+
+    assert result.months == 14
+    assert result.step == timedelta(seconds=30)
+
+
+def test_recurrence_rule_raises_error_if_wrong_format() -> None:
+    """
+    Given: A string without any value and unit pair.
+    When: The RecurrenceRule is built.
+    Then: A DateParseError is raised.
+    """
+    with pytest.raises(exceptions.DateParseError):
+        RecurrenceRule("wrong")
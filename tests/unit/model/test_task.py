@@ -9,7 +9,7 @@ from pydantic import ValidationError
 from tests import factories
 from tests.factories import RecurrentTaskFactory
 
-from pydo.model.task import RecurrentTask, Task
+from pydo.model.task import RecurrentTask, Task, TaskCounters
 
 
 @pytest.fixture(name="task_attributes")
@@ -168,6 +168,26 @@ def test_breed_children_new_due_follows_recurr_algorithm() -> None:
     assert result.due == datetime(2017, 6, 2)
 
 
+@pytest.mark.freeze_time("2017-05-21 10:15")
+def test_breed_children_new_due_of_old_recurring_parent_with_small_recurrence() -> None:
+    """
+    Given: A recurring parent task with a due date centuries ago and a recurrence
+        of minutes.
+    When: breed_children is called.
+    Then: The children's due date is the next element of the series after now,
+        without walking the hundreds of millions of elements in between.
+    """
+    parent = RecurrentTaskFactory(
+        recurrence_type="recurring", recurrence="30m", due=datetime(1800, 8, 2)
+    )
+    first_child = factories.TaskFactory(parent_id=parent.id_)
+    first_child.close("completed", datetime(1800, 8, 2))
+
+    result = parent.breed_children(first_child)
+
+    assert result.due == datetime(2017, 5, 21, 10, 30)
+
+
 @pytest.mark.freeze_time("2017-05-21")
 def test_breed_children_new_due_follows_repeating_algorithm() -> None:
     """
@@ -235,3 +255,21 @@ def test_not_frozen_recurrent_task_cant_be_thawed() -> None:
         ValueError, match=rf"Task {task.id_}: {task.description} is not frozen"
     ):
         task.thaw()
+
+
+def test_counters_count_only_open_tasks() -> None:
+    """
+    Given: Open, closed and recurrent tasks with and without areas and tags.
+    When: Counting them and then discounting the open one with area.
+    Then: Only the open tasks are counted, and the counts that reach zero are removed.
+    """
+    task = Task(area="home", tags=["t1"])
+    closed_task = Task(area="work")
+    closed_task.close()
+    tasks = [task, Task(), closed_task, RecurrentTaskFactory(area="work")]
+    counters = TaskCounters.from_tasks(tasks)
+
+    counters.remove(task)  # act
+
+    assert counters.areas == {"None": 1}
+    assert counters.tags == {"None": 1}
@@ -0,0 +1,567 @@
+"""Test the storage adapters."""
+
+import json
+import os
+from datetime import datetime
+from typing import List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from _pytest.tmpdir import TempdirFactory
+from repository_orm import (
+    EntityNotFoundError,
+    FakeRepository,
+    Repository,
+    TinyDBRepository,
+)
+from tests import factories
+
+from pydo.adapters import (
+    EntityQuery,
+    IndexedTinyDBRepository,
+    SQLiteRepository,
+    get_entities,
+    load_repository,
+    query_entities,
+    tinydb,
+)
+from pydo.model.task import RecurrentTask, Task, TaskState
+
+
+@pytest.fixture(name="database_url")
+def database_url_(tmpdir_factory: TempdirFactory) -> str:
+    """Return the url of an empty TinyDB database."""
+    data = tmpdir_factory.mktemp("data")
+    return f"tinydb://{data}/database.tinydb"
+
+
+@pytest.fixture(name="repo")
+def repo_(database_url: str) -> IndexedTinyDBRepository:
+    """Configure an IndexedTinyDBRepository instance."""
+    return IndexedTinyDBRepository([Task, RecurrentTask], database_url)
+
+
+@pytest.fixture(name="tasks")
+def tasks_(repo: IndexedTinyDBRepository) -> List[Task]:
+    """Insert three open tasks and a closed one in the repository."""
+    tasks = factories.TaskFactory.create_batch(3, state="backlog", area="home")
+    closed_task = factories.TaskFactory.create(state="backlog", area="work")
+    closed_task.close()
+    tasks.append(closed_task)
+    for task in tasks:
+        repo.add(task)
+    repo.commit()
+
+    return tasks
+
+
+def test_load_repository_returns_indexed_repository_for_tinydb(
+    database_url: str,
+) -> None:
+    """
+    Given: A TinyDB database url.
+    When: load_repository is called.
+    Then: The indexed repository is returned.
+    """
+    result = load_repository([Task, RecurrentTask], database_url)
+
+    assert isinstance(result, IndexedTinyDBRepository)
+
+
+def test_search_returns_the_same_as_the_tinydb_repository(
+    repo: IndexedTinyDBRepository, database_url: str, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with open and closed tasks.
+    When: Searching by indexed and not indexed fields.
+    Then: The result is the same as the one of the TinyDB repository.
+    """
+    tinydb_repo = TinyDBRepository([Task, RecurrentTask], database_url)
+
+    for fields in [
+        {"active": True},
+        {"area": "hom"},
+        {"active": True, "description": tasks[0].description},
+    ]:
+        result = repo.search(fields, [Task])
+
+        assert result == tinydb_repo.search(fields, [Task])
+
+
+def test_get_returns_the_entity(
+    repo: IndexedTinyDBRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with tasks.
+    When: Getting a task by it's id.
+    Then: The task is returned.
+    """
+    result = repo.get(tasks[1].id_, [Task])
+
+    assert result == tasks[1]
+
+
+def test_commit_saves_the_indexes(
+    repo: IndexedTinyDBRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with tasks.
+    When: Reading the index file.
+    Then: The indexes are up to date with the database.
+    """
+    with open(repo.index_file, "r") as file_cursor:
+        result = json.load(file_cursor)
+
+    stat = os.stat(repo.database_file)
+    assert result["stamp"] == [stat.st_mtime_ns, stat.st_size, 0, 0]
+    assert sorted(len(doc_ids) for _, doc_ids in result["active"]) == [1, 3]
+
+
+def test_commit_updates_the_indexes_incrementally(
+    repo: IndexedTinyDBRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with open tasks.
+    When: Closing one of them and deleting other.
+    Then: The searches of a new repository don't return them as open.
+    """
+    tasks[0].close()
+    repo.add(tasks[0])
+    repo.delete(tasks[1])
+    repo.commit()
+    new_repo = IndexedTinyDBRepository([Task, RecurrentTask], repo.database_url)
+
+    result = new_repo.search({"active": True}, [Task])
+
+    assert result == [tasks[2]]
+
+
+def test_indexes_are_rebuilt_if_the_database_changes(
+    repo: IndexedTinyDBRepository, database_url: str, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with tasks.
+    When: Another program changes the database.
+    Then: The indexes are rebuilt, and the searches return the changes.
+    """
+    tinydb_repo = TinyDBRepository([Task, RecurrentTask], database_url)
+    tasks[0].close()
+    tinydb_repo.add(tasks[0])
+    tinydb_repo.commit()
+
+    result = repo.search({"active": True}, [Task])
+
+    assert tasks[0] not in result
+    assert len(result) == 2
+
+
+def test_search_by_indexed_fields_only_returns_the_searched_models(
+    repo: IndexedTinyDBRepository,
+) -> None:
+    """
+    Given: A task and a recurrent task with the same id and area.
+    When: Getting and searching by the id and the area only the tasks.
+    Then: Only the task is returned.
+    """
+    task = factories.TaskFactory.create(id_=1, area="home", state="backlog")
+    recurrent_task = factories.RecurrentTaskFactory.create(
+        id_=1, area="home", state="backlog"
+    )
+    repo.add(task)
+    repo.add(recurrent_task)
+    repo.commit()
+
+    result = repo.search({"id_": 1, "area": "home"}, [Task])
+
+    assert result == [task]
+    assert repo.get(1, [Task]) == task
+    assert repo.get(1, [RecurrentTask]) == recurrent_task
+
+
+def test_searches_dont_read_the_database_if_it_didnt_change(
+    repo: IndexedTinyDBRepository, tasks: List[Task], monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Given: A repository that has committed some changes.
+    When: Getting and searching tasks.
+    Then: The documents are not read again from the database.
+    """
+    reads = []
+    read = repo.db_.storage.read
+
+    def counted_read() -> object:
+        reads.append(1)
+        return read()
+
+    monkeypatch.setattr(repo.db_.storage, "read", counted_read)
+
+    result = repo.search({"active": True}, [Task])
+
+    assert repo.get(tasks[0].id_, [Task]) == tasks[0]
+    assert len(result) == 3
+    assert reads == []
+
+
+def test_commit_doesnt_overwrite_the_documents_of_other_programs(
+    repo: IndexedTinyDBRepository, database_url: str
+) -> None:
+    """
+    Given: A repository that has already added a task.
+    When: Another program adds a task to the database, and then the repository
+        adds another one.
+    Then: The three tasks are stored.
+    """
+    tasks = [Task(id_=id_, description=f"Task {id_}") for id_ in range(3)]
+    repo.add(tasks[0])
+    repo.commit()
+    other_repo = IndexedTinyDBRepository([Task, RecurrentTask], database_url)
+    other_repo.add(tasks[1])
+    other_repo.commit()
+    repo.add(tasks[2])
+    repo.commit()
+
+    result = IndexedTinyDBRepository([Task, RecurrentTask], database_url).all([Task])
+
+    assert result == tasks
+    assert repo.all([Task]) == tasks
+
+
+def test_search_raises_error_if_nothing_matches(
+    repo: IndexedTinyDBRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with tasks.
+    When: Searching by a value that no task has.
+    Then: An EntityNotFoundError is raised.
+    """
+    with pytest.raises(EntityNotFoundError):
+        repo.search({"area": "inexistent"}, [Task])
+
+
+@pytest.fixture(name="journal_repo")
+def journal_repo_(
+    database_url: str, tasks: List[Task], monkeypatch: MonkeyPatch
+) -> IndexedTinyDBRepository:
+    """Configure an IndexedTinyDBRepository in journal mode without compactions."""
+    monkeypatch.setattr(tinydb, "JOURNAL_COMPACTION_RATIO", 100)
+    return IndexedTinyDBRepository([Task, RecurrentTask], database_url, journal=True)
+
+
+def test_journal_commit_doesnt_rewrite_the_database(
+    journal_repo: IndexedTinyDBRepository, database_url: str, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository in journal mode.
+    When: Adding, changing and removing tasks.
+    Then: The database file is not changed, and a new repository in journal mode
+        reads the changes from the journal.
+    """
+    database_stat = os.stat(journal_repo.database_file)
+    new_task = factories.TaskFactory.create(state="backlog", area="home")
+    new_task.id_ = -1
+    journal_repo.add(new_task)
+    tasks[0].close()
+    journal_repo.add(tasks[0])
+    journal_repo.delete(tasks[1])
+    journal_repo.commit()
+    new_repo = IndexedTinyDBRepository(
+        [Task, RecurrentTask], database_url, journal=True
+    )
+
+    result = new_repo.search({"active": True}, [Task])
+
+    assert os.stat(journal_repo.database_file) == database_stat
+    assert result == [tasks[2], new_task]
+    assert new_repo.get(tasks[0].id_, [Task]) == tasks[0]
+    assert new_repo.all([Task]) == [tasks[0], tasks[2], tasks[3], new_task]
+
+
+def test_journal_is_compacted_if_the_journal_mode_is_disabled(
+    journal_repo: IndexedTinyDBRepository, database_url: str, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository in journal mode with changes in the journal.
+    When: A repository without journal mode is initialized.
+    Then: The journal is compacted into the database, so the rest of programs can
+        read it.
+    """
+    tasks[0].close()
+    journal_repo.add(tasks[0])
+    journal_repo.commit()
+
+    IndexedTinyDBRepository([Task, RecurrentTask], database_url)  # act
+
+    assert not os.path.isfile(journal_repo.journal_file)
+    tinydb_repo = TinyDBRepository([Task, RecurrentTask], database_url)
+    assert tinydb_repo.get(tasks[0].id_, [Task]) == tasks[0]
+
+
+def test_journal_is_compacted_when_it_grows(
+    journal_repo: IndexedTinyDBRepository,
+    tasks: List[Task],
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """
+    Given: A repository in journal mode.
+    When: The journal grows bigger than the compaction ratio of the database.
+    Then: The journal is compacted into the database and the indexes are kept.
+    """
+    monkeypatch.setattr(tinydb, "JOURNAL_COMPACTION_RATIO", 0)
+    tasks[0].close()
+    journal_repo.add(tasks[0])
+
+    journal_repo.commit()  # act
+
+    assert not os.path.isfile(journal_repo.journal_file)
+    assert tasks[0] not in journal_repo.search({"active": True}, [Task])
+
+
+@pytest.fixture(name="sqlite_repo")
+def sqlite_repo_(tmpdir_factory: TempdirFactory) -> SQLiteRepository:
+    """Configure a SQLiteRepository instance."""
+    data = tmpdir_factory.mktemp("data")
+    return SQLiteRepository([Task, RecurrentTask], f"sqlite:///{data}/database.db")
+
+
+def test_load_repository_returns_sqlite_repository_for_sqlite(
+    tmpdir_factory: TempdirFactory,
+) -> None:
+    """
+    Given: A SQLite database url.
+    When: load_repository is called.
+    Then: The SQLite repository is returned.
+    """
+    data = tmpdir_factory.mktemp("data")
+
+    result = load_repository([Task, RecurrentTask], f"sqlite:///{data}/database.db")
+
+    assert isinstance(result, SQLiteRepository)
+
+
+def test_sqlite_search_returns_the_same_as_the_tinydb_repository(
+    sqlite_repo: SQLiteRepository, repo: IndexedTinyDBRepository
+) -> None:
+    """
+    Given: A SQLite and a TinyDB repository with the same tasks.
+    When: Searching by columns, tags and attributes stored in the JSON.
+    Then: The result is the same.
+    """
+    tasks = factories.TaskFactory.create_batch(
+        3, state="backlog", area="home", tags=["tag1", "tag2"], priority=3
+    )
+    tasks[0].close()
+    tasks.append(factories.TaskFactory.create(state="todo", area="work", tags=[]))
+    parent = factories.RecurrentTaskFactory.create(state="backlog", area="home")
+    for entity in [*tasks, parent]:
+        sqlite_repo.add(entity)
+        repo.add(entity)
+    sqlite_repo.commit()
+    repo.commit()
+
+    for fields in [
+        {"active": True},
+        {"area": "hom"},
+        {"tags": "tag2", "active": True},
+        {"priority": 3},
+        {"state": "todo"},
+        {"description": tasks[1].description},
+        {"recurrence": parent.recurrence},
+    ]:
+        result = sqlite_repo.search(fields, [Task, RecurrentTask])
+
+        assert result == repo.search(fields, [Task, RecurrentTask])
+
+
+@pytest.mark.parametrize("repo_type", ["tinydb", "sqlite", "fake"])
+def test_get_entities_returns_the_entities_of_the_ids(
+    repo_type: str, database_url: str, sqlite_repo: SQLiteRepository
+) -> None:
+    """
+    Given: A repository with tasks and a recurrent task with the id of one of them.
+    When: Getting the tasks of some ids, one of them repeated.
+    Then: The tasks are returned once in the order they were requested.
+    """
+    repos = {
+        "tinydb": IndexedTinyDBRepository([Task, RecurrentTask], database_url),
+        "sqlite": sqlite_repo,
+        "fake": FakeRepository([Task, RecurrentTask]),
+    }
+    repo = repos[repo_type]
+    tasks = [Task(id_=id_, description=f"Task {id_}") for id_ in range(4)]
+    parent = factories.RecurrentTaskFactory.create(id_=2, state="backlog")
+    for entity in [*tasks, parent]:
+        repo.add(entity)
+    repo.commit()
+
+    result = get_entities(repo, [3, 1, 3, 2], [Task])
+
+    assert result == [tasks[3], tasks[1], tasks[2]]
+
+
+@pytest.mark.parametrize("repo_type", ["tinydb", "sqlite"])
+def test_get_entities_raises_error_if_an_id_is_not_found(
+    repo_type: str, database_url: str, sqlite_repo: SQLiteRepository
+) -> None:
+    """
+    Given: A repository with a task.
+    When: Getting the tasks of its id and an inexistent one.
+    Then: An EntityNotFoundError is raised.
+    """
+    repo: Repository = sqlite_repo
+    if repo_type == "tinydb":
+        repo = IndexedTinyDBRepository([Task, RecurrentTask], database_url)
+    repo.add(Task(id_=0, description="Task"))
+    repo.commit()
+
+    with pytest.raises(
+        EntityNotFoundError,
+        match="There are no entities of type Task in the repository with id 9999",
+    ):
+        get_entities(repo, [0, 9999], [Task])
+
+
+def test_sqlite_updated_entities_keep_their_position(
+    sqlite_repo: SQLiteRepository,
+) -> None:
+    """
+    Given: A SQLite repository with tasks.
+    When: Changing the first task.
+    Then: The change is stored and the tasks are returned in the insertion order.
+    """
+    tasks = [Task(id_=id_, description=f"Task {id_}") for id_ in (2, 0, 1)]
+    for task in tasks:
+        sqlite_repo.add(task)
+    sqlite_repo.commit()
+    tasks[0].description = "Changed"
+    sqlite_repo.add(tasks[0])
+
+    sqlite_repo.commit()  # act
+
+    assert sqlite_repo.all([Task]) == tasks
+    assert sqlite_repo.get(2, [Task]).description == "Changed"
+
+
+def test_sqlite_persists_the_changes(
+    sqlite_repo: SQLiteRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A SQLite repository with tasks.
+    When: Changing, deleting and adding tasks.
+    Then: A new repository sees the changes, and the new task gets the next id.
+    """
+    for task in tasks:
+        sqlite_repo.add(task)
+    sqlite_repo.commit()
+    tasks[0].tags = ["new_tag"]
+    sqlite_repo.add(tasks[0])
+    sqlite_repo.delete(tasks[1])
+    new_task = sqlite_repo.add(Task(description="New task"))
+    sqlite_repo.commit()
+    new_repo = SQLiteRepository([Task, RecurrentTask], sqlite_repo.database_url)
+
+    result = new_repo.all([Task])
+
+    assert result == [tasks[0], tasks[2], tasks[3], new_task]
+    assert new_task.id_ == max(tasks).id_ + 1
+    assert new_repo.search({"tags": "new_tag"}, [Task]) == [tasks[0]]
+    assert new_repo.last([Task]) == new_task
+    with pytest.raises(EntityNotFoundError):
+        new_repo.get(tasks[1].id_, [Task])
+
+
+@pytest.mark.parametrize("repo_type", ["fake", "tinydb", "sqlite"])
+def test_query_entities_sorts_and_paginates_the_search(
+    repo_type: str, database_url: str, tmpdir_factory: TempdirFactory
+) -> None:
+    """
+    Given: A repository with tasks with and without priority and due.
+    When: Querying the open tasks sorted by decreasing priority and due, with an
+        offset and a limit.
+    Then: The page of tasks is returned in order, with the ones without value last.
+    """
+    if repo_type == "fake":
+        repo: Repository = FakeRepository([Task, RecurrentTask])
+    elif repo_type == "tinydb":
+        repo = IndexedTinyDBRepository([Task, RecurrentTask], database_url)
+    else:
+        data = tmpdir_factory.mktemp("data")
+        repo = SQLiteRepository([Task, RecurrentTask], f"sqlite:///{data}/db.db")
+    tasks = [
+        Task(id_=0, description="Low", priority=1, due=datetime(2020, 1, 2)),
+        Task(id_=1, description="No priority", due=datetime(2020, 1, 1)),
+        Task(id_=2, description="Late", priority=3, due=datetime(2020, 1, 3)),
+        Task(id_=3, description="Soon", priority=3, due=datetime(2020, 1, 1)),
+        Task(id_=4, description="No due", priority=3),
+        Task(id_=5, description="Closed", priority=5),
+    ]
+    tasks[5].close()
+    for task in tasks:
+        repo.add(task)
+    repo.commit()
+    query = EntityQuery(
+        fields={"active": True},
+        models=[Task],
+        sort=["-priority", "due"],
+        limit=3,
+        offset=1,
+    )
+
+    result = query_entities(repo, query)
+
+    assert result == [tasks[2], tasks[4], tasks[0]]
+
+
+@pytest.mark.parametrize("repo_type", ["fake", "tinydb", "sqlite"])
+def test_query_entities_returns_rows_of_the_columns(
+    repo_type: str, database_url: str, tmpdir_factory: TempdirFactory
+) -> None:
+    """
+    Given: A repository with a task and a recurrent task.
+    When: Querying both models with columns.
+    Then: The rows of the columns are returned, with the dates and enums converted,
+        and None in the columns that the model doesn't have.
+    """
+    if repo_type == "fake":
+        repo: Repository = FakeRepository([Task, RecurrentTask])
+    elif repo_type == "tinydb":
+        repo = IndexedTinyDBRepository([Task, RecurrentTask], database_url)
+    else:
+        data = tmpdir_factory.mktemp("data")
+        repo = SQLiteRepository([Task, RecurrentTask], f"sqlite:///{data}/db.db")
+    task = Task(id_=0, description="Task", due=datetime(2020, 1, 2), tags=["tag"])
+    parent = RecurrentTask(
+        id_=0,
+        description="Parent",
+        due=datetime(2020, 1, 1, 10, 30),
+        recurrence="1d",
+        recurrence_type="recurring",
+    )
+    repo.add(task)
+    repo.add(parent)
+    repo.commit()
+    query = EntityQuery(
+        models=[Task, RecurrentTask],
+        sort=["due"],
+        columns=["description", "due", "state", "tags", "recurrence"],
+    )
+
+    result = query_entities(repo, query)
+
+    assert result == [
+        ("Parent", parent.due, TaskState.BACKLOG, [], "1d"),
+        ("Task", task.due, TaskState.BACKLOG, ["tag"], None),
+    ]
+    assert isinstance(result[0].state, TaskState)
+    assert result[1].due == datetime(2020, 1, 2)
+
+
+def test_query_raises_error_if_nothing_matches(
+    repo: IndexedTinyDBRepository, tasks: List[Task]
+) -> None:
+    """
+    Given: A repository with tasks.
+    When: Querying with an offset bigger than the number of tasks.
+    Then: An EntityNotFoundError is raised.
+    """
+    with pytest.raises(EntityNotFoundError):
+        repo.query(EntityQuery(models=[Task], offset=10))
@@ -0,0 +1,160 @@
+"""Test the asyncio interface of the services."""
+
+import asyncio
+import threading
+from typing import Any, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from py._path.local import LocalPath
+from repository_orm import FakeRepository, Repository
+
+from pydo import services, views
+from pydo.adapters import load_repository
+from pydo.async_services import AsyncServices
+from pydo.config import Config
+from pydo.model.task import (
+    RecurrentTask,
+    Task,
+    TaskChanges,
+    TaskCounters,
+    TaskSelector,
+)
+
+
+def test_concurrent_additions_are_committed_one_at_a_time(
+    repo: FakeRepository,
+) -> None:
+    """
+    Given: The async services
+    When: Adding many tasks at the same time
+    Then: Each task gets it's own id and all of them are stored
+    """
+    async_services = AsyncServices(repo)
+
+    async def add_tasks() -> List[Task]:
+        return await asyncio.gather(
+            *[
+                async_services.add_task(
+                    TaskChanges(task_attributes={"description": f"Task {index}"})
+                )
+                for index in range(10)
+            ]
+        )
+
+    result = asyncio.run(add_tasks())
+
+    async_services.close()
+    assert sorted(task.id_ for task in result) == list(range(10))
+    assert len(repo.all([Task])) == 10
+
+
+def test_services_run_outside_the_event_loop_thread(
+    repo: FakeRepository, config: Config, monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Given: The async services
+    When: Adding and completing a task and running the closed report
+    Then: The services run in the executor, and the report returns the task
+    """
+    threads = []
+    add_task = services.add_task
+
+    def add_task_in_thread(*args: Any) -> Task:
+        threads.append(threading.current_thread())
+        return add_task(*args)
+
+    monkeypatch.setattr(services, "add_task", add_task_in_thread)
+    async_services = AsyncServices(repo)
+
+    async def close_and_report() -> List[Task]:
+        await async_services.add_task(TaskChanges(task_attributes={"description": "A"}))
+        await async_services.do_tasks(TaskSelector(task_ids=[0]))
+        return await async_services.report_tasks(config, "closed")
+
+    result = asyncio.run(close_and_report())
+
+    async_services.close()
+    assert [task.description for task in result] == ["A"]
+    assert threads[0] != threading.main_thread()
+
+
+@pytest.mark.parametrize("repo_type", ["fake", "tinydb"])
+def test_failed_write_doesnt_commit_its_changes_with_the_next_one(
+    repo_type: str, tmpdir: LocalPath
+) -> None:
+    """
+    Given: The async services
+    When: Adding tasks with a change that fails after the first task is staged, and
+        then adding another task
+    Then: Only the task of the successful write is stored
+    """
+    if repo_type == "fake":
+        repo: Repository = FakeRepository([Task, RecurrentTask, TaskCounters])
+    else:
+        repo = load_repository(
+            [Task, RecurrentTask, TaskCounters], f"tinydb://{tmpdir}/database.tinydb"
+        )
+    async_services = AsyncServices(repo)
+    invalid_changes = [
+        TaskChanges(task_attributes={"description": "Staged"}),
+        TaskChanges(
+            task_attributes={
+                "description": "Recurring without due",
+                "recurrence": "1d",
+                "recurrence_type": "recurring",
+            }
+        ),
+    ]
+
+    async def fail_and_add() -> None:
+        with pytest.raises(ValueError):
+            await async_services.add_tasks(invalid_changes)
+        await async_services.add_task(
+            TaskChanges(task_attributes={"description": "Added"})
+        )
+
+    asyncio.run(fail_and_add())
+
+    async_services.close()
+    assert [task.description for task in repo.all([Task])] == ["Added"]
+
+
+def test_load_report_pages_reads_the_missing_pages_of_a_window(
+    repo: FakeRepository, config: Config
+) -> None:
+    """
+    Given: A repository with 5 open tasks and a report window in pages of 2 rows
+    When: Loading the missing pages of the first 4 rows with the async services
+    Then: The window returns the rows without reading the repository
+    """
+    for index in range(5):
+        repo.add(Task(id_=index, description=f"Task {index}"))
+    repo.commit()
+    window = views.ReportWindow(repo, config, "open", page_size=2)
+    async_services = AsyncServices(repo)
+
+    asyncio.run(async_services.load_report_pages(window, window.missing_pages(0, 4)))
+
+    async_services.close()
+    assert window.missing_pages(0, 4) == []
+    assert [row[0] for row in window.rows(0, 4)] == ["0", "1", "2", "3"]
+    assert window.length is None
+
+
+def test_load_report_pages_of_an_empty_report(
+    repo: FakeRepository, config: Config
+) -> None:
+    """
+    Given: An empty repository and a report window
+    When: Loading the first page with the async services
+    Then: The window knows the report is empty and has no missing pages
+    """
+    window = views.ReportWindow(repo, config, "open", page_size=2)
+    async_services = AsyncServices(repo)
+
+    asyncio.run(async_services.load_report_pages(window, [0]))
+
+    async_services.close()
+    assert window.length == 0
+    assert window.missing_pages(0, 10) == []
@@ -28,10 +28,12 @@ def test_config_load(config: Config) -> None:
 @patch("pydo.config.YAML")
 def test_load_handles_wrong_file_format(yaml_mock: Mock, config: Config) -> None:
     """
-    Given: A config file with wrong yaml format.
+    Given: A config file with wrong yaml format, changed since the last load.
     When: configuration is loaded.
     Then: A ConfigError is returned.
     """
+    with open(config.config_path, "a") as file_cursor:
+        file_cursor.write("\n")
     yaml_mock.return_value.load.side_effect = ScannerError(
         "error",
         FileMarkMock(),
@@ -102,3 +104,97 @@ def test_set_can_set_nested_items_with_dots(config: Config) -> None:
     config.set("storage.type", "tinydb")  # act
 
     assert config.data["storage"]["type"] == "tinydb"
+
+
+@patch("pydo.config.YAML")
+def test_load_uses_the_cache_if_file_didnt_change(
+    yaml_mock: Mock, config: Config
+) -> None:
+    """
+    Given: A config file that has already been loaded.
+    When: configuration is loaded again.
+    Then: The YAML file is not parsed, and the values are the same.
+    """
+    data = config.data
+
+    config.load()  # act
+
+    yaml_mock.assert_not_called()
+    assert config.data == data
+
+
+def test_load_ignores_the_cache_if_file_changed(config: Config) -> None:
+    """
+    Given: A config file that has already been loaded.
+    When: The file is changed and the configuration is loaded again.
+    Then: The new values are loaded.
+    """
+    with open(config.config_path, "a") as file_cursor:
+        file_cursor.write("new_key: new_value\n")
+
+    config.load()  # act
+
+    assert config.data["new_key"] == "new_value"
+
+
+def test_save_keeps_the_comments_if_loaded_from_cache(config: Config) -> None:
+    """
+    Given: A configuration loaded from the cache.
+    When: A value is changed and the configuration saved.
+    Then: The comments of the file are kept, and the value is changed.
+    """
+    config.load()
+    config.set("reports.date_format", "%Y")
+
+    config.save()  # act
+
+    with open(config.config_path, "r") as file_cursor:
+        content = file_cursor.read()
+    assert "# Configuration of the reports." in content
+    assert Config(config.config_path).get("reports.date_format") == "%Y"
+
+
+def test_get_returns_the_values_changed_with_set(config: Config) -> None:
+    """
+    Given: A configuration whose value has already been fetched.
+    When: The value is changed with set.
+    Then: get returns the new value.
+    """
+    config.data = {"first": {"second": "value"}}
+    config.get("first.second")
+    config.set("first.second", "new_value")
+
+    result = config.get("first.second")
+
+    assert result == "new_value"
+
+
+def test_get_returns_the_values_of_the_assigned_data(config: Config) -> None:
+    """
+    Given: A configuration whose value has already been fetched.
+    When: The whole configuration data is replaced.
+    Then: get returns the value of the new data.
+    """
+    config.data = {"first": {"second": "value"}}
+    config.get("first.second")
+    config.data = {"first": {"second": "new_value"}}
+
+    result = config.get("first.second")
+
+    assert result == "new_value"
+
+
+def test_get_returns_the_values_changed_with_dictionary_notation(
+    config: Config,
+) -> None:
+    """
+    Given: A configuration whose value has already been fetched.
+    When: A top level key is changed with the dictionary notation.
+    Then: get returns the new value.
+    """
+    config.get("reports.date_format")
+    config["reports"] = {"date_format": "%Y"}
+
+    result = config.get("reports.date_format")
+
+    assert result == "%Y"
@@ -0,0 +1,54 @@
+"""Test the measure of the phases of the commands."""
+
+import pytest
+
+from pydo import profiling
+
+
+def test_phases_do_nothing_if_there_is_no_profiler() -> None:
+    """
+    Given: No running profiler
+    When: Running a timed function and a phase
+    Then: The function result is returned, and nothing is recorded
+    """
+    function = profiling.timed(lambda: 1)
+
+    with profiling.phase("phase"):
+        result = function()
+
+    assert result == 1
+    assert profiling.stop() is None
+
+
+def test_profiler_closes_the_phases_left_open_by_an_exception() -> None:
+    """
+    Given: A running profiler
+    When: A phase with a nested one raises an exception
+    Then: Both phases are closed and nested in the order they were opened.
+    """
+    profiling.start()
+
+    with pytest.raises(ValueError):
+        with profiling.phase("outer"):
+            with profiling.phase("inner"):
+                raise ValueError("error")
+    with profiling.phase("next"):
+        pass
+    profiler = profiling.stop()
+
+    assert profiler is not None
+    assert [(phase.name, phase.depth) for phase in profiler.phases] == [
+        ("outer", 0),
+        ("inner", 1),
+        ("next", 0),
+    ]
+    assert all(phase.end >= phase.start for phase in profiler.phases)
+    events = profiler.speedscope()["profiles"][0]["events"]
+    assert [(event["type"], event["frame"]) for event in events] == [
+        ("O", 0),
+        ("O", 1),
+        ("C", 1),
+        ("C", 0),
+        ("O", 2),
+        ("C", 2),
+    ]
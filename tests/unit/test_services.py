@@ -2,16 +2,24 @@
 
 import logging
 from datetime import datetime
-from typing import Callable, List, Tuple
+from typing import Any, Callable, List, Tuple
 
 import pytest
 from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
 from faker import Faker
 from freezegun.api import FrozenDateTimeFactory
 from repository_orm import EntityNotFoundError, FakeRepository, Repository
 
 from pydo import services
-from pydo.model.task import RecurrentTask, Task, TaskChanges, TaskSelector, TaskState
+from pydo.model.task import (
+    RecurrentTask,
+    Task,
+    TaskChanges,
+    TaskCounters,
+    TaskSelector,
+    TaskState,
+)
 
 from ..factories import RecurrentTaskFactory
 
@@ -111,6 +119,35 @@ class TestTaskAdd:
             f"Added first child task with id {child_task.id_}",
         ) in caplog.record_tuples
 
+    def test_add_tasks_creates_many_tasks(
+        self, repo: FakeRepository, task: Task, faker: Faker
+    ) -> None:
+        """
+        Given: A repository with a task.
+        When: Adding a simple and a recurrent task with the add_tasks service.
+        Then: The tasks are added with the next ids of each model, and the child of
+            the recurrent task is added too.
+        """
+        changes = [
+            TaskChanges(task_attributes={"description": faker.sentence()}),
+            TaskChanges(
+                task_attributes={
+                    "description": faker.sentence(),
+                    "due": faker.date_time(),
+                    "recurrence": "1d",
+                    "recurrence_type": "recurring",
+                }
+            ),
+        ]
+
+        result = services.add_tasks(repo, iter(changes))
+
+        assert result[0].id_ == task.id_ + 1
+        assert repo.get(result[0].id_, [Task]) == result[0]
+        assert repo.get(result[1].id_, [RecurrentTask]) == result[1]
+        child_task = repo.search({"parent_id": result[1].id_}, [Task])[0]
+        assert child_task.id_ == task.id_ + 2
+
 
 @pytest.mark.parametrize(
     ("action", "state"),
@@ -278,6 +315,127 @@ class TestTaskDoAndDel:
             f"with state {state}",
         ) not in caplog.record_tuples
 
+    def test_close_task_by_id_doesnt_close_other_open_tasks(
+        self,
+        action: Callable[[FakeRepository, TaskSelector], None],
+        state: str,
+        repo: FakeRepository,
+        tasks: List[Task],
+    ) -> None:
+        """
+        Given: Three open tasks.
+        When: using the do_tasks or rm_tasks on the id of one of them.
+        Then: Only that task is closed.
+        """
+        selector = TaskSelector(task_ids=[tasks[0].id_])
+
+        action(repo, selector)  # act
+
+        assert repo.get(tasks[0].id_, [Task]).state == state
+        assert repo.get(tasks[1].id_, [Task]).active
+        assert repo.get(tasks[2].id_, [Task]).active
+
+    def test_close_many_children_generates_next_children_of_each_parent(
+        self,
+        action: Callable[[FakeRepository, TaskSelector], None],
+        state: str,
+        repo: FakeRepository,
+    ) -> None:
+        """
+        Given: A repository with three parents and their children.
+        When: Using the do_tasks or rm_tasks on all the children at once.
+        Then: The children are closed and each parent breeds a new child.
+        """
+        parent_tasks = RecurrentTaskFactory.create_batch(3, state="backlog")
+        child_tasks = [parent_task.breed_children() for parent_task in parent_tasks]
+        for task in [*parent_tasks, *child_tasks]:
+            repo.add(task)
+        repo.commit()
+        selector = TaskSelector(task_ids=[child.id_ for child in child_tasks])
+
+        action(repo, selector)  # act
+
+        for child_task in child_tasks:
+            assert repo.get(child_task.id_, [Task]).state == state
+        for parent_task in parent_tasks:
+            new_children = repo.search(
+                {"parent_id": parent_task.id_, "active": True}, [Task]
+            )
+            assert len(new_children) == 1
+
+    def test_close_many_children_fetches_their_parents_at_once(
+        self,
+        action: Callable[[FakeRepository, TaskSelector], None],
+        state: str,
+        repo: FakeRepository,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        Given: A repository with three parents and two children of each.
+        When: Using the do_tasks or rm_tasks on all the children at once.
+        Then: The parents are fetched in a single lookup of their ids.
+        """
+        parent_tasks = RecurrentTaskFactory.create_batch(3, state="backlog")
+        child_tasks = [
+            parent_task.breed_children()
+            for parent_task in parent_tasks
+            for _ in range(2)
+        ]
+        for index, child_task in enumerate(child_tasks):
+            child_task.id_ = index
+        for task in [*parent_tasks, *child_tasks]:
+            repo.add(task)
+        repo.commit()
+        lookups = []
+        get_entities = services.get_entities
+
+        def spy_get_entities(*args: Any) -> List[Any]:
+            lookups.append(args[1:])
+            return get_entities(*args)
+
+        monkeypatch.setattr(services, "get_entities", spy_get_entities)
+        selector = TaskSelector(task_ids=[child.id_ for child in child_tasks])
+
+        action(repo, selector)  # act
+
+        assert lookups[-1] == (
+            [child.parent_id for child in child_tasks],
+            [RecurrentTask],
+        )
+        assert len(lookups) == 2
+
+    def test_close_child_whose_parent_shares_id_with_a_task(
+        self,
+        action: Callable[[FakeRepository, TaskSelector], None],
+        state: str,
+        repo: FakeRepository,
+    ) -> None:
+        """
+        Given: A recurrent task whose first child has the same id as the parent,
+            as ids are assigned independently for each model.
+        When: Using the do_tasks or rm_tasks on the child.
+        Then: The child is closed and the next child is created.
+        """
+        parent_task = services.add_task(
+            repo,
+            TaskChanges(
+                task_attributes={
+                    "description": "Recurrent task",
+                    "due": datetime(2020, 1, 1),
+                    "recurrence": "1d",
+                    "recurrence_type": "recurring",
+                }
+            ),
+        )
+        child_task = repo.search({"parent_id": parent_task.id_}, [Task])[0]
+        assert child_task.id_ == parent_task.id_
+        selector = TaskSelector(task_ids=[child_task.id_])
+
+        action(repo, selector)  # act
+
+        assert repo.get(child_task.id_, [Task]).state == state
+        assert len(repo.search({"active": True}, [Task])) == 1
+
 
 class TestTaskMod:
     """Test the modification of tasks."""
@@ -588,6 +746,73 @@ class TestTaskThaw:
             services.thaw_tasks(repo, selector)  # act
 
 
+class TestCounters:
+    """Test the counters of open tasks of each area and tag."""
+
+    def test_services_keep_the_counters_updated(self, repo: FakeRepository) -> None:
+        """
+        Given: An empty repository
+        When: Adding, modifying, closing, freezing and thawing tasks
+        Then: The stored counters match the ones counted from the open tasks
+        """
+        services.add_task(
+            repo, TaskChanges(task_attributes={"description": "A", "area": "home"})
+        )
+        services.add_tasks(
+            repo,
+            [
+                TaskChanges(task_attributes={"description": "B"}, tags_to_add=["t1"]),
+                TaskChanges(
+                    task_attributes={
+                        "description": "C",
+                        "area": "work",
+                        "due": datetime(2020, 1, 1),
+                        "recurrence": "1d",
+                        "recurrence_type": "recurring",
+                    },
+                ),
+            ],
+        )
+        services.modify_tasks(
+            repo,
+            TaskSelector(task_ids=[1]),
+            TaskChanges(task_attributes={"area": "home"}, tags_to_remove=["t1"]),
+        )
+        services.do_tasks(repo, TaskSelector(task_ids=[0]))
+        services.freeze_tasks(repo, TaskSelector(task_ids=[0], model=RecurrentTask))
+        services.thaw_tasks(repo, TaskSelector(task_ids=[0]))
+
+        result = repo.get(0, [TaskCounters])
+
+        assert result == services._count_open_tasks(repo)
+        assert result.areas == {"home": 1, "work": 1}
+        assert result.tags == {"None": 2}
+
+    def test_rebuild_counters_counts_the_open_tasks(
+        self, repo: FakeRepository, caplog: LogCaptureFixture
+    ) -> None:
+        """
+        Given: Open tasks added without the services, and outdated counters.
+        When: rebuild_counters is called.
+        Then: The counters are stored with the number of open tasks.
+        """
+        repo.add(Task(description="A", area="home", tags=["t1", "t2"]))
+        repo.add(Task(description="B", area="home"))
+        repo.add(TaskCounters(areas={"work": 3}))
+        repo.commit()
+
+        services.rebuild_counters(repo)  # act
+
+        result = repo.get(0, [TaskCounters])
+        assert result.areas == {"home": 2}
+        assert result.tags == {"t1": 1, "t2": 1, "None": 1}
+        assert (
+            "pydo.services",
+            logging.INFO,
+            "Counted the open tasks of 1 areas and 3 tags",
+        ) in caplog.record_tuples
+
+
 def test_task_selector_doesnt_return_tasks_that_dont_match_filter(
     repo: Repository, task: Task
 ) -> None:
@@ -601,3 +826,55 @@ def test_task_selector_doesnt_return_tasks_that_dont_match_filter(
     result = services._tasks_from_selector(repo, selector)
 
     assert len(result) == 0
+
+
+def test_task_selector_returns_only_the_selected_ids(
+    repo: Repository, tasks: List[Task]
+) -> None:
+    """
+    Given: Three open tasks in the repository
+    When: using a task selector with two of their ids, one of them repeated, and a
+        filter that all of them match.
+    Then: Only the two selected tasks are returned once.
+    """
+    selector = TaskSelector(
+        task_ids=[tasks[0].id_, tasks[1].id_, tasks[0].id_],
+        task_filter={"active": True},
+    )
+
+    result = services._tasks_from_selector(repo, selector)
+
+    assert result == [tasks[0], tasks[1]]
+
+
+def test_task_selector_doesnt_load_all_the_tasks_to_select_ids(
+    repo: Repository, tasks: List[Task], monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Given: Three open tasks in the repository
+    When: using a task selector with two of their ids.
+    Then: The selected tasks are fetched without loading all the tasks.
+    """
+    monkeypatch.setattr(repo, "all", None)
+    selector = TaskSelector(task_ids=[tasks[1].id_, tasks[0].id_])
+
+    result = services._tasks_from_selector(repo, selector)
+
+    assert result == [tasks[1], tasks[0]]
+
+
+def test_task_selector_raises_error_if_an_id_is_not_found(
+    repo: Repository, tasks: List[Task]
+) -> None:
+    """
+    Given: Three tasks in the repository
+    When: using a task selector with one of their ids and an inexistent one.
+    Then: An error is raised.
+    """
+    selector = TaskSelector(task_ids=[tasks[0].id_, 9999999])
+
+    with pytest.raises(
+        EntityNotFoundError,
+        match="There are no entities of type Task in the repository with id 9999999",
+    ):
+        services._tasks_from_selector(repo, selector)
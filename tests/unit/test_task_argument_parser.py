@@ -6,7 +6,11 @@ import pytest
 from faker import Faker
 from freezegun.api import FrozenDateTimeFactory
 
-from pydo.entrypoints.utils import _parse_changes, _parse_task_selector
+from pydo.entrypoints.utils import (
+    _parse_changes,
+    _parse_import_lines,
+    _parse_task_selector,
+)
 
 
 def test_parse_extracts_description_without_quotes(faker: Faker) -> None:
@@ -193,3 +197,85 @@ def test_parse_extracts_tags_to_remove(faker: Faker) -> None:
 
     assert result.task_attributes == {"description": description}
     assert result.tags_to_remove == tags
+
+
+def test_parse_keeps_unknown_keys_in_the_description() -> None:
+    """
+    Given: Arguments with colons that don't start with a known key.
+    When: The changes are parsed.
+    Then: They're part of the description.
+    """
+    task_arguments = ["Meet", "at", "10:30", "unknown:value"]
+
+    result = _parse_changes(task_arguments)
+
+    assert result.task_attributes == {"description": "Meet at 10:30 unknown:value"}
+
+
+def test_parse_extracts_sort_criteria() -> None:
+    """
+    Given: A sort argument with many criteria.
+    When: The task selector is parsed.
+    Then: The sort criteria are extracted in order.
+    """
+    result = _parse_task_selector(["sort:-priority,id_", "ar:home"])
+
+    assert result.sort == ["-priority", "id_"]
+    assert result.task_filter == {"area": "home"}
+
+
+def test_parse_extracts_limit() -> None:
+    """
+    Given: A limit argument.
+    When: The task selector of a report is parsed.
+    Then: The limit is extracted as an integer and not used as a filter.
+    """
+    result = _parse_task_selector(["limit:10", "ar:home"], report=True)
+
+    assert result.limit == 10
+    assert result.task_filter == {"area": "home"}
+
+
+def test_parse_rejects_limit_outside_reports() -> None:
+    """
+    Given: A limit argument.
+    When: The task selector of a command that is not a report, or the changes of
+        a task are parsed.
+    Then: The program exits with an error.
+    """
+    with pytest.raises(SystemExit):
+        _parse_task_selector(["limit:10", "ar:home"])
+    with pytest.raises(SystemExit):
+        _parse_changes(["buy", "milk", "limit:3"])
+
+
+def test_parse_import_lines_accepts_arguments_and_json() -> None:
+    """
+    Given: An import file with a line of task arguments, an empty line and a JSON
+        object.
+    When: The lines are parsed.
+    Then: The changes of the two tasks are returned.
+    """
+    lines = [
+        "Don't forget pri:3 +home\n",
+        "\n",
+        '{"description": "Read", "tags": ["a"]}',
+    ]
+
+    result = list(_parse_import_lines(lines))
+
+    assert len(result) == 2
+    assert result[0].task_attributes == {"description": "Don't forget", "priority": 3}
+    assert result[0].tags_to_add == ["home"]
+    assert result[1].task_attributes == {"description": "Read"}
+    assert result[1].tags_to_add == ["a"]
+
+
+def test_parse_import_lines_raises_error_on_invalid_json() -> None:
+    """
+    Given: An import file with an invalid JSON object.
+    When: The lines are parsed.
+    Then: A ValueError is raised with the line number.
+    """
+    with pytest.raises(ValueError, match="Line 2 is not a valid JSON object"):
+        list(_parse_import_lines(["Task", "{invalid"]))
@@ -2,6 +2,7 @@
 
 import re
 from contextlib import suppress
+from datetime import datetime
 from typing import Any, Dict, List, Tuple
 
 import pytest
@@ -12,7 +13,8 @@ from tests import factories
 
 from pydo import views
 from pydo.config import Config
-from pydo.model.task import Task, TaskSelector
+from pydo.exceptions import ConfigError
+from pydo.model.task import Task, TaskSelector, TaskState
 from pydo.model.views import Report
 from pydo.views import print_task_report
 
@@ -70,6 +72,21 @@ def test_remove_null_columns_removes_columns_if_all_nulls(config: Config) -> Non
     assert report.data[0] == [tasks[0].id_, tasks[0].description]
 
 
+def test_remove_null_columns_keeps_columns_with_any_value() -> None:
+    """
+    Given: A report created with data whose columns only have values in some rows.
+    When: More rows are added and the null columns are removed.
+    Then: Only the columns without any value are removed.
+    """
+    report = Report(labels=["ID", "Due", "Area", "Tags"], data=[["1", "", "", ""]])
+    report.add(["2", None, "", "tag"])
+
+    report._remove_null_columns()  # act
+
+    assert report.labels == ["ID", "Tags"]
+    assert report.data == [["1", ""], ["2", "tag"]]
+
+
 def test_task_report_prints_task_attributes(
     repo: Repository, config: Config, capsys: CaptureFixture[Any], faker: Faker
 ) -> None:
@@ -339,6 +356,75 @@ def test_report_print_returns_an_error_if_no_data() -> None:
         Report(labels=["ID"]).print()
 
 
+def test_report_print_streams_long_reports_in_chunks(
+    capsys: CaptureFixture[Any],
+) -> None:
+    """
+    Given: A report with more rows than the chunk size.
+    When: printing it's data
+    Then: The header is printed once, and all the rows are printed in order with
+        the same column widths.
+    """
+    report = Report(labels=["ID", "Description"])
+    for id_ in range(5):
+        report.add([str(id_), "a" * id_])
+
+    report.print(chunk_size=2)  # act
+
+    out, err = capsys.readouterr()
+    lines = [line for line in out.splitlines() if line.strip() != ""]
+    assert err == ""
+    assert lines[0].split() == ["ID", "Description"]
+    assert [line.split()[0] for line in lines[2:]] == ["0", "1", "2", "3", "4"]
+    assert {line.index("a") for line in lines[3:]} == {lines[0].index("Description")}
+
+
+@pytest.mark.parametrize("rows", [5, 70])
+def test_report_print_has_the_same_layout_with_and_without_chunks(
+    rows: int, capsys: CaptureFixture[Any]
+) -> None:
+    """
+    Given: A report without and with footer.
+    When: printing it in a single table and in chunks.
+    Then: The output is the same.
+    """
+    report = Report(labels=["ID", "Description", "Area"])
+    for id_ in range(rows):
+        report.add([str(id_), "a" * (id_ % 7), "" if id_ % 2 else "home"])
+    report.print(chunk_size=rows)
+    out, _ = capsys.readouterr()
+
+    report.print(chunk_size=3)  # act
+
+    result, err = capsys.readouterr()
+    assert err == ""
+    assert result == out
+
+
+def test_report_print_streams_the_pages_after_the_data(
+    capsys: CaptureFixture[Any],
+) -> None:
+    """
+    Given: A report with one row and a page of rows with a longer description.
+    When: printing it with the page
+    Then: All the rows are printed in order with the column widths of the first
+        chunk, and the column that is empty in the data is kept.
+    """
+    report = Report(labels=["ID", "Description", "Area"], data=[["0", "a", ""]])
+    pages = iter([[["1", "b", ""], ["2", "c" * 20, "home"]]])
+
+    report.print(chunk_size=1, pages=pages)  # act
+
+    out, err = capsys.readouterr()
+    lines = [line for line in out.splitlines() if line.strip() != ""]
+    assert err == ""
+    assert lines[0].split() == ["ID", "Description", "Area"]
+    assert [line.split()[0] for line in lines[2:]] == ["0", "1", "2"]
+    assert lines[3].index("b") == lines[0].index("Description")
+    assert lines[4].index("home") == lines[0].index("Area")
+    assert list(pages) == []
+
+
 @pytest.mark.parametrize(
     ("config_key", "error"),
     [
@@ -375,6 +461,144 @@ def test_print_report_raises_error_on_bad_report_configuration(
         print_task_report(repo, config, "open")
 
 
+@pytest.mark.parametrize("limit", ["3", True])
+def test_report_query_raises_error_if_the_limit_is_not_an_integer(
+    config: Config, limit: Any
+) -> None:
+    """
+    Given: A report whose configured limit is not an integer
+    When: Building the query of the report
+    Then: A ConfigError with the configuration key is raised
+    """
+    config.set("reports.task_reports.open.limit", limit)
+
+    with pytest.raises(
+        ConfigError,
+        match="The configuration reports.task_reports.open.limit is not an integer",
+    ):
+        views.report_query(config, "open")
+
+
+def test_report_window_reads_only_the_pages_of_the_requested_rows(
+    repo: Repository, config: Config
+) -> None:
+    """
+    Given: A repository with 10 open tasks
+    When: Reading slices of the open report with a window of pages of 3 rows
+    Then: The rows of the slices are returned, only the last pages are kept in
+        memory, and the length is known once the last page is read.
+    """
+    for index in range(10):
+        repo.add(Task(id_=index, description=f"Task {index}"))
+    repo.commit()
+    window = views.ReportWindow(repo, config, "open", page_size=3, cached_pages=2)
+
+    first_rows = window.rows(2, 3)
+    last_rows = window.rows(8, 5)
+
+    assert [row[:2] for row in first_rows] == [
+        ["2", "Task 2"],
+        ["3", "Task 3"],
+        ["4", "Task 4"],
+    ]
+    assert [row[:2] for row in last_rows] == [["8", "Task 8"], ["9", "Task 9"]]
+    assert list(window._pages) == [2, 3]
+    assert window.length == 10
+    assert window.rows(10, 5) == []
+
+
+def test_report_window_pages_yields_the_rows_by_pages(
+    repo: Repository, config: Config
+) -> None:
+    """
+    Given: A repository with 5 open tasks and a report window in pages of 2 rows
+    When: Iterating over the pages of the report
+    Then: The rows are returned in pages of 2 rows, and only the last read one is
+        kept in memory
+    """
+    for index in range(5):
+        repo.add(Task(id_=index, description=f"Task {index}"))
+    repo.commit()
+    window = views.ReportWindow(repo, config, "open", page_size=2, cached_pages=1)
+
+    result = [[row[0] for row in page] for page in window.pages()]
+
+    assert result == [["0", "1"], ["2", "3"], ["4"]]
+    assert list(window._pages) == [2]
+
+
+def test_report_window_missing_pages_skips_the_read_and_the_past_the_end_pages(
+    repo: Repository, config: Config
+) -> None:
+    """
+    Given: A repository with 5 open tasks and a report window in pages of 2 rows
+        that has read the second and the last pages
+    When: Asking for the missing pages of the first 10 rows
+    Then: Only the first page is missing
+    """
+    for index in range(5):
+        repo.add(Task(id_=index, description=f"Task {index}"))
+    repo.commit()
+    window = views.ReportWindow(repo, config, "open", page_size=2)
+    window.rows(2, 3)
+
+    result = window.missing_pages(0, 10)
+
+    assert result == [0]
+    assert window.length == 5
+
+
+def test_report_window_respects_the_limit_of_the_selector(
+    repo: Repository, config: Config
+) -> None:
+    """
+    Given: A repository with 10 open tasks
+    When: Reading the open report with a limit of 4 tasks in pages of 3 rows
+    Then: Only the first 4 rows are returned
+    """
+    for index in range(10):
+        repo.add(Task(id_=index, description=f"Task {index}"))
+    repo.commit()
+    window = views.ReportWindow(
+        repo, config, "open", TaskSelector(limit=4), page_size=3
+    )
+
+    result = window.rows(0, 10)
+
+    assert [row[0] for row in result] == ["0", "1", "2", "3"]
+    assert window.length == 4
+
+
+def test_format_column_formats_the_dates_with_the_configured_format(
+    config: Config,
+) -> None:
+    """
+    Given: A column with repeated dates and None values.
+    When: _format_column is called.
+    Then: The dates are formatted with the reports.date_format and the None values
+        are empty strings.
+    """
+    date = datetime(2020, 1, 2, 3, 4)
+    config.set("reports.date_format", "%Y-%m-%d")
+
+    result = views._format_column(config, [date, None, date])
+
+    assert result == ["2020-01-02", "", "2020-01-02"]
+
+
+def test_format_column_formats_the_enums_and_lists(config: Config) -> None:
+    """
+    Given: Columns of enums and lists.
+    When: _format_column is called.
+    Then: The enums are shown by their titled value and the lists are joined.
+    """
+    states = views._format_column(config, [TaskState.BACKLOG, None])
+    tags = views._format_column(config, [["tag1", "tag2"], []])
+
+    assert states == ["Backlog", ""]
+    assert tags == ["tag1, tag2", ""]
+
+
 class TestSorting:
     """Test the sorting of tasks."""
 
@@ -459,3 +683,38 @@ class TestSorting:
         result = views.sort_tasks(tasks.copy(), ["priority", "-id_"])
 
         assert result == [tasks[2], tasks[0], tasks[1]]
+
+    def test_sort_puts_tasks_without_value_last(self) -> None:
+        """
+        Given: Tasks with and without priority and due
+        When: sort is called with -priority, due, id_
+        Then: The tasks are sorted in one pass, with the ones without value last in
+            each criterion, instead of raising a TypeError.
+        """
+        tasks = [
+            Task(id_=0, priority=4),
+            Task(id_=1, due=datetime(2020, 1, 1)),
+            Task(id_=2, priority=4, due=datetime(2020, 1, 2)),
+            Task(id_=3),
+            Task(id_=4, priority=4, due=datetime(2020, 1, 2)),
+        ]
+
+        result = views.sort_tasks(tasks.copy(), ["-priority", "due", "id_"])
+
+        assert result == [tasks[2], tasks[4], tasks[0], tasks[1], tasks[3]]
+
+    def test_sort_compares_enums_by_value(self) -> None:
+        """
+        Given: Tasks with different states
+        When: sort is called with state
+        Then: The tasks are sorted by the value of the state
+        """
+        tasks = [
+            Task(id_=0, state=TaskState.TODO),
+            Task(id_=1, state=TaskState.DONE),
+            Task(id_=2, state=TaskState.BACKLOG),
+        ]
+
+        result = views.sort_tasks(tasks.copy(), ["state"])
+
+        assert result == [tasks[2], tasks[1], tasks[0]]